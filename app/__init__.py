@@ -1,8 +1,15 @@
 from flask import Flask
 from flask_cors import CORS
 from dotenv import load_dotenv
+import atexit
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from app.services.db_service import DatabaseService
+from app.services.artifact_cache import ArtifactCache
+from app.services.lance_maintenance import LanceMaintenance, MaintenanceScheduler
+from app.utils.metrics import init_metrics
+from app.utils.profiling import ProfileStore, init_profiling
 from app.config import Config
 
 # Load environment variables
@@ -19,15 +26,62 @@ def create_app():
     # Initialize database service
     db_service = DatabaseService(
         postgres_config=config.postgres_config,
-        lance_db_path=app.config['LANCE_DB_PATH']
+        lance_db_path=app.config['LANCE_DB_PATH'],
+        pool_config=config.postgres_pool_config,
+        lance_config=config.lance_config,
+        use_story_summary=config.USE_STORY_SUMMARY,
+        fanout_workers=config.FANOUT_WORKERS,
+        lance_timeout=config.LANCE_TIMEOUT,
+        pg_timeout=config.POSTGRES_TIMEOUT,
+        version_ttl=config.DATA_VERSION_TTL
     )
+    db_service.check_schema(strict=config.LANCE_SCHEMA_STRICT)
+    db_service.check_migrations()
+    if config.LANCE_ENSURE_INDEXES:
+        db_service.ensure_indexes()
     app.config['DB_SERVICE'] = db_service
 
+    # Periodic compaction, version cleanup and index refresh of user_stories
+    app.config['LANCE_MAINTENANCE'] = None
+    if config.LANCE_MAINTENANCE_INTERVAL > 0:
+        scheduler = MaintenanceScheduler(
+            LanceMaintenance(app.config['LANCE_DB_PATH'], **config.lance_maintenance_config),
+            interval=config.LANCE_MAINTENANCE_INTERVAL
+        )
+        scheduler.start()
+        app.config['LANCE_MAINTENANCE'] = scheduler
+
+    # Initialize cache for generated download artifacts
+    app.config['ARTIFACT_CACHE'] = ArtifactCache(**config.artifact_cache_config)
+
+    # Worker processes for CPU-bound workbook generation; spawn avoids
+    # forking a multi-threaded server
+    app.config['EXPORT_EXECUTOR'] = ProcessPoolExecutor(
+        max_workers=config.EXPORT_WORKERS,
+        mp_context=multiprocessing.get_context('spawn')
+    )
+    atexit.register(app.config['EXPORT_EXECUTOR'].shutdown, wait=False, cancel_futures=True)
+
+    # Per-request stage timings and the /metrics endpoint
+    if config.METRICS_ENABLED:
+        init_metrics(app)
+
+    # Opt-in request profiling, fetched through /api/admin/profiles
+    app.config['PROFILE_STORE'] = None
+    if config.PROFILING_ENABLED:
+        app.config['PROFILE_STORE'] = ProfileStore(
+            max_profiles=config.PROFILE_STORE_MAX_PROFILES,
+            max_bytes=config.PROFILE_STORE_MAX_BYTES
+        )
+        init_profiling(app, app.config['PROFILE_STORE'], sample_rate=config.PROFILE_SAMPLE_RATE)
+
     # Register blueprints
     from app.routes.stories import stories_bp
     from app.routes.testcases import testcases_bp
+    from app.routes.admin import admin_bp
 
     app.register_blueprint(stories_bp, url_prefix='/api/stories')
     app.register_blueprint(testcases_bp, url_prefix='/api/testcases')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
 
     return app 
\ No newline at end of file
@@ -1,11 +1,15 @@
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Placeholder SECRET_KEY; anything signed with it can be forged
+DEFAULT_SECRET_KEY = 'dev'
+
 class Config:
     # Flask
-    SECRET_KEY = os.getenv('SECRET_KEY', 'dev')
+    SECRET_KEY = os.getenv('SECRET_KEY', DEFAULT_SECRET_KEY)
     DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
 
     # Database
@@ -14,8 +18,67 @@ class Config:
     POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '')
     POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
     POSTGRES_PORT = os.getenv('POSTGRES_PORT', '5432')
+
+    # Serve GET /api/stories/ from the story_summary read model
+    USE_STORY_SUMMARY = os.getenv('USE_STORY_SUMMARY', 'False').lower() == 'true'
+
+    # Generated download artifacts
+    ARTIFACT_CACHE_MAX_BYTES = int(os.getenv('ARTIFACT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    ARTIFACT_CACHE_MAX_ITEM_BYTES = int(os.getenv('ARTIFACT_CACHE_MAX_ITEM_BYTES', str(8 * 1024 * 1024)))
+    ARTIFACT_CACHE_DIR = os.getenv('ARTIFACT_CACHE_DIR') or None
+    ARTIFACT_CACHE_DISK_MAX_BYTES = int(os.getenv('ARTIFACT_CACHE_DISK_MAX_BYTES', str(1024 * 1024 * 1024)))
+
+    # Bulk export
+    EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '4'))
+    BULK_EXPORT_MAX_STORIES = int(os.getenv('BULK_EXPORT_MAX_STORIES', '200'))
+
+    # Test cases fetched per round trip by the NDJSON stream
+    TEST_CASE_STREAM_ITERSIZE = int(os.getenv('TEST_CASE_STREAM_ITERSIZE', '500'))
+
+    # Concurrent LanceDB + PostgreSQL lookups
+    FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', '16'))
+    LANCE_TIMEOUT = float(os.getenv('LANCE_TIMEOUT', '5'))
+    POSTGRES_TIMEOUT = float(os.getenv('POSTGRES_TIMEOUT', '5'))
+
+    # Conditional GET for the story endpoints
+    DATA_VERSION_TTL = float(os.getenv('DATA_VERSION_TTL', '1'))
+    CACHE_CONTROL = {
+        'stories.get_stories': os.getenv('CACHE_CONTROL_STORIES', 'no-cache'),
+        'stories.get_story': os.getenv('CACHE_CONTROL_STORY', 'no-cache')
+    }
+
+    # PostgreSQL connection pool
+    POSTGRES_POOL_MIN = int(os.getenv('POSTGRES_POOL_MIN', '1'))
+    POSTGRES_POOL_MAX = int(os.getenv('POSTGRES_POOL_MAX', '10'))
+    POSTGRES_POOL_TIMEOUT = float(os.getenv('POSTGRES_POOL_TIMEOUT', '5'))
+    POSTGRES_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv('POSTGRES_POOL_HEALTH_CHECK_INTERVAL', '30'))
     
     LANCE_DB_PATH = os.getenv('LANCE_DB_PATH', './data/lance_db')
+    LANCE_SCAN_BATCH_SIZE = int(os.getenv('LANCE_SCAN_BATCH_SIZE', '8192'))
+    LANCE_STORY_CACHE_SIZE = int(os.getenv('LANCE_STORY_CACHE_SIZE', '1024'))
+    LANCE_REFRESH_INTERVAL = float(os.getenv('LANCE_REFRESH_INTERVAL', '1'))
+    LANCE_ENSURE_INDEXES = os.getenv('LANCE_ENSURE_INDEXES', 'True').lower() == 'true'
+    # Refuse to start unless user_stories matches the canonical schema exactly
+    LANCE_SCHEMA_STRICT = os.getenv('LANCE_SCHEMA_STRICT', 'False').lower() == 'true'
+
+    # Background compaction, version cleanup and index refresh (seconds between runs, 0 disables)
+    LANCE_MAINTENANCE_INTERVAL = float(os.getenv('LANCE_MAINTENANCE_INTERVAL', '0'))
+    LANCE_VERSION_RETENTION_HOURS = float(os.getenv('LANCE_VERSION_RETENTION_HOURS', '168'))
+    LANCE_TARGET_ROWS_PER_FRAGMENT = int(os.getenv('LANCE_TARGET_ROWS_PER_FRAGMENT', str(1024 * 1024)))
+    LANCE_VECTOR_RETRAIN_FRACTION = float(os.getenv('LANCE_VECTOR_RETRAIN_FRACTION', '0.2'))
+
+    # Similar stories search: IVF partitions probed and exact re-ranking factor (0 disables)
+    VECTOR_NPROBES = int(os.getenv('VECTOR_NPROBES', '20'))
+    VECTOR_REFINE_FACTOR = int(os.getenv('VECTOR_REFINE_FACTOR', '0'))
+
+    # Server-Timing header and Prometheus /metrics endpoint
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+
+    # cProfile of requests sent with a signed X-Profile header, or of a sampled fraction
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_STORE_MAX_PROFILES = int(os.getenv('PROFILE_STORE_MAX_PROFILES', '50'))
+    PROFILE_STORE_MAX_BYTES = int(os.getenv('PROFILE_STORE_MAX_BYTES', str(16 * 1024 * 1024)))
 
     @property
     def postgres_config(self):
@@ -27,6 +90,40 @@ class Config:
             'port': self.POSTGRES_PORT
         }
 
+    @property
+    def artifact_cache_config(self):
+        return {
+            'max_bytes': self.ARTIFACT_CACHE_MAX_BYTES,
+            'max_item_bytes': self.ARTIFACT_CACHE_MAX_ITEM_BYTES,
+            'disk_dir': self.ARTIFACT_CACHE_DIR,
+            'disk_max_bytes': self.ARTIFACT_CACHE_DISK_MAX_BYTES
+        }
+
+    @property
+    def lance_config(self):
+        return {
+            'batch_size': self.LANCE_SCAN_BATCH_SIZE,
+            'cache_size': self.LANCE_STORY_CACHE_SIZE,
+            'refresh_interval': self.LANCE_REFRESH_INTERVAL
+        }
+
+    @property
+    def lance_maintenance_config(self):
+        return {
+            'retention': timedelta(hours=self.LANCE_VERSION_RETENTION_HOURS),
+            'target_rows_per_fragment': self.LANCE_TARGET_ROWS_PER_FRAGMENT,
+            'vector_retrain_fraction': self.LANCE_VECTOR_RETRAIN_FRACTION
+        }
+
+    @property
+    def postgres_pool_config(self):
+        return {
+            'minconn': self.POSTGRES_POOL_MIN,
+            'maxconn': self.POSTGRES_POOL_MAX,
+            'timeout': self.POSTGRES_POOL_TIMEOUT,
+            'health_check_interval': self.POSTGRES_POOL_HEALTH_CHECK_INTERVAL
+        }
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
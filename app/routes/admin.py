@@ -0,0 +1,108 @@
+from flask import Blueprint, jsonify, current_app, request
+from app.utils.profiling import authorized, to_pstats, to_speedscope, to_text
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/pool', methods=['GET'])
+def get_pool_stats():
+    """Get PostgreSQL connection pool statistics"""
+    try:
+        if not authorized(current_app.config['SECRET_KEY']):
+            return jsonify({'error': 'A valid X-Profile token is required'}), 403
+        db_service = current_app.config['DB_SERVICE']
+        return jsonify(db_service.pool_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/artifact-cache', methods=['GET'])
+def get_artifact_cache_stats():
+    """Get download artifact cache statistics"""
+    try:
+        if not authorized(current_app.config['SECRET_KEY']):
+            return jsonify({'error': 'A valid X-Profile token is required'}), 403
+        return jsonify(current_app.config['ARTIFACT_CACHE'].stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/lance-maintenance', methods=['GET'])
+def get_lance_maintenance_report():
+    """Get the report of the last scheduled LanceDB maintenance run"""
+    try:
+        if not authorized(current_app.config['SECRET_KEY']):
+            return jsonify({'error': 'A valid X-Profile token is required'}), 403
+        scheduler = current_app.config['LANCE_MAINTENANCE']
+        if scheduler is None:
+            return jsonify({'error': 'Scheduled maintenance is disabled'}), 404
+        return jsonify({'interval': scheduler.interval, 'active': scheduler.lock.held,
+                        'last_report': scheduler.last_report})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+def list_profiles():
+    """List stored request profiles, newest first"""
+    try:
+        profile_store = current_app.config['PROFILE_STORE']
+        if profile_store is None:
+            return jsonify({'error': 'Profiling is disabled'}), 404
+        if not authorized(current_app.config['SECRET_KEY']):
+            return jsonify({'error': 'A valid X-Profile token is required'}), 403
+        return jsonify({'profiles': profile_store.list(), 'store': profile_store.stats()})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/profiles', methods=['DELETE'])
+def clear_profiles():
+    """Drop all stored request profiles"""
+    try:
+        profile_store = current_app.config['PROFILE_STORE']
+        if profile_store is None:
+            return jsonify({'error': 'Profiling is disabled'}), 404
+        if not authorized(current_app.config['SECRET_KEY']):
+            return jsonify({'error': 'A valid X-Profile token is required'}), 403
+        profile_store.clear()
+        return jsonify(profile_store.stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/profiles/<int:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Download a request profile as pstats (default), speedscope JSON or a text report"""
+    try:
+        profile_store = current_app.config['PROFILE_STORE']
+        if profile_store is None:
+            return jsonify({'error': 'Profiling is disabled'}), 404
+        if not authorized(current_app.config['SECRET_KEY']):
+            return jsonify({'error': 'A valid X-Profile token is required'}), 403
+
+        profile_format = request.args.get('format', 'pstats').lower()
+        if profile_format not in ('pstats', 'speedscope', 'text'):
+            return jsonify({'error': f'Unsupported format: {profile_format}'}), 400
+
+        info, stats = profile_store.info(profile_id), profile_store.get(profile_id)
+        if info is None or stats is None:
+            return jsonify({'error': 'Profile not found'}), 404
+
+        if profile_format == 'speedscope':
+            name = f"{info['method']} {info['path']}"
+            return current_app.response_class(
+                current_app.json.dumps(to_speedscope(stats, name)),
+                mimetype='application/json',
+                headers={'Content-Disposition': f'attachment; filename=profile_{profile_id}.speedscope.json'}
+            )
+        if profile_format == 'text':
+            sort = request.args.get('sort', 'cumulative')
+            limit = request.args.get('limit', 50, type=int)
+            return current_app.response_class(to_text(stats, sort, limit), mimetype='text/plain')
+        return current_app.response_class(
+            to_pstats(stats),
+            mimetype='application/octet-stream',
+            headers={'Content-Disposition': f'attachment; filename=profile_{profile_id}.prof'}
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,15 +1,20 @@
 from flask import Blueprint, jsonify, request, current_app
-from app.services.db_service import DatabaseService
+from app.services.db_service import DatabaseService, SearchUnavailable, StoreTimeout
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.http_cache import conditional
+from app.utils.metrics import timed
 
 stories_bp = Blueprint('stories', __name__)
 
 @stories_bp.route('/', methods=['GET'])
+@conditional
 def get_stories():
-    """Get paginated stories"""
+    """Get paginated stories (offset pages, or keyset pages when ``cursor`` is given)"""
     try:
         # Get pagination parameters from query string
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')
         
         # Validate pagination parameters
         if page < 1:
@@ -18,19 +23,70 @@ def get_stories():
             per_page = 10
             
         db_service = current_app.config['DB_SERVICE']
-        result = db_service.get_recent_stories(page=page, per_page=per_page)
-        return jsonify(result)
+        
+        if cursor is not None:
+            # Cursor mode: an empty cursor starts from the newest story
+            try:
+                position = decode_cursor(cursor) if cursor else None
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            include_total = request.args.get('include_total', 'false').lower() == 'true'
+            result = db_service.get_stories_after(position, per_page=per_page, include_total=include_total)
+            next_key = result.pop('next_key')
+            result['next_cursor'] = encode_cursor(*next_key) if next_key else None
+            with timed('serialize'):
+                return jsonify(result)
+        
+        include_total = request.args.get('include_total', 'true').lower() == 'true'
+        result = db_service.get_recent_stories(page=page, per_page=per_page, include_total=include_total)
+        with timed('serialize'):
+            return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @stories_bp.route('/<int:story_id>', methods=['GET'])
+@conditional
 def get_story(story_id):
     """Get a specific story"""
     try:
         db_service = current_app.config['DB_SERVICE']
         story = db_service.get_story(story_id)
         if story:
-            return jsonify(story)
+            with timed('serialize'):
+                return jsonify(story)
         return jsonify({'error': 'Story not found'}), 404
+    except StoreTimeout as e:
+        return jsonify({'error': str(e)}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stories_bp.route('/<int:story_id>/similar', methods=['GET'])
+def get_similar_stories(story_id):
+    """Get the stories most similar to a story by description embedding"""
+    try:
+        k = request.args.get('k', 10, type=int)
+        nprobes = request.args.get('nprobes', current_app.config['VECTOR_NPROBES'], type=int)
+        refine_factor = request.args.get('refine_factor', current_app.config['VECTOR_REFINE_FACTOR'], type=int)
+        processed = request.args.get('processed')
+        
+        # Validate search parameters
+        if k < 1 or k > 100:
+            k = 10
+        if nprobes < 1:
+            nprobes = current_app.config['VECTOR_NPROBES']
+        if refine_factor is None or refine_factor < 0:
+            return jsonify({'error': 'refine_factor must be a non-negative integer'}), 400
+        if processed is not None:
+            processed = processed.lower() == 'true'
+        
+        db_service = current_app.config['DB_SERVICE']
+        stories = db_service.get_similar_stories(story_id, k=k, nprobes=nprobes,
+                                                 refine_factor=refine_factor or None, processed=processed)
+        if stories is None:
+            return jsonify({'error': 'Story not found'}), 404
+        with timed('serialize'):
+            return jsonify({'story_id': story_id, 'stories': stories})
+    except SearchUnavailable as e:
+        return jsonify({'error': str(e)}), 409
     except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
@@ -1,61 +1,350 @@
-from flask import Blueprint, jsonify, request, send_file
-from app.services.db_service import DatabaseService
-from app.utils.excel_util import generate_excel
+from flask import Blueprint, jsonify, request, send_file, stream_with_context
+from app.services.db_service import DatabaseService, StoreTimeout
+from app.services.artifact_cache import artifact_key
+from app.utils.excel_util import generate_excel_file, generate_excel_bytes
+from app.utils.export_util import EXPORT_FORMATS
+from app.utils.zip_util import stream_zip
+from app.utils.http_cache import not_modified, set_validator
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import closing
 from flask import current_app
+import io
 import json
-import psycopg2
+import zipfile
 
 testcases_bp = Blueprint('testcases', __name__)
 
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+MAX_TEST_CASES_PER_PAGE = 500
+MAX_FIELDS = 20
+
+# Bump when an export layout changes so cached artifacts and ETags are not reused
+EXPORT_LAYOUT_VERSION = 1
+
+
+@testcases_bp.route('/<int:story_id>', methods=['GET'])
+def get_test_cases(story_id):
+    """Get one page of a story's test cases, optionally limited to some fields"""
+    try:
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', 50, type=int)
+        fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+        
+        # Validate pagination parameters
+        if offset < 0:
+            offset = 0
+        if limit < 1 or limit > MAX_TEST_CASES_PER_PAGE:
+            limit = 50
+        if len(fields) > MAX_FIELDS:
+            return jsonify({'error': f'At most {MAX_FIELDS} fields can be selected'}), 400
+        
+        db_service = current_app.config['DB_SERVICE']
+        page = db_service.get_test_case_page(story_id, offset=offset, limit=limit, fields=fields or None)
+        if page is None:
+            return jsonify({'error': 'No test cases found'}), 404
+        
+        next_offset = offset + len(page['test_cases'])
+        return jsonify({
+            'story_id': story_id,
+            'test_cases': page['test_cases'],
+            'total': page['total'],
+            'offset': offset,
+            'limit': limit,
+            'next_offset': next_offset if next_offset < page['total'] else None
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@testcases_bp.route('/<int:story_id>/stream', methods=['GET'])
+def stream_test_cases(story_id):
+    """Stream all of a story's test cases as newline-delimited JSON"""
+    try:
+        db_service = current_app.config['DB_SERVICE']
+        rows = db_service.stream_test_cases(story_id, itersize=current_app.config['TEST_CASE_STREAM_ITERSIZE'])
+        
+        # Pull the run header now so a missing story is still a 404; from
+        # here on rows holds a pooled connection until it is closed
+        try:
+            run = next(rows, None)
+            if run is None:
+                return jsonify({'error': 'No test cases found'}), 404
+            
+            def generate():
+                with closing(rows):
+                    for test_case in rows:
+                        yield test_case + '\n'
+            
+            response = current_app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+            response.headers['X-Total-Count'] = str(run[1])
+            # Also release the connection if the body is never iterated
+            response.call_on_close(rows.close)
+            return response
+        except BaseException:
+            rows.close()
+            raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 
 @testcases_bp.route('/download/<int:story_id>', methods=['GET'])
 def download_test_cases(story_id):
-    """Download test cases as Excel file"""
+    """Download test cases as an Excel (default), CSV, JSONL or Parquet file"""
     try:
         db_service = current_app.config['DB_SERVICE']
+        artifact_cache = current_app.config['ARTIFACT_CACHE']
+        
+        export_format = request.args.get('format', 'xlsx').lower()
+        if export_format != 'xlsx' and export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Unsupported format: {export_format}'}), 400
         
-        # Get story details from LanceDB
-        stories_table = db_service.lance_db.open_table("user_stories")
-        story_data = stories_table.to_pandas()
-        lance_story = story_data[story_data['story_id'] == story_id]
+        # Get story details from LanceDB and identify the latest generation
+        # run in PostgreSQL concurrently, without reading its test cases
+        lance_story, run = db_service.get_story_with_run(story_id)
         
-        if lance_story.empty:
+        if lance_story is None:
             return jsonify({'error': 'Story not found'}), 404
+        if not run:
+            return jsonify({'error': 'No test cases found'}), 404
+        
+        # The export only depends on the run and the story description, so
+        # its cache key doubles as the ETag; a repeat request is answered
+        # before the test cases are read
+        key = _artifact_key(export_format, run, lance_story['story_Description'])
+        if request.if_none_match.contains(key):
+            return not_modified(key)
+        
+        if export_format != 'xlsx':
+            # Machine-readable formats are cheap to produce, so stream them
+            # directly from a server-side cursor over the run's test cases
+            test_cases = db_service.stream_run_test_cases(
+                run['id'], itersize=current_app.config['TEST_CASE_STREAM_ITERSIZE'])
+            writer, mimetype, extension = EXPORT_FORMATS[export_format]
+            response = current_app.response_class(
+                stream_with_context(writer(_export_data(story_id, lance_story, test_cases))),
+                mimetype=mimetype,
+                headers={'Content-Disposition': f'attachment; filename=test_cases_story_{story_id}.{extension}'}
+            )
+            return set_validator(response, key)
+        
+        excel_file = artifact_cache.get(key)
+        if excel_file is None:
+            test_cases = db_service.get_test_cases(run['id'])
+            if test_cases is None:
+                return jsonify({'error': 'No test cases found'}), 404
+            
+            # Generate Excel file into a spooled temp file and cache it
+            excel_file = generate_excel_file(_export_data(story_id, lance_story, test_cases))
+            _cache_put(artifact_cache, key, excel_file)
         
-        # Get test cases from PostgreSQL
-        with psycopg2.connect(**db_service.postgres_config) as conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT test_cases
-                    FROM test_cases_generated
-                    WHERE story_id = %s
-                """, (story_id,))
-                test_cases_row = cur.fetchone()
-                
-                if not test_cases_row:
-                    return jsonify({'error': 'No test cases found'}), 404
-                
-                test_cases = test_cases_row[0]
-        
-        # Prepare data for Excel generation
-        excel_data = {
-            'story': {
-                'id': story_id,
-                'description': lance_story['story_Description'].iloc[0]
-            },
-            'test_cases': test_cases
-        }
-        
-        # Generate Excel file
-        excel_file = generate_excel(excel_data)
-        
-        # Send file
-        return send_file(
+        # Stream file in chunks
+        return set_validator(send_file(
             excel_file,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            mimetype=XLSX_MIMETYPE,
             as_attachment=True,
-            download_name=f'test_cases_story_{story_id}.xlsx'
-        )
+            download_name=f'test_cases_story_{story_id}.xlsx',
+            etag=key
+        ), key)
+    except StoreTimeout as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         print(f"Error downloading test cases: {str(e)}")  # Add logging
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+@testcases_bp.route('/download', methods=['GET', 'POST'])
+def download_test_cases_bulk():
+    """
+    Download test cases of several stories as a ZIP of per-story files
+
+    Stories are selected with ``story_ids`` (JSON list in a POST body, or a
+    comma-separated query parameter) or with an inclusive ``from_id``/``to_id``
+    range, and the file type with ``format`` (xlsx, csv, jsonl or parquet).
+    Workbooks are generated in parallel and each one is streamed into the
+    archive as soon as it is ready. Stories that fail are listed in
+    ``errors.txt`` at the end of the archive.
+    """
+    try:
+        db_service = current_app.config['DB_SERVICE']
+        artifact_cache = current_app.config['ARTIFACT_CACHE']
+        executor = current_app.config['EXPORT_EXECUTOR']
+        max_stories = current_app.config['BULK_EXPORT_MAX_STORIES']
+        itersize = current_app.config['TEST_CASE_STREAM_ITERSIZE']
+        workers = current_app.config['EXPORT_WORKERS']
+        
+        if request.method == 'POST':
+            params = request.get_json(silent=True) or {}
+        else:
+            params = request.args
+        
+        export_format = str(params.get('format', 'xlsx')).lower()
+        if export_format != 'xlsx' and export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+        try:
+            story_ids = _parse_story_ids(params.get('story_ids'))
+            from_id = _optional_int(params.get('from_id'))
+            to_id = _optional_int(params.get('to_id'))
+        except ValueError:
+            return jsonify({'error': 'story_ids, from_id and to_id must be integers'}), 400
+        
+        if story_ids is None:
+            if from_id is None and to_id is None:
+                return jsonify({'error': 'Provide story_ids or a from_id/to_id range'}), 400
+            story_ids = db_service.find_story_ids_with_test_cases(from_id, to_id, limit=max_stories)
+        if len(story_ids) > max_stories:
+            return jsonify({'error': f'At most {max_stories} stories can be downloaded at once'}), 400
+        
+        # One batched query per store for every requested story
+        stories = db_service.story_store.get_many(story_ids)
+        runs = db_service.get_latest_test_case_runs(list(stories))
+        if not runs:
+            return jsonify({'error': 'No test cases found'}), 404
+        
+        extension = 'xlsx' if export_format == 'xlsx' else EXPORT_FORMATS[export_format][2]
+        keys = {story_id: _artifact_key(export_format, run, stories[story_id]['story_Description'])
+                for story_id, run in runs.items()}
+        missing = [story_id for story_id in story_ids if story_id not in runs]
+        errors = []
+        
+        # Workbooks are read from the cache only when their turn comes
+        is_cached = {story_id: export_format == 'xlsx' and artifact_cache.contains(key)
+                     for story_id, key in keys.items()}
+        
+        def workbooks():
+            """Workbooks as they are ready: cached ones first, then generated ones"""
+            cached = [story_id for story_id in runs if is_cached[story_id]]
+            pending = [story_id for story_id in runs if not is_cached[story_id]]
+            in_flight = {}
+            
+            def submit_batch():
+                # One query per batch keeps at most ~2 * workers test case
+                # documents in memory while the pool stays busy
+                batch, pending[:] = pending[:workers], pending[workers:]
+                if not batch:
+                    return
+                try:
+                    test_cases = db_service.get_test_cases_bulk([runs[story_id]['id'] for story_id in batch])
+                except Exception as e:
+                    errors.extend((story_id, str(e)) for story_id in batch)
+                    return
+                for story_id in batch:
+                    excel_data = _export_data(story_id, stories[story_id], test_cases.get(runs[story_id]['id'], []))
+                    in_flight[executor.submit(generate_excel_bytes, excel_data)] = story_id
+            
+            submit_batch()
+            for story_id in cached:
+                fileobj = artifact_cache.get(keys[story_id])
+                if fileobj is None:
+                    # Evicted since the check; generate it with the others
+                    pending.append(story_id)
+                    continue
+                with fileobj:
+                    data = fileobj.read()
+                yield story_id, data
+            
+            try:
+                while in_flight or pending:
+                    if len(in_flight) <= workers:
+                        submit_batch()
+                    if not in_flight:
+                        continue
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        story_id = in_flight.pop(future)
+                        try:
+                            data = future.result()
+                        except Exception as e:
+                            print(f"Error generating workbook for story {story_id}: {str(e)}")
+                            errors.append((story_id, str(e)))
+                            continue
+                        _cache_put(artifact_cache, keys[story_id], io.BytesIO(data))
+                        yield story_id, data
+            finally:
+                # Client went away: drop the workbooks nobody will receive
+                for future in in_flight:
+                    future.cancel()
+        
+        def entries():
+            if export_format == 'xlsx':
+                for story_id, data in workbooks():
+                    yield f'test_cases_story_{story_id}.xlsx', data
+            else:
+                # Other formats are cheap enough to write while streaming, one
+                # story at a time from a server-side cursor
+                writer = EXPORT_FORMATS[export_format][0]
+                for story_id, run in runs.items():
+                    test_cases = db_service.stream_run_test_cases(run['id'], itersize=itersize)
+                    yield f'test_cases_story_{story_id}.{extension}', _guarded(
+                        writer(_export_data(story_id, stories[story_id], test_cases)), story_id, errors)
+            if missing:
+                yield 'missing_stories.txt', '\n'.join(str(story_id) for story_id in missing).encode()
+            if errors:
+                # The response has started, so failures are reported inside the archive
+                yield 'errors.txt', ''.join(f'{story_id}: {error}\n' for story_id, error in errors).encode()
+        
+        return current_app.response_class(
+            # xlsx and parquet are already compressed
+            stream_with_context(stream_zip(entries(), compression=_zip_compression(export_format))),
+            mimetype='application/zip',
+            headers={'Content-Disposition': 'attachment; filename=test_cases.zip'}
+        )
+    except Exception as e:
+        print(f"Error downloading test cases in bulk: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+def _artifact_key(export_format, run, description):
+    return artifact_key(export_format, EXPORT_LAYOUT_VERSION, run['id'], run['end_time'], description)
+
+
+def _zip_compression(export_format):
+    return zipfile.ZIP_STORED if export_format in ('xlsx', 'parquet') else zipfile.ZIP_DEFLATED
+
+
+def _export_data(story_id, lance_story, test_cases):
+    """Input for the export writers"""
+    return {
+        'story': {
+            'id': story_id,
+            'description': lance_story['story_Description']
+        },
+        'test_cases': test_cases
+    }
+
+
+def _parse_story_ids(value):
+    """
+    story_ids from a JSON list or a comma-separated string; None when absent
+    Raises:
+        ValueError: If the value is not a list of integers
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = [part for part in value.split(',') if part.strip()]
+    if not isinstance(value, list) or any(isinstance(story_id, (bool, float, dict, list)) for story_id in value):
+        raise ValueError('story_ids must be a list of integers')
+    return list(dict.fromkeys(int(story_id) for story_id in value))
+
+
+def _guarded(chunks, story_id, errors):
+    """Pass ``chunks`` through, ending the file early and recording the error if reading fails"""
+    try:
+        yield from chunks
+    except Exception as e:
+        print(f"Error exporting test cases for story {story_id}: {str(e)}")
+        errors.append((story_id, f'{str(e)} (file is incomplete)'))
+
+
+def _cache_put(artifact_cache, key, fileobj):
+    """Cache a generated artifact; a failing cache must not fail the download"""
+    try:
+        artifact_cache.put(key, fileobj)
+    except Exception as e:
+        print(f"Error caching artifact {key}: {str(e)}")
+    fileobj.seek(0)
+
+
+def _optional_int(value):
+    return None if value is None or value == '' else int(value)
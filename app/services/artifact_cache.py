@@ -0,0 +1,160 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import IO, Any, Dict, Optional
+
+
+def artifact_key(*parts: Any) -> str:
+    """Content address for a generated artifact built from the values it depends on"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """
+    Size-bounded LRU cache for generated download artifacts
+
+    Small artifacts are kept in memory; when ``disk_dir`` is set every
+    artifact is also written there, so entries evicted from memory (or too
+    large for it) are still served without regenerating them. Both tiers
+    evict least recently used entries first.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_item_bytes: int = 8 * 1024 * 1024,
+                 disk_dir: Optional[str] = None, disk_max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Memory budget for cached artifacts
+            max_item_bytes: Largest artifact kept in memory
+            disk_dir: Directory for the on-disk tier (None disables it)
+            disk_max_bytes: Disk budget for cached artifacts
+        """
+        self.max_bytes = max_bytes
+        self.max_item_bytes = min(max_item_bytes, max_bytes)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: OrderedDict = OrderedDict()
+        self._disk_bytes = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        """Adopt artifacts left by a previous process, oldest access first"""
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            path = os.path.join(self.disk_dir, name)
+            if name.endswith('.tmp') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_atime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def get(self, key: str) -> Optional[IO[bytes]]:
+        """
+        Look up an artifact
+        Returns:
+            Binary file object positioned at the start, or None on a miss
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                return io.BytesIO(data)
+
+            if key in self._disk:
+                try:
+                    fileobj = open(os.path.join(self.disk_dir, key), 'rb')
+                except FileNotFoundError:
+                    self._disk_bytes -= self._disk.pop(key)
+                else:
+                    self._disk.move_to_end(key)
+                    self._disk_hits += 1
+                    return fileobj
+
+            self._misses += 1
+            return None
+
+    def contains(self, key: str) -> bool:
+        """Whether an artifact is cached, without reading it or counting a hit"""
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def put(self, key: str, fileobj: IO[bytes]) -> None:
+        """
+        Store an artifact read from ``fileobj``; the file position is restored
+        to the start afterwards so the caller can still send it
+        """
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(0)
+
+        if self.disk_dir and size <= self.disk_max_bytes:
+            self._put_disk(key, fileobj, size)
+            fileobj.seek(0)
+
+        if size <= self.max_item_bytes:
+            data = fileobj.read()
+            fileobj.seek(0)
+            with self._lock:
+                if key in self._memory:
+                    self._memory_bytes -= len(self._memory.pop(key))
+                self._memory[key] = data
+                self._memory_bytes += size
+                while self._memory_bytes > self.max_bytes:
+                    _, evicted = self._memory.popitem(last=False)
+                    self._memory_bytes -= len(evicted)
+
+    def _put_disk(self, key: str, fileobj: IO[bytes], size: int):
+        # Write to a temp file and rename so readers never see partial artifacts
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp:
+            shutil.copyfileobj(fileobj, tmp)
+        os.replace(tmp_path, os.path.join(self.disk_dir, key))
+        with self._lock:
+            if key in self._disk:
+                self._disk_bytes -= self._disk.pop(key)
+            self._disk[key] = size
+            self._disk_bytes += size
+            self._evict_disk()
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            name, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(os.path.join(self.disk_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache usage counters"""
+        with self._lock:
+            return {
+                'memory_items': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_items': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'hits': self._hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses
+            }
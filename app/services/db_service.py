@@ -1,24 +1,252 @@
 import psycopg2
+from psycopg2 import sql
 import lancedb
 import json
-from typing import Dict, Any, List, Optional
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
 import pandas as pd
 import numpy as np
+from app.services.pg_pool import PostgresPool
+from app.services.lance_store import LanceStoryStore, SearchUnavailable
+from app.utils.metrics import timed
+from app.utils.pagination import from_epoch_ns, to_epoch_ns
+from app.utils.profiling import profile_thread
+
+# Last database_operations/migrations version the queries rely on: 0003 adds
+# test_cases_generated.is_current and 0004 sets it on existing runs
+REQUIRED_MIGRATION = '0004'
+# With use_story_summary: 0006 keeps story_summary counts up to date
+STORY_SUMMARY_MIGRATION = '0006'
+
+class StoreTimeout(Exception):
+    """Raised when LanceDB or PostgreSQL does not answer within its timeout"""
+
+class MigrationRequired(Exception):
+    """Raised when the PostgreSQL schema is older than the queries need"""
 
 class DatabaseService:
-    def __init__(self, postgres_config: Dict[str, Any], lance_db_path: str):
-        """Initialize database connections"""
+    def __init__(self, postgres_config: Dict[str, Any], lance_db_path: str,
+                 pool_config: Optional[Dict[str, Any]] = None,
+                 lance_config: Optional[Dict[str, Any]] = None,
+                 use_story_summary: bool = False,
+                 fanout_workers: int = 16,
+                 lance_timeout: float = 5.0,
+                 pg_timeout: float = 5.0,
+                 version_ttl: float = 1.0):
+        """
+        Initialize database connections
+
+        Args:
+            postgres_config: psycopg2 connection parameters
+            lance_db_path: Path to the LanceDB directory
+            pool_config: Keyword arguments for PostgresPool (minconn, maxconn,
+                timeout, health_check_interval)
+            lance_config: Keyword arguments for LanceStoryStore (batch_size,
+                cache_size)
+            use_story_summary: Serve story listings from the PostgreSQL
+                story_summary read model instead of joining both stores
+            fanout_workers: Threads used to query both stores concurrently
+            lance_timeout: Seconds to wait for a concurrent LanceDB lookup
+            pg_timeout: Seconds to wait for a concurrent PostgreSQL lookup;
+                also applied as the statement_timeout of that query
+            version_ttl: Seconds a data_version() result is reused before
+                both stores are checked again
+        """
         self.postgres_config = postgres_config
         self.lance_db_path = lance_db_path
         self.lance_db = lancedb.connect(lance_db_path)
+        self.story_store = LanceStoryStore(self.lance_db, **(lance_config or {}))
+        self.pg_pool = PostgresPool(postgres_config, **(pool_config or {}))
+        self.use_story_summary = use_story_summary
+        self.lance_timeout = lance_timeout
+        self.pg_timeout = pg_timeout
+        self._executor = ThreadPoolExecutor(max_workers=fanout_workers, thread_name_prefix='db-fanout')
+        self.version_ttl = version_ttl
+        self._version = None
+        self._version_checked = 0.0
+        self._version_lock = threading.Lock()
+
+    @contextmanager
+    def pg_connection(self, timeout: Optional[float] = None, statement_timeout: Optional[float] = None):
+        """
+        Borrow a pooled PostgreSQL connection for use in a ``with`` block
+
+        Args:
+            timeout: Seconds to wait for a free connection
+            statement_timeout: Seconds after which the server cancels
+                statements in this transaction
+        """
+        # Time from checkout to commit, reported as the request's 'pg' stage
+        with timed('pg'), self.pg_pool.connection(timeout) as conn:
+            if statement_timeout is not None:
+                with conn.cursor() as cur:
+                    cur.execute("SET LOCAL statement_timeout = %s", (int(statement_timeout * 1000),))
+            yield conn
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Current PostgreSQL pool usage"""
+        return self.pg_pool.stats()
+
+    def ensure_indexes(self):
+        """Build the LanceDB story_id index if it is missing"""
+        try:
+            if self.story_store.ensure_story_id_index():
+                print("Created story_id index on LanceDB user_stories")
+        except Exception as e:
+            print(f"Error creating story_id index: {str(e)}")
+
+    def check_schema(self, strict: bool = False):
+        """
+        Validate the LanceDB user_stories schema at startup
+
+        Differences the store works around are printed; anything it cannot
+        serve (or, with ``strict``, any difference) raises SchemaError so the
+        service refuses to start.
+        """
+        try:
+            self.story_store.dataset()
+        except Exception as e:
+            print(f"Skipping LanceDB schema check: {str(e)}")
+            return
+        for problem in self.story_store.check_schema(strict=strict):
+            print(f"LanceDB user_stories schema: {problem}. "
+                  f"Run database_operations/migrate_lance_schema.py to migrate the column types")
+
+    def check_migrations(self, required: Optional[str] = None):
+        """
+        Make sure the PostgreSQL migrations the queries rely on were applied
+
+        An unreachable server is only reported, as requests would fail
+        anyway; a reachable one without the migration stops the service.
+
+        Args:
+            required: Version to look for; default REQUIRED_MIGRATION, or
+                STORY_SUMMARY_MIGRATION with use_story_summary
+        Raises:
+            MigrationRequired: If schema_migrations lacks version ``required``
+        """
+        if required is None:
+            required = STORY_SUMMARY_MIGRATION if self.use_story_summary else REQUIRED_MIGRATION
+        try:
+            with self.pg_connection(statement_timeout=self.pg_timeout) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+                    applied = False
+                    if cur.fetchone()[0]:
+                        cur.execute("SELECT EXISTS (SELECT 1 FROM schema_migrations WHERE version = %s)",
+                                    (required,))
+                        applied = cur.fetchone()[0]
+        except Exception as e:
+            print(f"Skipping PostgreSQL migration check: {str(e)}")
+            return
+        if not applied:
+            raise MigrationRequired(f"PostgreSQL migration {required} has not been applied; "
+                                    f"run database_operations/migrate_postgres.py")
+
+    def close(self):
+        """Release pooled connections and fan-out threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.pg_pool.close()
+
+    def data_version(self) -> str:
+        """
+        Version token for everything the story endpoints return
+
+        Combines the LanceDB user_stories version with the newest
+        test_cases_generated id and the table's update/delete counter, so it
+        changes whenever a story or a generation run is written. With
+        use_story_summary the story_summary table's file node (new after a
+        TRUNCATE) and write counters are included too, so a rebuild changes
+        it. The result is reused for ``version_ttl`` seconds.
+
+        Returns:
+            Token that is the same in every process for the same data
+        """
+        with self._version_lock:
+            if self._version is not None and time.monotonic() - self._version_checked < self.version_ttl:
+                return self._version
+
+        lance_version = self.story_store.version()
+        with self.pg_connection(statement_timeout=self.pg_timeout) as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT
+                        (SELECT max(id) FROM test_cases_generated),
+                        (SELECT n_tup_upd + n_tup_del FROM pg_stat_user_tables
+                         WHERE relid = 'test_cases_generated'::regclass)
+                """)
+                version = cur.fetchone()
+                if self.use_story_summary:
+                    cur.execute("""
+                        SELECT pg_relation_filenode('story_summary'),
+                               (SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables
+                                WHERE relid = 'story_summary'::regclass)
+                    """)
+                    version += cur.fetchone()
+        token = ':'.join(str(part) for part in (lance_version,) + version)
+
+        with self._version_lock:
+            self._version = token
+            self._version_checked = time.monotonic()
+            return token
+
+    def _fan_out(self, lance_call: Callable[[], Any], pg_call: Callable[[], Any]) -> Tuple[Any, Any]:
+        """
+        Run a LanceDB call and a PostgreSQL call at the same time
+
+        Each store is waited on until its own deadline, counted from when both
+        calls were issued, so latency tracks the slower store instead of the
+        sum. If LanceDB finds nothing the PostgreSQL call is cancelled and its
+        result ignored; on any failure both calls are cancelled.
+
+        Returns:
+            (lance_result, pg_result); pg_result is None when lance_result is None
+        Raises:
+            StoreTimeout: If a store misses its deadline
+        """
+        started = time.monotonic()
+        # Run in copies of the caller's context so stage timings (and a
+        # request profile, if one is being taken) reach the request
+        lance_future = self._executor.submit(contextvars.copy_context().run, profile_thread(lance_call))
+        pg_future = self._executor.submit(contextvars.copy_context().run, profile_thread(pg_call))
+        try:
+            lance_result = _wait(lance_future, started + self.lance_timeout, 'LanceDB')
+            if lance_result is None:
+                pg_future.cancel()
+                return None, None
+            return lance_result, _wait(pg_future, started + self.pg_timeout, 'PostgreSQL')
+        except BaseException:
+            lance_future.cancel()
+            pg_future.cancel()
+            raise
+
+    def get_story_with_run(self, story_id: int) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Get a story from LanceDB and its latest test case run from PostgreSQL concurrently
+
+        Returns:
+            (story, run); story is None if it does not exist, run is None if
+            no test cases were generated
+        """
+        return self._fan_out(
+            lambda: self.story_store.get(story_id),
+            lambda: self.get_latest_test_case_runs([story_id], statement_timeout=self.pg_timeout).get(story_id)
+        )
    
-    def get_recent_stories(self, page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+    def get_recent_stories(self, page: int = 1, per_page: int = 10, include_total: bool = True) -> Dict[str, Any]:
         """
         Get paginated stories with test case information from both PostgreSQL and LanceDB
         
         Args:
             page: Page number (starts from 1)
             per_page: Number of items per page
+            include_total: Count all stories; when False total and
+                total_pages are None
             
         Returns:
             Dictionary containing:
@@ -29,49 +257,19 @@ class DatabaseService:
             - per_page: Number of items per page
         """
         try:
-            # Get stories from LanceDB
-            stories_table = self.lance_db.open_table("user_stories")
-            lance_stories = stories_table.to_pandas()
-            
-            # Sort stories by timestamp in descending order (latest first)
-            lance_stories = lance_stories.sort_values(by='time_stamp', ascending=False)
-            
-            # Calculate pagination
-            total_stories = len(lance_stories)
-            total_pages = (total_stories + per_page - 1) // per_page
-            start_idx = (page - 1) * per_page
-            end_idx = start_idx + per_page
-            
-            # Get paginated stories
-            paginated_stories = lance_stories.iloc[start_idx:end_idx]
+            total_stories = self._count_stories() if include_total else None
             
-            stories = []
-            for _, lance_story in paginated_stories.iterrows():
-                story_id = int(lance_story['story_id'])
-                
-                # Get test case count from PostgreSQL
-                with psycopg2.connect(**self.postgres_config) as conn:
-                    with conn.cursor() as cur:
-                        cur.execute("""
-                            SELECT num_test_cases, end_time
-                            FROM test_cases_generated
-                            WHERE story_id = %s
-                        """, (story_id,))
-                        pg_result = cur.fetchone()
-                
-                stories.append({
-                    'id': story_id,
-                    'description': lance_story['story_Description'],
-                    'num_test_cases': pg_result[0] if pg_result else 0,
-                    'download_link': f'/api/testcases/download/{story_id}',
-                    'process_start_time': lance_story['time_stamp'].isoformat(),
-                    'process_end_time': pg_result[1].isoformat() if pg_result and pg_result[1] else None
-                })
+            if self.use_story_summary:
+                stories = self._summary_page(per_page, offset=(page - 1) * per_page)
+            else:
+                # Read only the newest page from LanceDB
+                paginated_stories = self.story_store.newest(limit=per_page, offset=(page - 1) * per_page)
+                stories = self._enrich_stories(paginated_stories)
             
             return {
                 'stories': stories,
                 'total': total_stories,
-                'total_pages': total_pages,
+                'total_pages': (total_stories + per_page - 1) // per_page if include_total else None,
                 'current_page': page,
                 'per_page': per_page
             }
@@ -84,37 +282,379 @@ class DatabaseService:
                 'current_page': page,
                 'per_page': per_page
             }
+
+    def get_stories_after(self, cursor: Optional[Tuple[int, int]] = None, per_page: int = 10,
+                          include_total: bool = False) -> Dict[str, Any]:
+        """
+        Get stories with keyset pagination on (time_stamp, story_id)
+        
+        Args:
+            cursor: Position (time_stamp in nanoseconds since the epoch,
+                story_id) of the last story already seen, or None for the
+                first page
+            per_page: Number of items per page
+            include_total: Count all stories (costs a full count on every page)
+            
+        Returns:
+            Dictionary containing:
+            - stories: List of stories for this page
+            - next_key: Position to continue from, or None on the last page
+            - total: Total number of stories (None unless include_total)
+            - per_page: Number of items per page
+        """
+        try:
+            total_stories = self._count_stories() if include_total else None
+            
+            # Read one extra row to know whether another page follows
+            if self.use_story_summary:
+                stories = self._summary_page(per_page + 1, before=cursor)
+                keys = [(to_epoch_ns(datetime.fromisoformat(story['process_start_time'])), story['id'])
+                        for story in stories]
+            else:
+                paginated_stories = self.story_store.newest(limit=per_page + 1, before=cursor)
+                # Timestamp.value is exact to the nanosecond; to_pydatetime() would truncate
+                keys = list(zip([ts.value for ts in paginated_stories['time_stamp']],
+                                paginated_stories['story_id'].astype('int64').tolist()))
+                stories = self._enrich_stories(paginated_stories.head(per_page))
+            
+            return {
+                'stories': stories[:per_page],
+                'next_key': keys[per_page - 1] if len(keys) > per_page else None,
+                'total': total_stories,
+                'per_page': per_page
+            }
+        except Exception as e:
+            print(f"Error getting stories after cursor: {str(e)}")
+            return {
+                'stories': [],
+                'next_key': None,
+                'total': 0 if include_total else None,
+                'per_page': per_page
+            }
         
     def get_story(self, story_id: int) -> Optional[Dict[str, Any]]:
         """Get a specific story by ID from both LanceDB and PostgreSQL"""
         try:
-            # Get story from LanceDB
-            stories_table = self.lance_db.open_table("user_stories")
-            story_data = stories_table.to_pandas()
-            lance_story = story_data[story_data['story_id'] == story_id]
+            # Look up LanceDB (via the story_id index) and PostgreSQL concurrently
+            lance_story, test_case_info = self._fan_out(
+                lambda: self.story_store.get(story_id),
+                lambda: self._fetch_test_case_info([story_id], statement_timeout=self.pg_timeout)
+            )
             
-            if lance_story.empty:
+            if lance_story is None:
                 return None
             
-            # Get test case information from PostgreSQL
-            with psycopg2.connect(**self.postgres_config) as conn:
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT num_test_cases, end_time
-                        FROM test_cases_generated
-                        WHERE story_id = %s
-                    """, (story_id,))
-                    pg_result = cur.fetchone()
-            
-            return {
-                'id': story_id,
-                'description': lance_story['story_Description'].iloc[0],
-                'num_test_cases': pg_result[0] if pg_result else 0,
-                'download_link': f'/api/testcases/download/{story_id}',
-                'process_start_time': lance_story['time_stamp'].iloc[0].isoformat(),
-                'process_end_time': pg_result[1].isoformat() if pg_result and pg_result[1] else None
-            }
+            return self._format_stories(pd.DataFrame([lance_story]), test_case_info)[0]
+        except StoreTimeout:
+            raise
         except Exception as e:
             print(f"Error getting story {story_id}: {str(e)}")
             return None
+
+    def get_similar_stories(self, story_id: int, k: int = 10, nprobes: int = 20,
+                            refine_factor: Optional[int] = None,
+                            processed: Optional[bool] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the stories whose descriptions are closest to a story's description
+        
+        Args:
+            story_id: Story to find neighbours of (excluded from the results)
+            k: Number of stories to return
+            nprobes: IVF partitions searched
+            refine_factor: Exact re-ranking factor (None to skip)
+            processed: Only stories with this Processed_Flag (None for all)
+            
+        Returns:
+            Stories nearest first, each with its cosine ``distance``, or None
+            if the story does not exist or has no description vector
+        Raises:
+            SearchUnavailable: If the vector column cannot be searched
+        """
+        self.story_store.check_searchable()
+        vector = self.story_store.vector(story_id)
+        if vector is None:
+            return None
+        
+        neighbours = self.story_store.similar(vector, k, nprobes=nprobes, refine_factor=refine_factor,
+                                              exclude_id=story_id, processed=processed)
+        stories = self._enrich_stories(neighbours)
+        for story, distance in zip(stories, neighbours['_distance'].tolist()):
+            story['distance'] = distance
+        return stories
+
+    def get_latest_test_case_run(self, story_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the id and end_time of a story's latest test case generation run
+        without reading the test_cases document
+
+        Returns:
+            Dictionary with id and end_time, or None if no run exists
+        """
+        return self.get_latest_test_case_runs([story_id]).get(story_id)
+
+    def get_latest_test_case_runs(self, story_ids: List[int],
+                                  statement_timeout: Optional[float] = None) -> Dict[int, Dict[str, Any]]:
+        """Get id and end_time of the latest (is_current) run for many stories in one query"""
+        if not story_ids:
+            return {}
+        with self.pg_connection(statement_timeout=statement_timeout) as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT story_id, id, end_time
+                    FROM test_cases_generated
+                    WHERE story_id = ANY(%s) AND is_current
+                """, (list(story_ids),))
+                rows = cur.fetchall()
+        return {story_id: {'id': run_id, 'end_time': end_time} for story_id, run_id, end_time in rows}
+
+    def get_test_cases(self, run_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Get the test_cases document of one generation run"""
+        return self.get_test_cases_bulk([run_id]).get(run_id)
+
+    def get_test_cases_bulk(self, run_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """Get the test_cases documents of many generation runs in one query"""
+        if not run_ids:
+            return {}
+        with self.pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT id, test_cases
+                    FROM test_cases_generated
+                    WHERE id = ANY(%s)
+                """, (list(run_ids),))
+                return dict(cur.fetchall())
+
+    def get_test_case_page(self, story_id: int, offset: int = 0, limit: int = 50,
+                           fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a slice of a story's latest test cases, cut out on the database side
+
+        The slice is taken with a jsonpath subscript and optionally projected
+        to ``fields``, so only the requested test cases leave PostgreSQL.
+
+        Args:
+            story_id: Story whose latest generation run is read
+            offset: Index of the first test case to return
+            limit: Maximum number of test cases to return
+            fields: Test case keys to return (all keys when None)
+
+        Returns:
+            Dictionary with test_cases and total, or None if the story has
+            no generated test cases
+        """
+        if fields:
+            element = sql.SQL('jsonb_build_object({})').format(sql.SQL(', ').join(
+                sql.SQL('{}, s.e -> {}').format(sql.Literal(field), sql.Literal(field)) for field in fields
+            ))
+        else:
+            element = sql.SQL('s.e')
         
+        query = sql.SQL("""
+            SELECT
+                t.num_test_cases,
+                CASE WHEN %(offset)s < t.num_test_cases THEN (
+                    SELECT jsonb_agg({element} ORDER BY s.ord)
+                    FROM jsonb_array_elements(jsonb_path_query_array(
+                        t.test_cases,
+                        format('strict $[%%s to %%s]', %(offset)s, LEAST(t.num_test_cases, %(offset)s + %(limit)s) - 1)::jsonpath
+                    )) WITH ORDINALITY AS s(e, ord)
+                ) ELSE '[]'::jsonb END
+            FROM test_cases_generated t
+            WHERE t.story_id = %(story_id)s AND t.is_current
+        """).format(element=element)
+        
+        with self.pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, {'story_id': story_id, 'offset': offset, 'limit': limit})
+                row = cur.fetchone()
+        if not row:
+            return None
+        return {'total': row[0], 'test_cases': row[1] or []}
+
+    def stream_test_cases(self, story_id: int, itersize: int = 500) -> Iterator[Any]:
+        """
+        Stream a story's latest test cases through a server-side cursor
+
+        The first item yielded is ``(run_id, num_test_cases)``; every following
+        item is one test case as JSON text, passed through without parsing.
+        PostgreSQL expands the array row by row and sends ``itersize`` rows per
+        round trip, so neither side holds the whole suite. The pooled
+        connection is held until the generator is exhausted or closed.
+
+        Args:
+            story_id: Story whose latest generation run is streamed
+            itersize: Test cases fetched per round trip
+
+        Returns:
+            Generator that yields nothing if the story has no test cases
+        """
+        with self.pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT id, num_test_cases
+                    FROM test_cases_generated
+                    WHERE story_id = %s AND is_current
+                """, (story_id,))
+                run = cur.fetchone()
+            if not run:
+                return
+            yield run
+            yield from self._iter_test_cases(conn, run[0], itersize)
+
+    def stream_run_test_cases(self, run_id: int, itersize: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the test cases of one generation run through a server-side cursor
+
+        Like ``stream_test_cases`` but for a known run, with each test case
+        parsed; the pooled connection is held until the generator is
+        exhausted or closed.
+
+        Args:
+            run_id: test_cases_generated id
+            itersize: Test cases fetched per round trip
+
+        Returns:
+            Generator of test case dicts (nothing if the run does not exist)
+        """
+        with self.pg_connection() as conn:
+            for test_case in self._iter_test_cases(conn, run_id, itersize):
+                yield json.loads(test_case)
+
+    @staticmethod
+    def _iter_test_cases(conn, run_id: int, itersize: int) -> Iterator[str]:
+        """Test cases of a run as JSON text, ``itersize`` rows per round trip"""
+        # Set-returning function in the select list is evaluated lazily
+        with conn.cursor(name=f'test_cases_{run_id}') as cur:
+            cur.itersize = itersize
+            cur.execute("""
+                SELECT jsonb_array_elements(test_cases)::text
+                FROM test_cases_generated
+                WHERE id = %s
+            """, (run_id,))
+            for (test_case,) in cur:
+                yield test_case
+
+    def find_story_ids_with_test_cases(self, from_id: Optional[int] = None, to_id: Optional[int] = None,
+                                       limit: int = 100) -> List[int]:
+        """Story ids that have generated test cases, optionally within an inclusive id range"""
+        with self.pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT DISTINCT story_id
+                    FROM test_cases_generated
+                    WHERE (%(from_id)s IS NULL OR story_id >= %(from_id)s)
+                      AND (%(to_id)s IS NULL OR story_id <= %(to_id)s)
+                    ORDER BY story_id
+                    LIMIT %(limit)s
+                """, {'from_id': from_id, 'to_id': to_id, 'limit': limit})
+                return [row[0] for row in cur.fetchall()]
+
+    def _count_stories(self) -> int:
+        """Total number of stories in the store that serves listings"""
+        if not self.use_story_summary:
+            return self.story_store.count()
+        with self.pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT count(*) FROM story_summary")
+                return cur.fetchone()[0]
+
+    def _summary_page(self, limit: int, offset: int = 0,
+                      before: Optional[Tuple[int, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Get stories from story_summary with an index scan
+
+        ``before`` seeks straight to the keyset position through the
+        (process_start_time, story_id) index instead of skipping rows.
+        """
+        with self.pg_connection() as conn:
+            with conn.cursor() as cur:
+                if before is None:
+                    cur.execute("""
+                        SELECT story_id, description, num_test_cases, process_start_time, process_end_time
+                        FROM story_summary
+                        ORDER BY process_start_time DESC, story_id DESC
+                        LIMIT %s OFFSET %s
+                    """, (limit, offset))
+                else:
+                    cur.execute("""
+                        SELECT story_id, description, num_test_cases, process_start_time, process_end_time
+                        FROM story_summary
+                        WHERE (process_start_time, story_id) < (%s, %s)
+                        ORDER BY process_start_time DESC, story_id DESC
+                        LIMIT %s
+                    """, (from_epoch_ns(before[0]), before[1], limit))
+                rows = cur.fetchall()
+        return [_summary_row_to_story(row) for row in rows]
+
+    def _enrich_stories(self, lance_stories: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Add PostgreSQL test case info to a page of LanceDB stories in one round trip"""
+        story_ids = lance_stories['story_id'].astype('int64').tolist()
+        return self._format_stories(lance_stories, self._fetch_test_case_info(story_ids))
+
+    def _fetch_test_case_info(self, story_ids: List[int], statement_timeout: Optional[float] = None) -> pd.DataFrame:
+        """
+        Get num_test_cases and end_time for many stories in one query
+
+        When a story has several generation runs only the latest one is
+        flagged is_current (see database_operations/migrations), so the
+        result holds at most one row per story_id. The lookup is an
+        index-only scan of test_cases_generated_current_idx.
+        """
+        columns = ['story_id', 'num_test_cases', 'end_time']
+        if not story_ids:
+            return pd.DataFrame(columns=columns)
+        
+        with self.pg_connection(statement_timeout=statement_timeout) as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT story_id, num_test_cases, end_time
+                    FROM test_cases_generated
+                    WHERE story_id = ANY(%s) AND is_current
+                """, (story_ids,))
+                rows = cur.fetchall()
+        return pd.DataFrame(rows, columns=columns)
+
+    @staticmethod
+    def _format_stories(lance_stories: pd.DataFrame, test_case_info: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Merge LanceDB story rows with PostgreSQL test case info into API dicts"""
+        with timed('format'):
+            lance_stories = lance_stories.assign(story_id=lance_stories['story_id'].astype('int64'))
+            test_case_info = test_case_info.astype({'story_id': 'int64'})
+            merged = lance_stories.merge(test_case_info, on='story_id', how='left')
+        
+            stories = pd.DataFrame({
+                'id': merged['story_id'],
+                'description': merged['story_Description'],
+                'num_test_cases': pd.to_numeric(merged['num_test_cases']).fillna(0).astype('int64'),
+                'download_link': '/api/testcases/download/' + merged['story_id'].astype(str),
+                'process_start_time': merged['time_stamp'].map(_isoformat),
+                'process_end_time': pd.to_datetime(merged['end_time']).map(_isoformat)
+            })
+            return stories.to_dict('records')
+
+
+def _wait(future, deadline: float, store: str):
+    """Result of a fan-out future, cancelling it once the deadline has passed"""
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        raise StoreTimeout(f"{store} did not respond in time")
+
+
+def _isoformat(value) -> Optional[str]:
+    """ISO 8601 string for a timestamp, None for missing values"""
+    return None if pd.isna(value) else value.isoformat()
+
+
+def _summary_row_to_story(row) -> Dict[str, Any]:
+    """API dict for a (story_id, description, num_test_cases, start, end) summary row"""
+    story_id, description, num_test_cases, start_time, end_time = row
+    return {
+        'id': story_id,
+        'description': description,
+        'num_test_cases': num_test_cases,
+        'download_link': f'/api/testcases/download/{story_id}',
+        'process_start_time': _isoformat(start_time),
+        'process_end_time': _isoformat(end_time)
+    }
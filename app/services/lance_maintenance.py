@@ -0,0 +1,348 @@
+import fcntl
+import math
+import os
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+import lancedb
+from app.services.lance_store import VECTOR_COLUMN, VECTOR_METRIC, _has_index, _story_id_literal
+
+# PQ codebooks are trained on 256 centroids per sub-vector; smaller tables
+# are searched exhaustively, which is already fast at that size
+MIN_VECTOR_ROWS = 256
+
+# Rows per fragment compaction aims for; Lance's own default
+TARGET_ROWS_PER_FRAGMENT = 1024 * 1024
+
+# Lock file in the LanceDB directory held by the one process that runs
+# scheduled maintenance
+LOCK_FILE_NAME = '.maintenance.lock'
+
+
+def default_num_partitions(num_rows: int) -> int:
+    """About sqrt(rows) IVF partitions, a few thousand vectors each at scale"""
+    return max(1, min(int(math.sqrt(num_rows)), num_rows // MIN_VECTOR_ROWS))
+
+
+def default_num_sub_vectors(dimension: int) -> int:
+    """16-dimensional PQ sub-vectors, falling back to a divisor of the dimension"""
+    for sub_dimension in (16, 8, 4, 2, 1):
+        if dimension % sub_dimension == 0:
+            return dimension // sub_dimension
+
+
+class LanceMaintenance:
+    """
+    Compaction, version cleanup and index refresh for the user_stories table
+
+    Every step is a separate Lance commit, so readers keep serving the
+    version they have open and pick up the result on their next refresh.
+    """
+
+    def __init__(self, lance_db_path: str, table_name: str = 'user_stories',
+                 retention: timedelta = timedelta(days=7),
+                 target_rows_per_fragment: int = TARGET_ROWS_PER_FRAGMENT,
+                 vector_retrain_fraction: float = 0.2,
+                 probe_runs: int = 3):
+        """
+        Args:
+            lance_db_path: Path to the LanceDB directory
+            table_name: Name of the stories table
+            retention: Versions older than this are deleted by cleanup; must
+                exceed the longest read a server or script keeps a version for
+            target_rows_per_fragment: Rows per fragment after compaction
+            vector_retrain_fraction: Share of rows added since the vector
+                index was trained above which it is retrained rather than
+                extended (new rows are assigned to the old centroids otherwise)
+            probe_runs: Timed runs of each latency probe (the median is reported)
+        """
+        self.lance_db_path = lance_db_path
+        self.table_name = table_name
+        self.retention = retention
+        self.target_rows_per_fragment = target_rows_per_fragment
+        self.vector_retrain_fraction = vector_retrain_fraction
+        self.probe_runs = probe_runs
+
+    def dataset(self):
+        return lancedb.connect(self.lance_db_path).open_table(self.table_name).to_lance()
+
+    def run(self, compact: bool = True, cleanup: bool = True, indexes: bool = True,
+            rebuild_indexes: bool = False) -> Dict[str, Any]:
+        """
+        Run the maintenance steps and measure the table before and after
+
+        Args:
+            compact: Merge small fragments and materialize deletions
+            cleanup: Delete versions older than the retention window
+            indexes: Add unindexed rows to the indexes, build missing ones and
+                retrain a stale vector index
+            rebuild_indexes: Rebuild both indexes from scratch
+
+        Returns:
+            Dictionary with the snapshots 'before' and 'after', the 'actions'
+            taken, any 'errors' and the elapsed 'seconds'
+        """
+        started = time.perf_counter()
+        report = {'started': datetime.now(timezone.utc).isoformat(), 'actions': {}, 'errors': {}}
+        dataset = self.dataset()
+        report['before'] = self.snapshot(dataset)
+
+        # Indexes first: compaction leaves fragments with different index
+        # coverage apart, and remaps the indexes of the fragments it merges
+        steps = []
+        if indexes or rebuild_indexes:
+            steps.append(('indexes', lambda ds: self.refresh_indexes(ds, rebuild=rebuild_indexes)))
+        if compact:
+            steps.append(('compaction', self.compact))
+        if cleanup:
+            steps.append(('cleanup', self.cleanup))
+        for name, step in steps:
+            try:
+                report['actions'][name] = step(self.dataset())
+            except Exception as e:
+                print(f"Error during Lance {name}: {str(e)}")
+                report['errors'][name] = str(e)
+
+        report['after'] = self.snapshot(self.dataset())
+        report['seconds'] = round(time.perf_counter() - started, 3)
+        return report
+
+    def snapshot(self, dataset) -> Dict[str, Any]:
+        """Fragment, version and index coverage figures plus scan latency"""
+        fragments = dataset.get_fragments()
+        fragment_rows = [fragment.count_rows() for fragment in fragments]
+        return {
+            'version': dataset.version,
+            'versions': len(dataset.versions()),
+            'rows': sum(fragment_rows),
+            'fragments': len(fragments),
+            'bytes': _directory_bytes(dataset.uri),
+            'unindexed_rows': {index['name']: dataset.stats.index_stats(index['name'])['num_unindexed_rows']
+                               for index in dataset.list_indices()},
+            'scan_ms': self._probe(lambda: dataset.to_table(columns=['story_id', 'time_stamp'])),
+            'lookup_ms': self._probe_lookup(dataset)
+        }
+
+    def compact(self, dataset) -> Optional[Dict[str, Any]]:
+        """Merge fragments below the target size; None if there is nothing to merge"""
+        fragments = dataset.get_fragments()
+        small = [fragment for fragment in fragments if fragment.count_rows() < self.target_rows_per_fragment]
+        deletions = any(fragment.metadata.deletion_file() is not None for fragment in fragments)
+        if len(small) < 2 and not deletions:
+            return None
+        metrics = dataset.optimize.compact_files(target_rows_per_fragment=self.target_rows_per_fragment)
+        return {
+            'fragments_removed': metrics.fragments_removed,
+            'fragments_added': metrics.fragments_added,
+            'files_removed': metrics.files_removed,
+            'files_added': metrics.files_added
+        }
+
+    def cleanup(self, dataset) -> Dict[str, Any]:
+        """Delete versions (and the files only they use) older than the retention window"""
+        stats = dataset.cleanup_old_versions(older_than=self.retention)
+        return {'old_versions': stats.old_versions, 'bytes_removed': stats.bytes_removed}
+
+    def refresh_indexes(self, dataset, rebuild: bool = False) -> Dict[str, Any]:
+        """
+        Bring the story_id and vector indexes up to date
+
+        Missing indexes are built. Rows appended since an index was built are
+        added to it incrementally, except that the vector index is retrained
+        once more than ``vector_retrain_fraction`` of the rows were added
+        after training.
+
+        Returns:
+            Map of index column -> 'built', 'retrained', 'extended' or 'current'
+        """
+        actions = {}
+        if rebuild or not _has_index(dataset, 'story_id'):
+            dataset.create_scalar_index('story_id', index_type='BTREE', replace=True)
+            actions['story_id'] = 'built'
+
+        if VECTOR_COLUMN in dataset.schema.names:
+            index = next((index for index in dataset.list_indices() if VECTOR_COLUMN in index['fields']), None)
+            if index is None or rebuild:
+                actions[VECTOR_COLUMN] = self.build_vector_index(dataset, force=True)
+            else:
+                stats = dataset.stats.index_stats(index['name'])
+                indexed, unindexed = stats['num_indexed_rows'], stats['num_unindexed_rows']
+                if unindexed and unindexed > self.vector_retrain_fraction * (indexed + unindexed):
+                    built = self.build_vector_index(dataset, force=True)
+                    actions[VECTOR_COLUMN] = 'retrained' if built == 'built' else built
+
+        stale = [index['name'] for index in dataset.list_indices()
+                 if dataset.stats.index_stats(index['name'])['num_unindexed_rows']]
+        if stale:
+            dataset.optimize.optimize_indices(index_names=stale)
+            for name in stale:
+                column = next(index['fields'][0] for index in dataset.list_indices() if index['name'] == name)
+                actions.setdefault(column, 'extended')
+
+        for index in dataset.list_indices():
+            actions.setdefault(index['fields'][0], 'current')
+        return actions
+
+    def build_vector_index(self, dataset=None, num_partitions: int = None, num_sub_vectors: int = None,
+                           force: bool = False) -> str:
+        """
+        Build or rebuild the IVF_PQ index on the description vector
+
+        Args:
+            num_partitions: IVF partitions (default about sqrt(rows))
+            num_sub_vectors: PQ sub-vectors (default dimension / 16)
+            force: Rebuild even if an index already covers every fragment
+
+        Returns:
+            'built', 'current' or 'skipped' (too few rows for PQ training)
+        """
+        dataset = dataset or self.dataset()
+        num_rows = dataset.count_rows()
+        if num_rows < MIN_VECTOR_ROWS:
+            print(f"Skipping vector index: {num_rows} stories is below {MIN_VECTOR_ROWS}, "
+                  f"searches stay exhaustive")
+            return 'skipped'
+
+        indexed_fragments = set()
+        for index in dataset.list_indices():
+            if VECTOR_COLUMN in index.get('fields', []):
+                indexed_fragments |= set(index.get('fragment_ids', []))
+        unindexed = [fragment.fragment_id for fragment in dataset.get_fragments()
+                     if fragment.fragment_id not in indexed_fragments]
+        if indexed_fragments and not unindexed and not force:
+            return 'current'
+
+        dimension = dataset.schema.field(VECTOR_COLUMN).type.list_size
+        num_partitions = num_partitions or default_num_partitions(num_rows)
+        num_sub_vectors = num_sub_vectors or default_num_sub_vectors(dimension)
+
+        started = time.perf_counter()
+        dataset.create_index(
+            VECTOR_COLUMN,
+            index_type='IVF_PQ',
+            metric=VECTOR_METRIC,
+            num_partitions=num_partitions,
+            num_sub_vectors=num_sub_vectors,
+            replace=True
+        )
+        print(f"Built IVF_PQ index on {num_rows} stories ({num_partitions} partitions, "
+              f"{num_sub_vectors} sub-vectors) in {time.perf_counter() - started:.1f}s")
+        return 'built'
+
+    def _probe(self, call) -> Optional[float]:
+        timings = []
+        for _ in range(self.probe_runs):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(statistics.median(timings), 3) if timings else None
+
+    def _probe_lookup(self, dataset) -> Optional[float]:
+        """Latency of a story_id point lookup, the filter behind GET /api/stories/<id>"""
+        first = dataset.head(1, columns=['story_id'])
+        if first.num_rows == 0:
+            return None
+        literal = _story_id_literal(dataset.schema, first.column('story_id')[0].as_py())
+        return self._probe(lambda: dataset.to_table(columns=['story_id'], filter=f'story_id = {literal}'))
+
+
+class MaintenanceLock:
+    """
+    Exclusive, non-blocking flock on LOCK_FILE_NAME in the LanceDB directory
+
+    The lock belongs to the open file, so it is held until release() or
+    until the process exits, however it exits.
+    """
+
+    def __init__(self, lance_db_path: str):
+        self.path = os.path.join(lance_db_path, LOCK_FILE_NAME)
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """Take the lock unless another process holds it; True if this process holds it"""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            lock_file = open(self.path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class MaintenanceScheduler:
+    """
+    Runs LanceMaintenance in a daemon thread every ``interval`` seconds
+
+    Every server process (each gunicorn worker, the reloader child) may
+    start a scheduler; only the one holding the MaintenanceLock runs
+    maintenance. The others keep trying on each tick and take over when the
+    holder exits.
+    """
+
+    def __init__(self, maintenance: LanceMaintenance, interval: float):
+        self.maintenance = maintenance
+        self.interval = interval
+        self.last_report: Optional[Dict[str, Any]] = None
+        self.lock = MaintenanceLock(maintenance.lance_db_path)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lance-maintenance', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+        self.lock.release()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                if not self.lock.acquire():
+                    continue
+                self.last_report = self.maintenance.run()
+                print(format_report(self.last_report))
+            except Exception as e:
+                print(f"Error running Lance maintenance: {str(e)}")
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """One line per figure: before -> after"""
+    before, after = report['before'], report['after']
+    lines = [f"Lance maintenance ({report['seconds']}s)"]
+    for key in ('version', 'versions', 'rows', 'fragments', 'bytes', 'scan_ms', 'lookup_ms'):
+        lines.append(f"  {key:<16} {before[key]} -> {after[key]}")
+    for name in sorted(set(before['unindexed_rows']) | set(after['unindexed_rows'])):
+        lines.append(f"  unindexed rows of {name}: {before['unindexed_rows'].get(name, '-')} -> "
+                     f"{after['unindexed_rows'].get(name, '-')}")
+    for name, action in report['actions'].items():
+        lines.append(f"  {name}: {action}")
+    for name, error in report['errors'].items():
+        lines.append(f"  {name} failed: {error}")
+    return '\n'.join(lines)
+
+
+def _directory_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
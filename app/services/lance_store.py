@@ -0,0 +1,488 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import lance
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from app.utils.metrics import LANCE_SCANS, record_bytes, timed
+
+# Columns returned to the API; the 768-float description vector is never read
+STORY_COLUMNS = ['story_id', 'story_Description', 'time_stamp']
+
+# Embedding of story_Description searched by the similar stories endpoint
+VECTOR_COLUMN = 'story_Description_vector'
+VECTOR_METRIC = 'cosine'
+
+# Newest first, story_id breaks ties so the order is total
+SORT_KEYS = [('time_stamp', 'descending'), ('story_id', 'descending')]
+
+# Cursor timestamps are nanoseconds; time_stamp columns may use any unit
+_NS_PER_UNIT = {'s': 1_000_000_000, 'ms': 1_000_000, 'us': 1_000, 'ns': 1}
+
+# Canonical user_stories schema, plus the optional VECTOR_COLUMN; tables
+# created otherwise are rewritten by database_operations/migrate_lance_schema.py
+STORY_SCHEMA = pa.schema([
+    pa.field('story_id', pa.int64()),
+    pa.field('story_Description', pa.string()),
+    pa.field('Processed_Flag', pa.bool_()),
+    pa.field('time_stamp', pa.timestamp('us'))
+])
+
+
+def _reopen_on_error(method):
+    """Drop the dataset handle when a read fails so the next request reopens the table"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except Exception:
+            self.invalidate()
+            raise
+    return wrapper
+
+
+class SchemaError(Exception):
+    """Raised when the user_stories table cannot be served with its schema"""
+    pass
+
+
+class SearchUnavailable(Exception):
+    """Raised when the description vector column cannot be searched"""
+    pass
+
+
+class LanceStoryStore:
+    """
+    Read access to the LanceDB user_stories table
+
+    Queries are pushed down to the Lance scanner: only the needed columns are
+    read and the newest stories are selected batch by batch, so memory scales
+    with the requested page rather than with the table.
+    """
+
+    def __init__(self, lance_db, table_name: str = 'user_stories', batch_size: int = 8192,
+                 cache_size: int = 1024, refresh_interval: float = 1.0):
+        """
+        Args:
+            lance_db: LanceDB connection
+            table_name: Name of the stories table
+            batch_size: Rows per scanner batch when selecting the newest stories
+            cache_size: Maximum number of stories kept in the id lookup cache
+                (0 disables it)
+            refresh_interval: Seconds the dataset handle is used without
+                checking for a newer version (0 checks on every call)
+        """
+        self.lance_db = lance_db
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.refresh_interval = refresh_interval
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_dataset = None
+        self._cache_lock = threading.Lock()
+        self._dataset = None
+        self._dataset_checked = 0.0
+        self._dataset_lock = threading.Lock()
+
+    def dataset(self):
+        """
+        Lance dataset backing the stories table
+
+        The handle is opened once and shared by all threads. After
+        ``refresh_interval`` seconds the next caller checks out the latest
+        committed version. When the version number has not advanced, the
+        manifests are compared as well: a table that was dropped and
+        recreated can reach the same version number with different files.
+        """
+        with self._dataset_lock:
+            dataset = self._dataset
+            if dataset is not None and time.monotonic() - self._dataset_checked < self.refresh_interval:
+                return dataset
+
+            try:
+                if dataset is None:
+                    dataset = self.lance_db.open_table(self.table_name).to_lance()
+                else:
+                    latest = dataset.latest_version
+                    if latest != dataset.version:
+                        dataset = dataset.checkout_version(latest)
+                    elif _manifest(lance.dataset(dataset.uri, version=latest)) != _manifest(dataset):
+                        dataset = self.lance_db.open_table(self.table_name).to_lance()
+            except Exception:
+                # The table may have been dropped and recreated; start over
+                self._dataset = None
+                raise
+
+            self._dataset = dataset
+            self._dataset_checked = time.monotonic()
+            return dataset
+
+    def invalidate(self):
+        """Drop the dataset handle so the next call reopens the table"""
+        with self._dataset_lock:
+            self._dataset = None
+
+    def version(self) -> int:
+        """Current dataset version; changes with every write to the table"""
+        return self.dataset().version
+
+    @_reopen_on_error
+    def count(self) -> int:
+        """Number of stories, answered from fragment metadata"""
+        with timed('lance_count'):
+            return self.dataset().count_rows()
+
+    def ensure_story_id_index(self) -> bool:
+        """
+        Create a BTREE scalar index on story_id if it does not exist yet
+
+        Returns:
+            True if an index was built, False if one was already present
+        """
+        dataset = self.dataset()
+        if _has_index(dataset, 'story_id'):
+            return False
+        dataset.create_scalar_index('story_id', index_type='BTREE')
+        self.invalidate()
+        return True
+
+    def check_schema(self, strict: bool = False) -> List[str]:
+        """
+        Compare the table's schema with STORY_SCHEMA
+
+        Args:
+            strict: Also refuse differences the store can work around
+
+        Returns:
+            Differences the store works around (empty if canonical)
+        Raises:
+            SchemaError: If a required column is missing or unusable, or on
+                any difference when ``strict``
+        """
+        fatal, adaptable = schema_problems(self.dataset().schema)
+        if fatal or (strict and adaptable):
+            raise SchemaError('user_stories schema: ' + '; '.join(fatal + adaptable))
+        return adaptable
+
+    @_reopen_on_error
+    def get(self, story_id) -> Optional[Dict[str, Any]]:
+        """
+        Point lookup of one story by story_id
+
+        The filter is served by the story_id scalar index when present. Hits
+        are cached per dataset handle, so any write to the table (or its
+        recreation) invalidates the cache on the next lookup.
+
+        Returns:
+            Dictionary with STORY_COLUMNS, or None if the story does not exist
+        """
+        dataset = self.dataset()
+        key = int(story_id)
+
+        with self._cache_lock:
+            if self._cache_dataset is not dataset:
+                self._cache.clear()
+                self._cache_dataset = dataset
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return dict(self._cache[key])
+
+        with timed('lance_get'):
+            table = dataset.to_table(
+                columns=STORY_COLUMNS,
+                filter='story_id = %s' % _story_id_literal(dataset.schema, story_id),
+                limit=1
+            )
+        _count_read('get', table)
+        rows = table.to_pylist()
+        if not rows:
+            return None
+
+        story = rows[0]
+        if self.cache_size > 0:
+            with self._cache_lock:
+                if self._cache_dataset is dataset:
+                    self._cache[key] = story
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return dict(story)
+
+    @_reopen_on_error
+    def get_many(self, story_ids: List) -> Dict[int, Dict[str, Any]]:
+        """
+        Batched point lookup of several stories in one filtered scan
+
+        Returns:
+            Dictionary of story_id to STORY_COLUMNS dict for the stories found
+        """
+        if not story_ids:
+            return {}
+        dataset = self.dataset()
+        with timed('lance_get'):
+            table = dataset.to_table(
+                columns=STORY_COLUMNS,
+                filter=_in_filter(dataset.schema, story_ids)
+            )
+        _count_read('get_many', table)
+        return {int(row['story_id']): row for row in table.to_pylist()}
+
+    @_reopen_on_error
+    def vector(self, story_id) -> Optional[List[float]]:
+        """
+        Description embedding of one story
+
+        Returns:
+            The vector, or None if the story does not exist or has no vector
+        """
+        dataset = self.dataset()
+        with timed('lance_get'):
+            table = dataset.to_table(
+                columns=[VECTOR_COLUMN],
+                filter='story_id = %s' % _story_id_literal(dataset.schema, story_id),
+                limit=1
+            )
+        _count_read('vector', table)
+        rows = table.column(VECTOR_COLUMN).to_pylist()
+        return rows[0] if rows else None
+
+    def check_searchable(self):
+        """
+        Make sure similar stories can be searched
+
+        Raises:
+            SearchUnavailable: If the vector column is missing or is not a
+                fixed size list of floats, which Lance cannot search
+        """
+        problem = _vector_problem(self.dataset().schema)
+        if problem:
+            raise SearchUnavailable(f'Similar stories search is unavailable: {problem}')
+
+    def has_vector_index(self) -> bool:
+        """Whether an ANN index exists on the description vector"""
+        return _has_index(self.dataset(), VECTOR_COLUMN)
+
+    @_reopen_on_error
+    def similar(self, vector: List[float], k: int, nprobes: int = 20, refine_factor: Optional[int] = None,
+                exclude_id=None, processed: Optional[bool] = None, use_index: bool = True) -> pd.DataFrame:
+        """
+        Nearest stories to ``vector`` by cosine distance
+
+        Filters are applied before the search (prefilter), so up to ``k``
+        matching stories are returned rather than ``k`` candidates that are
+        filtered afterwards. Fragments written after the index was built are
+        searched exhaustively and merged in.
+
+        Args:
+            vector: Query embedding
+            k: Number of stories to return
+            nprobes: IVF partitions searched; higher is slower with better recall
+            refine_factor: Re-rank ``k * refine_factor`` candidates with exact
+                distances (None ranks by the PQ approximation)
+            exclude_id: story_id to leave out, typically the query story
+            processed: Only stories with this Processed_Flag (None for all)
+            use_index: False forces an exact brute-force search
+
+        Returns:
+            DataFrame with STORY_COLUMNS and ``_distance``, nearest first
+        """
+        dataset = self.dataset()
+        nearest = {'column': VECTOR_COLUMN, 'q': vector, 'k': k, 'metric': VECTOR_METRIC,
+                   'nprobes': nprobes, 'use_index': use_index}
+        if refine_factor:
+            nearest['refine_factor'] = refine_factor
+
+        conditions = []
+        if exclude_id is not None:
+            conditions.append('story_id != %s' % _story_id_literal(dataset.schema, exclude_id))
+        if processed is not None:
+            conditions.append('`Processed_Flag` = %s' % ('true' if processed else 'false'))
+
+        with timed('lance_search'):
+            table = dataset.to_table(
+                columns=STORY_COLUMNS,
+                nearest=nearest,
+                filter=' AND '.join(conditions) or None,
+                prefilter=True
+            )
+        _count_read('search', table)
+        return table.to_pandas()
+
+    @_reopen_on_error
+    def newest(self, limit: int, offset: int = 0,
+               before: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
+        """
+        Get one page of stories ordered newest first
+
+        Args:
+            limit: Number of stories to return
+            offset: Number of newest stories to skip
+            before: Keyset position (time_stamp in nanoseconds since the
+                epoch, story_id); only stories that
+                sort after it are considered, pushed down as a scan filter.
+                Lance has no ordered index to seek on, so a cursor page
+                still scans the story_id/time_stamp columns of the whole
+                table; the filter only shrinks the top-k merged from it.
+                USE_STORY_SUMMARY serves cursor pages with an index seek
+
+        Returns:
+            DataFrame with STORY_COLUMNS in page order
+        """
+        dataset = self.dataset()
+        if limit <= 0:
+            return _empty_stories(dataset.schema)
+
+        filter = _before_filter(dataset.schema, before) if before else None
+        with timed('lance_scan'):
+            keys = _top_k(dataset, offset + limit, self.batch_size, filter).slice(offset, limit)
+        if keys.num_rows == 0:
+            return _empty_stories(dataset.schema)
+        return self._fetch_in_order(dataset, keys.column('story_id').to_pylist())
+
+    def _fetch_in_order(self, dataset, story_ids: List) -> pd.DataFrame:
+        """Read STORY_COLUMNS for the given ids and return them in the same order"""
+        with timed('lance_get'):
+            table = dataset.to_table(
+                columns=STORY_COLUMNS,
+                filter=_in_filter(dataset.schema, story_ids)
+            )
+        _count_read('get_many', table)
+        rows = table.to_pandas().drop_duplicates('story_id')
+        order = pd.DataFrame({'story_id': story_ids})
+        return order.merge(rows, on='story_id', how='inner')
+
+
+def _top_k(dataset, k: int, batch_size: int, filter: Optional[str] = None) -> pa.Table:
+    """
+    Select the k newest (story_id, time_stamp) keys with a streaming scan
+
+    Each scanner batch is merged into the running top-k and trimmed again, so
+    at most k + batch_size keys are held at any time.
+    """
+    scanner = dataset.scanner(columns=['story_id', 'time_stamp'], filter=filter, batch_size=batch_size)
+    LANCE_SCANS.inc(operation='top_k')
+    top = None
+    for batch in scanner.to_batches():
+        if batch.num_rows == 0:
+            continue
+        record_bytes('lance', batch.nbytes)
+        candidates = pa.Table.from_batches([batch])
+        if top is not None:
+            candidates = pa.concat_tables([top, candidates])
+        if candidates.num_rows > k:
+            candidates = candidates.take(pc.select_k_unstable(candidates, k, sort_keys=SORT_KEYS))
+        top = candidates
+
+    if top is None:
+        return pa.table({
+            'story_id': pa.array([], type=dataset.schema.field('story_id').type),
+            'time_stamp': pa.array([], type=dataset.schema.field('time_stamp').type)
+        })
+    return top.sort_by(SORT_KEYS)
+
+
+def _count_read(operation: str, table: pa.Table):
+    LANCE_SCANS.inc(operation=operation)
+    record_bytes('lance', table.nbytes)
+
+
+def schema_problems(schema: pa.Schema) -> Tuple[List[str], List[str]]:
+    """
+    Differences between a user_stories schema and STORY_SCHEMA
+
+    Returns:
+        (fatal, adaptable): columns the store cannot serve, and differences
+        it works around, e.g. a string story_id is matched with quoted
+        literals (so filters still use the column and its index, but ids
+        sort as text)
+    """
+    fatal, adaptable = [], []
+    names = schema.names
+    for name in ('story_id', 'story_Description', 'time_stamp'):
+        if name not in names:
+            fatal.append(f'{name} is missing')
+
+    if 'story_id' in names:
+        story_id_type = schema.field('story_id').type
+        if pa.types.is_string(story_id_type) or pa.types.is_large_string(story_id_type):
+            adaptable.append(f'story_id is {story_id_type}, expected int64 (ids are compared and sorted as text)')
+        elif pa.types.is_integer(story_id_type):
+            if story_id_type != pa.int64():
+                adaptable.append(f'story_id is {story_id_type}, expected int64')
+        else:
+            fatal.append(f'story_id is {story_id_type}, expected int64')
+    if 'story_Description' in names:
+        description_type = schema.field('story_Description').type
+        if not (pa.types.is_string(description_type) or pa.types.is_large_string(description_type)):
+            fatal.append(f'story_Description is {description_type}, expected string')
+    if 'time_stamp' in names:
+        time_stamp_type = schema.field('time_stamp').type
+        if not pa.types.is_timestamp(time_stamp_type):
+            fatal.append(f'time_stamp is {time_stamp_type}, expected timestamp[us]')
+        elif time_stamp_type != pa.timestamp('us'):
+            adaptable.append(f'time_stamp is {time_stamp_type}, expected timestamp[us]')
+
+    if 'Processed_Flag' not in names:
+        adaptable.append('Processed_Flag is missing (the processed filter is unavailable)')
+    elif schema.field('Processed_Flag').type != pa.bool_():
+        adaptable.append(f"Processed_Flag is {schema.field('Processed_Flag').type}, expected bool")
+    if VECTOR_COLUMN in names and _vector_problem(schema):
+        adaptable.append(f'{_vector_problem(schema)} (similar stories search is unavailable)')
+    return fatal, adaptable
+
+
+def _vector_problem(schema: pa.Schema) -> Optional[str]:
+    """Why the vector column cannot be searched, or None if it can"""
+    if VECTOR_COLUMN not in schema.names:
+        return f'{VECTOR_COLUMN} is missing'
+    vector_type = schema.field(VECTOR_COLUMN).type
+    if not (pa.types.is_fixed_size_list(vector_type) and pa.types.is_floating(vector_type.value_type)):
+        return f'{VECTOR_COLUMN} is {vector_type}, expected a fixed size list of floats'
+    return None
+
+
+def _manifest(dataset) -> bytes:
+    """Manifest of the checked-out version; tells a recreated table from the old one"""
+    return dataset._ds.serialized_manifest()
+
+
+def _has_index(dataset, column: str) -> bool:
+    return any(column in index.get('fields', []) for index in dataset.list_indices())
+
+
+def _story_id_literal(schema: pa.Schema, story_id) -> str:
+    """Format a story_id for a Lance filter matching the column's declared type"""
+    if pa.types.is_string(schema.field('story_id').type) or pa.types.is_large_string(schema.field('story_id').type):
+        return "'%s'" % str(story_id).replace("'", "''")
+    return str(int(story_id))
+
+
+def _before_filter(schema: pa.Schema, before: Tuple[int, int]) -> str:
+    """
+    Filter for rows that come after ``before`` in SORT_KEYS order
+
+    time_stamp is compared as an integer in the column's own unit: timestamp
+    string literals are parsed to microseconds only, which would merge
+    stories whose nanosecond time_stamps differ.
+    """
+    time_stamp, story_id = before
+    value, remainder = divmod(time_stamp, _NS_PER_UNIT[schema.field('time_stamp').type.unit])
+    ts = 'CAST(time_stamp AS BIGINT)'
+    if remainder:
+        # No row can fall on the cursor's time_stamp in this unit
+        return f'{ts} <= {value}'
+    return '({ts} < {value}) OR ({ts} = {value} AND story_id < {sid})'.format(
+        ts=ts, value=value, sid=_story_id_literal(schema, story_id)
+    )
+
+
+def _in_filter(schema: pa.Schema, story_ids: List) -> str:
+    return 'story_id IN (%s)' % ', '.join(_story_id_literal(schema, sid) for sid in story_ids)
+
+
+def _empty_stories(schema: pa.Schema) -> pd.DataFrame:
+    return pa.schema([schema.field(name) for name in STORY_COLUMNS]).empty_table().to_pandas()
@@ -0,0 +1,301 @@
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout"""
+
+
+# Every pool in the process, reset in a forked child by one fork hook
+_pools = weakref.WeakSet()
+
+
+def _reset_pools_after_fork():
+    for pool in list(_pools):
+        pool._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+class PostgresPool:
+    """
+    Thread-safe PostgreSQL connection pool
+
+    Connections are opened lazily up to ``maxconn`` and reused across requests.
+    Borrowers wait up to ``timeout`` seconds for a free connection, idle
+    connections are health-checked before being handed out, and the pool
+    resets itself in a forked child so workers never share sockets with
+    their parent. Connecting and health checks run outside the pool lock,
+    so a slow or unreachable server never blocks returns or stats.
+    """
+
+    def __init__(self, postgres_config: Dict[str, Any], minconn: int = 1, maxconn: int = 10,
+                 timeout: float = 5.0, health_check_interval: float = 30.0):
+        """
+        Args:
+            postgres_config: Keyword arguments passed to psycopg2.connect
+            minconn: Number of connections opened on first use and kept idle
+            maxconn: Upper bound on open connections
+            timeout: Seconds to wait for a free connection before PoolTimeout
+            health_check_interval: Idle seconds after which a connection is
+                pinged before reuse (0 pings on every borrow)
+        """
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size: minconn=%s maxconn=%s" % (minconn, maxconn))
+
+        self.postgres_config = postgres_config
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._reset_state()
+        _pools.add(self)
+
+    def _reset_state(self):
+        """Forget all connections and counters (caller holds the lock or owns the pool)"""
+        self._pid = os.getpid()
+        self._idle: List[tuple] = []  # (connection, returned_at)
+        self._in_use = set()
+        self._size = 0
+        self._prefilled = False
+        self._closed = False
+        self._waiters = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _after_fork(self):
+        """Drop inherited connections without closing the parent's sockets"""
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._reset_state()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._after_fork()
+
+    def _connect(self):
+        return psycopg2.connect(**self.postgres_config)
+
+    def _prefill(self):
+        """Open ``minconn`` idle connections on first use; failures are left to the first borrow"""
+        with self._available:
+            self._check_pid()
+            if self._prefilled:
+                return
+            self._prefilled = True
+            # Reserve the slots, then connect without holding the lock
+            reserved = max(self.minconn - self._size, 0)
+            self._size += reserved
+
+        try:
+            while reserved:
+                try:
+                    conn = self._connect()
+                except psycopg2.Error as e:
+                    print(f"Error pre-filling connection pool: {str(e)}")
+                    return
+                with self._available:
+                    reserved -= 1
+                    if self._closed:
+                        self._size -= 1
+                        self._discarded += 1
+                    else:
+                        self._idle.append((conn, time.monotonic()))
+                        conn = None
+                    self._available.notify()
+                if conn is not None:
+                    self._close(conn)
+        finally:
+            if reserved:
+                with self._available:
+                    self._size -= reserved
+                    self._available.notify_all()
+
+    def _reserve(self, timeout: float, deadline: float):
+        """
+        Take an idle connection, or a slot for a new one when none is idle
+
+        Returns:
+            (connection, returned_at) of an idle connection, or (None, None)
+            when a slot was reserved and the caller must connect
+        Raises:
+            PoolTimeout: If the pool is closed or nothing frees up by ``deadline``
+        """
+        with self._available:
+            self._check_pid()
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.maxconn:
+                    self._size += 1
+                    return None, None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"Timed out after {timeout:.1f}s waiting for a PostgreSQL connection "
+                        f"({self._size} open, {len(self._in_use)} in use)"
+                    )
+                self._waiters += 1
+                try:
+                    self._available.wait(remaining)
+                finally:
+                    self._waiters -= 1
+
+    def _is_healthy(self, conn, returned_at: float) -> bool:
+        """Whether a connection taken from the idle list can be reused (called without the lock)"""
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        self._discarded += 1
+        self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Check out a connection, waiting up to ``timeout`` seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        self._prefill()
+
+        while True:
+            conn, returned_at = self._reserve(timeout, deadline)
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._available.notify()
+                    raise
+                break
+            if self._is_healthy(conn, returned_at):
+                break
+            with self._available:
+                self._size -= 1
+                self._discarded += 1
+                self._available.notify()
+            self._close(conn)
+
+        with self._available:
+            return self._checkout(conn, started)
+
+    def _checkout(self, conn, started: float):
+        waited = time.monotonic() - started
+        self._in_use.add(conn)
+        self._checkouts += 1
+        self._wait_time_total += waited
+        self._wait_time_max = max(self._wait_time_max, waited)
+        return conn
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a connection to the pool, closing it if it is broken"""
+        with self._available:
+            if conn not in self._in_use:
+                # Connection from before a fork or a closed pool
+                return
+            self._in_use.discard(conn)
+
+            if not discard and not conn.closed:
+                try:
+                    if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+
+            if discard or conn.closed or self._closed:
+                self._size -= 1
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._available.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Borrow a connection for the duration of a ``with`` block
+
+        The transaction is committed when the block exits normally and rolled
+        back otherwise; connections that fail at the driver level are closed
+        instead of being returned.
+        """
+        conn = self.getconn(timeout)
+        discard = False
+        try:
+            yield conn
+            conn.commit()
+        except BaseException as e:
+            discard = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool usage counters"""
+        with self._lock:
+            return {
+                'size': self._size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiters': self._waiters,
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'wait_time_total_ms': round(self._wait_time_total * 1000, 3),
+                'wait_time_avg_ms': round(self._wait_time_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                'wait_time_max_ms': round(self._wait_time_max * 1000, 3)
+            }
+
+    def close(self):
+        """Close idle connections; in-use connections are closed when returned"""
+        with self._available:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._size -= 1
+                self._discard(conn)
+            self._idle = []
+            self._available.notify_all()
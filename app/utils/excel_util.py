@@ -1,6 +1,18 @@
-import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, IO, Iterable, Iterator, List, Sequence
 import io
+import tempfile
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+from app.utils.metrics import timed
+
+SHEET_NAME = 'Test Cases'
+STORY_HEADERS = ['Story ID', 'Story Description']
+TEST_CASE_HEADERS = ['Test Case ID', 'Description', 'Steps', 'Expected Result']
+
+# Workbooks larger than this are spooled from memory to a temporary file
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
 
 def generate_excel(data: Dict[str, Any]) -> io.BytesIO:
     """
@@ -10,45 +22,90 @@ def generate_excel(data: Dict[str, Any]) -> io.BytesIO:
     Returns:
         BytesIO object containing the Excel file
     """
-    # Create a list to store all test case data
-    test_case_data = []
-    
-    # Add story information
-    story_info = {
-        'Story ID': data['story']['id'],
-        'Story Description': data['story']['description']
-    }
-    
-    # Process each test case
-    for tc in data['test_cases']:
-        test_case_data.append({
-            'Test Case ID': tc['test_case_id'],
-            'Description': tc['description'],
-            'Steps': '\n'.join([f"{i+1}. {step}" for i, step in enumerate(tc['steps'])]),
-            'Expected Result': tc['expected_result']
-        })
-    
-    # Create DataFrame
-    df = pd.DataFrame(test_case_data)
-    
-    # Create Excel writer
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Write story information
-        pd.DataFrame([story_info]).to_excel(writer, sheet_name='Test Cases', index=False, startrow=0)
-        
-        # Write test cases
-        df.to_excel(writer, sheet_name='Test Cases', index=False, startrow=2)
-        
-        # Auto-adjust column widths
-        worksheet = writer.sheets['Test Cases']
-        for idx, col in enumerate(df.columns):
-            max_length = max(
-                df[col].astype(str).apply(len).max(),
-                len(col)
-            )
-            worksheet.column_dimensions[chr(65 + idx)].width = max_length + 2
-    
-    # Reset buffer position
+    write_excel(data, output)
     output.seek(0)
-    return output 
\ No newline at end of file
+    return output
+
+def generate_excel_bytes(data: Dict[str, Any]) -> bytes:
+    """
+    Generate Excel file as bytes; picklable result for process pool workers
+    Args:
+        data: Dictionary containing story and test cases data
+    Returns:
+        Workbook contents
+    """
+    return generate_excel(data).getvalue()
+
+def generate_excel_file(data: Dict[str, Any], spool_max_size: int = SPOOL_MAX_SIZE) -> IO[bytes]:
+    """
+    Generate Excel file into a spooled temporary file for streaming responses
+    Args:
+        data: Dictionary containing story and test cases data
+        spool_max_size: Bytes kept in memory before spilling to disk
+    Returns:
+        File object positioned at the start of the workbook
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=spool_max_size)
+    write_excel(data, output)
+    output.seek(0)
+    return output
+
+def write_excel(data: Dict[str, Any], output: IO[bytes]) -> None:
+    """
+    Write test cases to an Excel workbook with openpyxl's write-only mode
+
+    Rows are produced one at a time from the test case list, so no
+    intermediate DataFrame or copy of the data is built. The test cases are
+    read twice (column widths first, then rows), so any other iterable is
+    materialized into a list first.
+    Args:
+        data: Dictionary containing story data and a Sequence of test cases
+        output: Binary file object to write the workbook to
+    """
+    with timed('excel'):
+        test_cases: Sequence[Dict[str, Any]] = data['test_cases']
+        if not isinstance(test_cases, Sequence):
+            test_cases = list(test_cases)
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(SHEET_NAME)
+
+        # Column widths must be set before the first row in write-only mode
+        for idx, width in enumerate(_column_widths(_test_case_rows(test_cases), TEST_CASE_HEADERS), start=1):
+            worksheet.column_dimensions[get_column_letter(idx)].width = width + 2
+
+        # Story information in rows 1-2, test cases from row 3 as before
+        worksheet.append(_header_cells(worksheet, STORY_HEADERS))
+        worksheet.append([data['story']['id'], data['story']['description']])
+        worksheet.append(_header_cells(worksheet, TEST_CASE_HEADERS))
+        for row in _test_case_rows(test_cases):
+            worksheet.append(row)
+
+        workbook.save(output)
+
+def _test_case_rows(test_cases: Iterable[Dict[str, Any]]) -> Iterator[List[Any]]:
+    """Yield one worksheet row per test case"""
+    for tc in test_cases:
+        yield [
+            tc['test_case_id'],
+            tc['description'],
+            '\n'.join([f"{i+1}. {step}" for i, step in enumerate(tc['steps'])]),
+            tc['expected_result']
+        ]
+
+def _column_widths(rows: Iterable[List[Any]], headers: List[str]) -> List[int]:
+    """Longest rendered value per column, including the header"""
+    widths = [len(header) for header in headers]
+    for row in rows:
+        for idx, value in enumerate(row):
+            widths[idx] = max(widths[idx], len(str(value)))
+    return widths
+
+def _header_cells(worksheet, headers: List[str]) -> List[WriteOnlyCell]:
+    cells = []
+    for header in headers:
+        cell = WriteOnlyCell(worksheet, value=header)
+        cell.font = Font(bold=True)
+        cells.append(cell)
+    return cells
@@ -0,0 +1,124 @@
+from typing import Dict, Any, Iterable, Iterator, List
+import csv
+import io
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows buffered before a chunk is emitted
+CHUNK_ROWS = 1000
+
+CSV_HEADERS = ['story_id', 'test_case_id', 'description', 'steps', 'expected_result']
+
+PARQUET_SCHEMA = pa.schema([
+    pa.field('story_id', pa.int64()),
+    pa.field('test_case_id', pa.string()),
+    pa.field('description', pa.string()),
+    pa.field('steps', pa.list_(pa.string())),
+    pa.field('expected_result', pa.string())
+])
+
+def iter_csv(data: Dict[str, Any], chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Stream test cases as CSV, one row per test case
+    Args:
+        data: Dictionary containing story and test cases data
+        chunk_rows: Rows per emitted chunk
+    Returns:
+        Iterator of UTF-8 encoded CSV chunks; steps are a JSON array
+    """
+    story_id = data['story']['id']
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADERS)
+    for rows in _chunks(data['test_cases'], chunk_rows):
+        for tc in rows:
+            writer.writerow([story_id, tc['test_case_id'], tc['description'],
+                             json.dumps(tc['steps']), tc['expected_result']])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def iter_jsonl(data: Dict[str, Any], chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Stream test cases as newline-delimited JSON, one object per test case
+    Args:
+        data: Dictionary containing story and test cases data
+        chunk_rows: Rows per emitted chunk
+    Returns:
+        Iterator of UTF-8 encoded JSONL chunks; story_id takes precedence
+        over a story_id key inside a test case
+    """
+    story_id = data['story']['id']
+    for rows in _chunks(data['test_cases'], chunk_rows):
+        yield ''.join(json.dumps({**tc, 'story_id': story_id}) + '\n' for tc in rows).encode('utf-8')
+
+def iter_parquet(data: Dict[str, Any], chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    Stream test cases as a Parquet file, one row group per chunk
+    Args:
+        data: Dictionary containing story and test cases data
+        chunk_rows: Rows per row group
+    Returns:
+        Iterator of Parquet file chunks
+    """
+    story_id = data['story']['id']
+    sink = _DrainableSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode='w'), PARQUET_SCHEMA) as writer:
+        for rows in _chunks(data['test_cases'], chunk_rows):
+            writer.write_table(pa.Table.from_pydict({
+                'story_id': [story_id] * len(rows),
+                'test_case_id': [tc['test_case_id'] for tc in rows],
+                'description': [tc['description'] for tc in rows],
+                'steps': [[str(step) for step in tc['steps']] for tc in rows],
+                'expected_result': [tc['expected_result'] for tc in rows]
+            }, schema=PARQUET_SCHEMA))
+            yield sink.drain()
+    yield sink.drain()
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class _DrainableSink:
+    """Write-only file object whose buffered bytes can be taken out incrementally"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+# format name -> (streaming writer, mimetype, file extension)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    'csv': (iter_csv, 'text/csv', 'csv'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson', 'jsonl'),
+    'parquet': (iter_parquet, 'application/vnd.apache.parquet', 'parquet')
+}
@@ -0,0 +1,58 @@
+import hashlib
+from functools import wraps
+from flask import current_app, request, make_response
+
+
+def conditional(view=None, *, salt: str = ''):
+    """
+    Add an ETag validator to a story endpoint
+
+    The ETag comes from DatabaseService.data_version() and the request URL,
+    so a matching If-None-Match is answered with 304 before the view runs any
+    scan or query. No Last-Modified is sent: the stores keep no write time
+    for a listing, and a second-granularity If-Modified-Since would miss
+    changes made within the same second. Cache-Control is taken from the
+    CACHE_CONTROL setting for the endpoint.
+
+    Use as ``@conditional`` or ``@conditional(salt=...)``; a salt changes
+    every ETag of the endpoint, e.g. when its output format changes.
+    """
+    if view is None:
+        return lambda view: conditional(view, salt=salt)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        db_service = current_app.config['DB_SERVICE']
+        try:
+            token = db_service.data_version()
+        except Exception as e:
+            # Serve uncached rather than fail when the version check fails
+            print(f"Error getting data version: {str(e)}")
+            return view(*args, **kwargs)
+
+        etag = hashlib.sha1(f'{token}|{salt}|{request.full_path}'.encode('utf-8')).hexdigest()
+
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        return set_validator(response, etag)
+
+    return wrapper
+
+
+def not_modified(etag: str):
+    """304 response for a request whose If-None-Match matched ``etag``"""
+    return set_validator(current_app.response_class(status=304), etag)
+
+
+def set_validator(response, etag: str):
+    """Set the ETag and the endpoint's configured Cache-Control on a response"""
+    response.set_etag(etag)
+    cache_control = current_app.config['CACHE_CONTROL'].get(request.endpoint)
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,238 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from flask import current_app, g, request
+
+# Latency buckets in seconds, from fast point lookups to large exports
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stage timings and bytes of the request being handled. A context variable
+# rather than flask.g so work submitted with copy_context() to other threads
+# (DatabaseService fan-out) is attributed to the request as well.
+_request_stats: contextvars.ContextVar = contextvars.ContextVar('request_stats', default=None)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labels, key)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(label, '') for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f'{self.name}_bucket{_labels(self.labels + ("le",), key + (le,))} {cumulative}')
+                lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_number(total)}')
+                lines.append(f'{self.name}_count{_labels(self.labels, key)} {count}')
+        return lines
+
+
+class Registry:
+    """Metrics rendered by /metrics; collected values are read from callbacks at scrape time"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collected: List[Tuple[str, str, str, Callable[[], Dict[Tuple, float]], Tuple[str, ...]]] = []
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), **kwargs) -> Histogram:
+        metric = Histogram(name, help, labels, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def collect(self, name: str, help: str, read: Callable[[], Dict[Tuple, float]],
+                labels: Iterable[str] = (), kind: str = 'gauge'):
+        """
+        Register a metric kept elsewhere (e.g. pool counters)
+
+        Args:
+            read: Returns a map of label values -> value
+            kind: Prometheus type, 'gauge' or 'counter'
+        """
+        self._collected = [entry for entry in self._collected if entry[0] != name]
+        self._collected.append((name, help, kind, read, tuple(labels)))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help, kind, read, labels in self._collected:
+            try:
+                values = read()
+            except Exception as e:
+                print(f"Error reading metric {name}: {str(e)}")
+                continue
+            lines.extend([f'# HELP {name} {help}', f'# TYPE {name} {kind}'])
+            for key, value in sorted(values.items()):
+                lines.append(f'{name}{_labels(labels, key)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Request latency', ['endpoint', 'method', 'status'])
+STAGE_SECONDS = REGISTRY.histogram(
+    'app_stage_duration_seconds', 'Time spent per stage of a request', ['endpoint', 'stage'])
+BYTES_READ = REGISTRY.counter(
+    'app_bytes_read_total', 'Bytes of Arrow data read from LanceDB', ['endpoint', 'store'])
+RESPONSE_BYTES = REGISTRY.counter(
+    'http_response_bytes_total', 'Bytes of non-streamed response bodies', ['endpoint'])
+LANCE_SCANS = REGISTRY.counter(
+    'lance_scans_total', 'LanceDB reads by operation', ['operation'])
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Attribute the time spent in the block to ``stage`` of the current request
+
+    Outside a request (scripts, export worker processes) this only costs a
+    context variable lookup.
+    """
+    stats = _request_stats.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages = stats['stages']
+        stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - started
+
+
+def record_bytes(store: str, nbytes: int):
+    """Count bytes read from a store for the current request"""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats['bytes'][store] = stats['bytes'].get(store, 0) + nbytes
+
+
+def init_metrics(app):
+    """
+    Time every request, add a Server-Timing header and serve /metrics
+
+    Server-Timing lists the stages recorded with ``timed`` plus the total, e.g.
+    ``lance_scan;dur=12.1, pg_query;dur=3.4, serialize;dur=0.8, total;dur=17.0``.
+    """
+    @app.before_request
+    def start_request_timer():
+        g.metrics_token = _request_stats.set({'started': time.perf_counter(), 'stages': {}, 'bytes': {}})
+
+    @app.after_request
+    def record_request(response):
+        stats = _request_stats.get()
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats['started']
+        endpoint = request.endpoint or 'unknown'
+
+        REQUEST_SECONDS.observe(total, endpoint=endpoint, method=request.method, status=str(response.status_code))
+        for stage, seconds in stats['stages'].items():
+            STAGE_SECONDS.observe(seconds, endpoint=endpoint, stage=stage)
+        for store, nbytes in stats['bytes'].items():
+            BYTES_READ.inc(nbytes, endpoint=endpoint, store=store)
+        if not response.is_streamed and response.content_length is not None:
+            RESPONSE_BYTES.inc(response.content_length, endpoint=endpoint)
+
+        timings = [f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in stats['stages'].items()]
+        timings.append(f'total;dur={total * 1000:.1f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    @app.teardown_request
+    def reset_request_stats(exc):
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            try:
+                _request_stats.reset(token)
+            except ValueError:
+                # Torn down in another context (e.g. after a streamed body)
+                _request_stats.set(None)
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus text exposition of request, store and pool metrics"""
+        return current_app.response_class(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+    db_service = app.config['DB_SERVICE']
+    artifact_cache = app.config['ARTIFACT_CACHE']
+    REGISTRY.collect('pg_pool_connections', 'PostgreSQL pool connections by state',
+                     lambda: _select(db_service.pool_stats(), ('size', 'in_use', 'idle', 'waiters')), ['state'])
+    REGISTRY.collect('pg_pool_events_total', 'PostgreSQL pool checkouts, timeouts and discarded connections',
+                     lambda: _select(db_service.pool_stats(), ('checkouts', 'timeouts', 'discarded')),
+                     ['event'], kind='counter')
+    REGISTRY.collect('pg_pool_wait_seconds_total', 'Time spent waiting for a pooled connection',
+                     lambda: {(): db_service.pool_stats()['wait_time_total_ms'] / 1000}, kind='counter')
+    REGISTRY.collect('lance_dataset_version', 'Version of the user_stories dataset being served',
+                     lambda: {(): db_service.story_store.version()})
+    REGISTRY.collect('artifact_cache', 'Download artifact cache usage',
+                     lambda: _select(artifact_cache.stats(), artifact_cache.stats().keys()), ['stat'])
+
+
+def _select(stats: Dict[str, Any], names: Iterable[str]) -> Dict[Tuple, float]:
+    return {(name,): stats[name] for name in names}
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ''
+    pairs = ('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+             for name, value in zip(names, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,75 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(time_stamp: int, story_id: int) -> str:
+    """
+    Encode a (time_stamp, story_id) keyset position as an opaque cursor
+
+    The timestamp is kept as an integer, so nanosecond time_stamp values
+    survive the round trip (a datetime would truncate them to microseconds).
+    Args:
+        time_stamp: Timestamp of the last story on the page, in nanoseconds
+            since the epoch (UTC)
+        story_id: ID of the last story on the page
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([int(time_stamp), int(story_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Cursors of earlier versions, which carry an ISO timestamp, are still
+    accepted.
+    Returns:
+        (time_stamp in nanoseconds since the epoch, story_id)
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        time_stamp, story_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(time_stamp, str):
+            time_stamp = to_epoch_ns(datetime.fromisoformat(time_stamp))
+        elif isinstance(time_stamp, bool) or not isinstance(time_stamp, int):
+            raise ValueError('Cursor timestamp must be an integer')
+        return time_stamp, int(story_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def to_epoch_ns(time_stamp: datetime) -> int:
+    """
+    Nanoseconds since the epoch of a timestamp (naive ones are taken as UTC)
+    """
+    return (utc_naive(time_stamp) - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def from_epoch_ns(time_stamp: int) -> datetime:
+    """
+    Naive UTC datetime of a nanosecond timestamp, truncated to microseconds
+    (the precision of PostgreSQL timestamps)
+    """
+    return EPOCH + timedelta(microseconds=time_stamp // 1000)
+
+
+def utc_naive(time_stamp: datetime) -> datetime:
+    """
+    Convert a cursor timestamp to the naive UTC form of the time_stamp columns
+    Args:
+        time_stamp: Naive (taken as UTC already) or timezone-aware timestamp
+    Returns:
+        The same instant without tzinfo
+    """
+    if time_stamp.tzinfo is None:
+        return time_stamp
+    return time_stamp.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,336 @@
+import cProfile
+import contextvars
+import hashlib
+import hmac
+import io
+import itertools
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from flask import g, request
+from app.config import DEFAULT_SECRET_KEY
+
+PROFILE_HEADER = 'X-Profile'
+
+# Profiler state of the request being handled; a context variable so
+# profile_thread() can attach fan-out work to it (see metrics._request_stats)
+_request_profile: contextvars.ContextVar = contextvars.ContextVar('request_profile', default=None)
+
+# speedscope stacks: deepest call chain kept, and the smallest share of the
+# profile's total time worth a stack of its own
+SPEEDSCOPE_MAX_DEPTH = 128
+SPEEDSCOPE_MIN_SHARE = 0.0001
+
+
+class ProfileStore:
+    """
+    Size-bounded ring buffer of request profiles
+
+    Holds at most ``max_profiles`` profiles and ``max_bytes`` of marshalled
+    pstats data; the oldest profiles are dropped first.
+    """
+
+    def __init__(self, max_profiles: int = 50, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            max_profiles: Number of profiles kept
+            max_bytes: Budget for the marshalled stats of all kept profiles
+        """
+        self.max_profiles = max_profiles
+        self.max_bytes = max_bytes
+        self._profiles: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._dropped = 0
+
+    def add(self, info: Dict[str, Any], stats: pstats.Stats) -> Optional[int]:
+        """
+        Store a profile
+
+        Args:
+            info: Request metadata listed by ``list()``
+            stats: Collected stats
+
+        Returns:
+            Profile id, or None if the profile alone exceeds max_bytes
+        """
+        size = len(marshal.dumps(stats.stats))
+        if size > self.max_bytes:
+            with self._lock:
+                self._dropped += 1
+            return None
+        with self._lock:
+            profile_id = next(self._ids)
+            self._profiles[profile_id] = (dict(info, id=profile_id, bytes=size), stats)
+            self._bytes += size
+            while len(self._profiles) > self.max_profiles or self._bytes > self.max_bytes:
+                old_info, _ = self._profiles.popitem(last=False)[1]
+                self._bytes -= old_info['bytes']
+                self._dropped += 1
+            return profile_id
+
+    def get(self, profile_id: int) -> Optional[pstats.Stats]:
+        """Copy of a stored profile's stats, or None once it has been evicted"""
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+        if entry is None:
+            return None
+        copy = pstats.Stats()
+        copy.add(entry[1])
+        return copy
+
+    def info(self, profile_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._profiles.get(profile_id)
+            return dict(entry[0]) if entry else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of the stored profiles, newest first"""
+        with self._lock:
+            return [dict(info) for info, _ in reversed(self._profiles.values())]
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of store usage"""
+        with self._lock:
+            return {
+                'profiles': len(self._profiles),
+                'bytes': self._bytes,
+                'max_profiles': self.max_profiles,
+                'max_bytes': self.max_bytes,
+                'dropped': self._dropped
+            }
+
+
+def profile_token(secret: str, ttl: float = 300) -> str:
+    """
+    Value for the X-Profile header, valid for ``ttl`` seconds
+
+    The token is ``<expiry>:<signature>``, the signature being an HMAC-SHA256
+    of the expiry (unix seconds) keyed with the app's SECRET_KEY.
+    """
+    expires = str(int(time.time() + ttl))
+    return f'{expires}:{_sign(secret, expires)}'
+
+
+def verify_token(secret: str, token: str) -> bool:
+    """Check the signature and expiry of an X-Profile header value"""
+    expires, _, signature = token.partition(':')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(_sign(secret, expires), signature)
+
+
+def authorized(secret: str) -> bool:
+    """Whether the current request carries a valid X-Profile token"""
+    return verify_token(secret, request.headers.get(PROFILE_HEADER, ''))
+
+
+def _sign(secret: str, message: str) -> str:
+    return hmac.new(secret.encode('utf-8'), message.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def profile_thread(call: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    Wrap work run in another thread for a request so it is profiled with it
+
+    cProfile only sees the thread that enabled it; the wrapper profiles
+    ``call`` separately and the request merges the result into its profile.
+    Must run inside a copy of the request's context (contextvars.copy_context).
+    """
+    def run():
+        state = _request_profile.get()
+        if state is None:
+            return call()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows one at a time)
+            return call()
+        try:
+            return call()
+        finally:
+            profiler.disable()
+            state['threads'].append(profiler)
+    return run
+
+
+def init_profiling(app, store: ProfileStore, sample_rate: float = 0.0):
+    """
+    Profile requests with cProfile and keep the results in ``store``
+
+    A request is profiled when it carries a valid ``X-Profile`` header (see
+    ``profile_token``) or with probability ``sample_rate``; the admin
+    endpoints, which serve the profiles, are never profiled. The profile
+    covers the view function and request hooks (not the body of streamed
+    responses) and its id is returned in the ``X-Profile-Id`` response header.
+
+    Raises:
+        ValueError: If SECRET_KEY is unset or the placeholder, with which
+            anyone could sign tokens
+    """
+    secret = app.config['SECRET_KEY']
+    if not secret or secret == DEFAULT_SECRET_KEY:
+        raise ValueError('PROFILING_ENABLED requires SECRET_KEY to be set to a real secret')
+
+    @app.before_request
+    def start_profile():
+        if request.blueprint == 'admin':
+            return
+        token = request.headers.get(PROFILE_HEADER)
+        if token:
+            if not verify_token(secret, token):
+                return
+            trigger = 'header'
+        elif sample_rate > 0 and random.random() < sample_rate:
+            trigger = 'sample'
+        else:
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another request is being profiled (Python 3.12+ allows one profiler at a time)
+            return
+        state = {'profiler': profiler, 'trigger': trigger, 'threads': [],
+                 'started': time.perf_counter(), 'created': datetime.now(timezone.utc)}
+        g.profile_token = _request_profile.set(state)
+
+    @app.after_request
+    def finish_profile(response):
+        state = _request_profile.get()
+        if state is None or state['profiler'] is None:
+            return response
+        duration = time.perf_counter() - state['started']
+        profiler = state['profiler']
+        profiler.disable()
+        state['profiler'] = None
+
+        try:
+            stats = pstats.Stats(profiler)
+            # Fan-out work still running (timed out) is left out
+            for thread_profiler in list(state['threads']):
+                stats.add(thread_profiler)
+            profile_id = store.add({
+                'created': state['created'].isoformat(),
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 3),
+                'trigger': state['trigger']
+            }, stats)
+            if profile_id is not None:
+                response.headers['X-Profile-Id'] = str(profile_id)
+        except Exception as e:
+            print(f"Error storing request profile: {str(e)}")
+        return response
+
+    @app.teardown_request
+    def stop_profile(exc):
+        token = g.pop('profile_token', None)
+        if token is None:
+            return
+        state = _request_profile.get()
+        if state is not None and state['profiler'] is not None:
+            state['profiler'].disable()
+        try:
+            _request_profile.reset(token)
+        except ValueError:
+            _request_profile.set(None)
+
+
+def to_pstats(stats: pstats.Stats) -> bytes:
+    """Profile in the file format of ``pstats.Stats.dump_stats`` (snakeviz, ``python -m pstats``)"""
+    return marshal.dumps(stats.stats)
+
+
+def to_text(stats: pstats.Stats, sort: str = 'cumulative', limit: int = 50) -> str:
+    """pstats report of the ``limit`` most expensive functions"""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def to_speedscope(stats: pstats.Stats, name: str) -> Dict[str, Any]:
+    """
+    Profile as a speedscope sampled profile (https://www.speedscope.app)
+
+    cProfile records call edges, not stacks, so stacks are rebuilt from the
+    roots down: a function's time under a caller is taken to be its share of
+    that caller's calls to it, as flame graph converters for cProfile do.
+    Recursive calls end a stack, and stacks below SPEEDSCOPE_MIN_SHARE of the
+    total or deeper than SPEEDSCOPE_MAX_DEPTH are dropped.
+    """
+    entries = stats.stats
+    callees: Dict[Any, List] = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    frames: List[Dict[str, Any]] = []
+    frame_index: Dict[Any, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+    total = sum(entry[2] for entry in entries.values())
+    min_weight = total * SPEEDSCOPE_MIN_SHARE
+
+    def frame(func) -> int:
+        if func not in frame_index:
+            filename, line, function = func
+            entry = {'name': function}
+            if filename != '~':
+                entry.update(file=filename, line=line)
+            frame_index[func] = len(frames)
+            frames.append(entry)
+        return frame_index[func]
+
+    def walk(func, stack: List[int], path: set, share: float):
+        own_time, cumulative = entries[func][2], entries[func][3]
+        stack = stack + [frame(func)]
+        if own_time * share > 0:
+            samples.append(stack)
+            weights.append(own_time * share)
+        if len(stack) >= SPEEDSCOPE_MAX_DEPTH:
+            return
+        path = path | {func}
+        for callee, edge_time in callees.get(func, ()):
+            callee_cumulative = entries[callee][3]
+            if callee in path or callee_cumulative <= 0:
+                continue
+            callee_share = share * min(1.0, edge_time / callee_cumulative)
+            if callee_cumulative * callee_share >= min_weight:
+                walk(callee, stack, path, callee_share)
+
+    for func, entry in entries.items():
+        if not entry[4]:
+            walk(func, [], set(), 1.0)
+
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'delta-fe-api',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights
+        }]
+    }
@@ -0,0 +1,49 @@
+import io
+import zipfile
+from typing import Iterable, Iterator, Tuple, Union
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Unseekable sink that collects written bytes until they are drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries: Iterable[Tuple[str, Union[bytes, Iterable[bytes]]]],
+               compression: int = zipfile.ZIP_STORED) -> Iterator[bytes]:
+    """
+    Build a ZIP archive incrementally for a streaming response
+    Args:
+        entries: (file name, contents) pairs, consumed lazily; contents are
+            bytes or an iterable of byte chunks that is written as it is read
+        compression: zipfile compression method; ZIP_STORED suits already
+            compressed members such as xlsx workbooks
+    Returns:
+        Iterator of archive chunks, at least one per entry plus the central directory
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=compression) as archive:
+        for name, data in entries:
+            if isinstance(data, bytes):
+                archive.writestr(name, data)
+            else:
+                # Sizes are unknown up front, so zip64 is allowed for large members
+                with archive.open(name, mode='w', force_zip64=True) as member:
+                    for chunk in data:
+                        member.write(chunk)
+                        yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
@@ -0,0 +1,258 @@
+"""
+HTTP load benchmark for the story and download endpoints
+
+Drives GET /api/stories/, /api/stories/<id> and /api/testcases/download/<id>
+at each concurrency level and reports p50/p95/p99 latency, throughput and
+the server's peak RSS. Results are written as JSON (with the git commit) so
+runs can be compared across commits with --compare.
+
+Run from the repository root against data from synthetic_data.py:
+    python benchmarks/bench_api.py --generate 100k --lance-dir /tmp/bench_lance --postgres-db delta_bench
+    python benchmarks/bench_api.py --lance-dir /tmp/bench_lance --postgres-db delta_bench \\
+        --concurrency 1 8 32 --requests 500 --compare benchmarks/results/<previous>.json
+or against a running server (RSS only with --server-pid):
+    python benchmarks/bench_api.py --url http://localhost:5000 --stories 100000
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_data import generate, parse_scale
+
+ENDPOINTS = {
+    'stories': lambda rng, stories: '/api/stories/?page=%d&per_page=10' % rng.randint(1, max(1, min(100, stories // 10))),
+    'story': lambda rng, stories: '/api/stories/%d' % rng.randint(1, stories),
+    'download': lambda rng, stories: '/api/testcases/download/%d' % rng.randint(1, stories)
+}
+
+
+class RssSampler(threading.Thread):
+    """Peak resident memory of a process and its children, sampled from /proc"""
+
+    def __init__(self, pid, interval=0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, sum(_rss(pid) for pid in [self.pid] + _children(self.pid)))
+            self._stop_event.wait(self.interval)
+
+    def reset(self):
+        self.peak = 0
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def _rss(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return 0
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def start_server(port, lance_dir, postgres_db):
+    env = dict(os.environ, LANCE_DB_PATH=lance_dir, FLASK_DEBUG='False')
+    if postgres_db:
+        env['POSTGRES_DB'] = postgres_db
+    server = subprocess.Popen(
+        [sys.executable, '-c',
+         f'from app import create_app; create_app().run(host="127.0.0.1", port={port}, threaded=True)'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('Server exited during startup')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('Server did not start within 60s')
+
+
+def fetch(url):
+    """Status, body size and latency of one GET; the body is read completely"""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as response:
+            size = len(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        size = len(e.read())
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        size, status = 0, 0
+    return status, size, time.perf_counter() - started
+
+
+def run_level(base_url, endpoint, concurrency, requests, stories, seed):
+    rng = random.Random(seed)
+    urls = [base_url + ENDPOINTS[endpoint](rng, stories) for _ in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for _, _, latency in results]) * 1000
+    statuses = {}
+    for status, _, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'endpoint': endpoint,
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': sum(1 for status, _, _ in results if status == 0 or status >= 500),
+        'statuses': statuses,
+        'throughput_rps': requests / elapsed,
+        'mean_ms': float(latencies.mean()),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'bytes': sum(size for _, size, _ in results)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous=None):
+    before = {(r['endpoint'], r['concurrency']): r for r in (previous or {}).get('results', [])}
+    print(f"{'endpoint':>9} {'conc':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'errors':>7} {'peak RSS MiB':>13}" + ('  p95 / rps vs previous' if before else ''))
+    for r in results:
+        rss = f"{r['peak_rss_bytes'] / 2**20:.0f}" if r.get('peak_rss_bytes') else '-'
+        line = (f"{r['endpoint']:>9} {r['concurrency']:>5} {r['throughput_rps']:>9.1f} {r['p50_ms']:>9.2f} "
+                f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7} {rss:>13}")
+        old = before.get((r['endpoint'], r['concurrency']))
+        if old:
+            line += (f"  {(r['p95_ms'] / old['p95_ms'] - 1) * 100:+.0f}% / "
+                     f"{(r['throughput_rps'] / old['throughput_rps'] - 1) * 100:+.0f}%")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='benchmark a running server instead of starting one')
+    parser.add_argument('--server-pid', type=int, help='pid of the running server, for peak RSS')
+    parser.add_argument('--lance-dir', help='LanceDB directory for the started server')
+    parser.add_argument('--postgres-db', help='PostgreSQL database for the started server')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--generate', metavar='SCALE', help='generate data first (10k, 100k, 1m or a count)')
+    parser.add_argument('--stories', help='number of stories in the data (default: --generate scale or the API total)')
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint and concurrency level')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per endpoint')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='results file (default benchmarks/results/api-<commit>-<time>.json)')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    args = parser.parse_args()
+
+    if args.generate:
+        if not args.lance_dir or not args.postgres_db:
+            parser.error('--generate needs --lance-dir and --postgres-db')
+        generate(parse_scale(args.generate), args.lance_dir, args.postgres_db, seed=args.seed)
+    if not args.url and not args.lance_dir:
+        parser.error('pass --url or --lance-dir')
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        pid = args.server_pid
+    else:
+        server = start_server(args.port, args.lance_dir, args.postgres_db)
+        base_url = f'http://127.0.0.1:{args.port}'
+        pid = server.pid
+
+    try:
+        stories = parse_scale(args.stories or args.generate) if (args.stories or args.generate) else None
+        if stories is None:
+            with urllib.request.urlopen(base_url + '/api/stories/?per_page=1') as response:
+                stories = json.load(response)['total']
+
+        sampler = RssSampler(pid) if pid and os.path.exists(f'/proc/{pid}') else None
+        if sampler:
+            sampler.start()
+
+        results = []
+        for endpoint in args.endpoints:
+            run_level(base_url, endpoint, 1, args.warmup, stories, args.seed + 1)
+            for concurrency in args.concurrency:
+                if sampler:
+                    sampler.reset()
+                result = run_level(base_url, endpoint, concurrency, args.requests, stories, args.seed)
+                result['peak_rss_bytes'] = sampler.peak if sampler else None
+                results.append(result)
+        if sampler:
+            sampler.stop()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'stories': stories,
+        'requests': args.requests,
+        'results': results
+    }
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f"api-{commit or 'unknown'}-{datetime.now():%Y%m%d%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_results(results, previous)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    main()
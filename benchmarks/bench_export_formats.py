@@ -0,0 +1,93 @@
+"""
+Export format benchmark: XLSX vs CSV, JSONL and Parquet
+
+Measures write time, peak Python allocations while streaming, output size and
+the time a consumer needs to parse the file back.
+
+Run from the repository root:
+    python benchmarks/bench_export_formats.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import openpyxl
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.excel_util import write_excel
+from app.utils.export_util import iter_csv, iter_jsonl, iter_parquet
+from bench_excel import make_test_cases
+
+
+def stream_xlsx(data):
+    output = io.BytesIO()
+    write_excel(data, output)
+    yield output.getvalue()
+
+
+def read_xlsx(payload):
+    worksheet = openpyxl.load_workbook(io.BytesIO(payload), read_only=True)['Test Cases']
+    return sum(1 for _ in worksheet.iter_rows(min_row=4, values_only=True))
+
+
+def read_csv(payload):
+    return sum(1 for _ in csv.DictReader(io.StringIO(payload.decode('utf-8'))))
+
+
+def read_jsonl(payload):
+    return sum(1 for line in payload.splitlines() if json.loads(line))
+
+
+def read_parquet(payload):
+    return pq.read_table(io.BytesIO(payload)).num_rows
+
+
+FORMATS = [
+    ('xlsx', stream_xlsx, read_xlsx),
+    ('csv', iter_csv, read_csv),
+    ('jsonl', iter_jsonl, read_jsonl),
+    ('parquet', iter_parquet, read_parquet)
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'test cases':>10} {'format':>8} {'write (s)':>10} {'vs xlsx':>8} {'peak (MiB)':>11} "
+          f"{'size (KiB)':>11} {'read (s)':>9}")
+    for n in args.sizes:
+        data = {'story': {'id': 1, 'description': 'Benchmark story'}, 'test_cases': make_test_cases(n)}
+        baseline = None
+        for name, stream, read in FORMATS:
+            started = time.perf_counter()
+            payload = b''.join(stream(data))
+            write_time = time.perf_counter() - started
+            baseline = baseline or write_time
+
+            # Chunks are discarded as a streaming response would send them
+            tracemalloc.start()
+            for _ in stream(data):
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            started = time.perf_counter()
+            rows = read(payload)
+            read_time = time.perf_counter() - started
+            assert rows == n, (name, rows)
+
+            print(f"{n:>10} {name:>8} {write_time:>10.3f} {baseline / write_time:>7.1f}x {peak / 2**20:>11.1f} "
+                  f"{len(payload) / 1024:>11.0f} {read_time:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
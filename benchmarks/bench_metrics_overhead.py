@@ -0,0 +1,116 @@
+"""
+Instrumentation overhead benchmark: Server-Timing / metrics on vs off
+
+Serves GET /api/stories/ and /api/stories/<id> from a synthetic LanceDB table
+through two otherwise identical apps, one with init_metrics() and one
+without, alternating rounds so drift affects both equally, and compares the
+fastest round of each (the least disturbed by other load on the machine).
+PostgreSQL is replaced by an in-memory stub so only API-side work is
+compared.
+
+End-to-end differences of a few percent are within run-to-run noise on a
+busy machine, so the fixed per-request cost of the hooks is also measured on
+an empty route and reported as a share of each endpoint's latency.
+
+Run from the repository root:
+    python benchmarks/bench_metrics_overhead.py [--stories 100000] [--rounds 20] [--requests 50]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import lancedb
+import pandas as pd
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.db_service import DatabaseService
+from app.utils.metrics import init_metrics, timed, _request_stats
+from synthetic_data import story_chunks
+
+
+def make_app(lance_dir, metrics):
+    db_service = DatabaseService({}, lance_dir, pool_config={'minconn': 0})
+    db_service._fetch_test_case_info = lambda story_ids, statement_timeout=None: pd.DataFrame({
+        'story_id': story_ids, 'num_test_cases': [10] * len(story_ids), 'end_time': [None] * len(story_ids)})
+    db_service.data_version = lambda: 'bench'
+
+    app = Flask(__name__)
+    app.config['DB_SERVICE'] = db_service
+    app.config['ARTIFACT_CACHE'] = None
+    app.config['CACHE_CONTROL'] = {}
+    if metrics:
+        init_metrics(app)
+    app.add_url_rule('/noop', 'noop', lambda: '')
+    from app.routes.stories import stories_bp
+    app.register_blueprint(stories_bp, url_prefix='/api/stories')
+    return app
+
+
+def run_round(client, paths):
+    started = time.perf_counter()
+    for path in paths:
+        response = client.get(path)
+        assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - started) / len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stories', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    # Cost of one timed() block inside a request
+    token = _request_stats.set({'started': 0, 'stages': {}, 'bytes': {}})
+    started = time.perf_counter()
+    for _ in range(100000):
+        with timed('stage'):
+            pass
+    per_stage = (time.perf_counter() - started) / 100000
+    _request_stats.reset(token)
+    print(f"timed() block: {per_stage * 1e6:.2f} us")
+
+    directory = tempfile.mkdtemp(prefix='bench_metrics_')
+    try:
+        lance_db = lancedb.connect(directory)
+        table = None
+        for chunk in story_chunks(args.stories, seed=0, vectors=False):
+            if table is None:
+                table = lance_db.create_table('user_stories', chunk)
+            else:
+                table.add(chunk)
+        table.to_lance().create_scalar_index('story_id', index_type='BTREE')
+
+        clients = {'off': make_app(directory, False).test_client(), 'on': make_app(directory, True).test_client()}
+        scenarios = {
+            'noop': ['/noop'] * args.requests * 10,
+            'stories': ['/api/stories/?page=%d&include_total=false' % (i % 10 + 1) for i in range(args.requests)],
+            'story': ['/api/stories/%d' % (i * 7919 % args.stories + 1) for i in range(args.requests)]
+        }
+
+        print(f"{'endpoint':>9} {'off (ms)':>9} {'on (ms)':>9} {'added (us)':>11} {'overhead':>9} {'hooks':>7}")
+        hooks = None
+        for name, paths in scenarios.items():
+            times = {'off': [], 'on': []}
+            for mode in ('off', 'on'):
+                run_round(clients[mode], paths[:10])
+            for _ in range(args.rounds):
+                for mode in ('off', 'on'):
+                    times[mode].append(run_round(clients[mode], paths))
+            off, on = min(times['off']), min(times['on'])
+            if hooks is None:
+                hooks = on - off
+            print(f"{name:>9} {off * 1000:>9.3f} {on * 1000:>9.3f} {(on - off) * 1e6:>11.1f} "
+                  f"{(on / off - 1) * 100:>8.2f}% {hooks / off * 100:>6.2f}%")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Similar stories benchmark: IVF_PQ recall@k and latency vs brute force
+
+Builds a synthetic user_stories table with clustered 768-dim vectors in a
+temporary directory, indexes it like database_operations/build_vector_index.py
+and compares indexed searches at several nprobes / refine_factor settings
+against the exact search.
+
+Run from the repository root:
+    python benchmarks/bench_vector_search.py [--rows 50000] [--queries 100] [--k 10]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import lancedb
+import numpy as np
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lance_maintenance import default_num_partitions, default_num_sub_vectors
+from app.services.lance_store import LanceStoryStore, VECTOR_COLUMN
+
+DIMENSION = 768
+
+
+def make_stories(rows, clusters, seed=0):
+    """Stories whose vectors are scattered around ``clusters`` random topics"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIMENSION)).astype('float32')
+    vectors = centers[rng.integers(0, clusters, rows)] + 0.5 * rng.normal(size=(rows, DIMENSION)).astype('float32')
+    return pa.table({
+        'story_id': pa.array(np.arange(1, rows + 1), pa.int64()),
+        'story_Description': [f'Synthetic story {i}' for i in range(1, rows + 1)],
+        VECTOR_COLUMN: pa.FixedSizeListArray.from_arrays(pa.array(vectors.ravel()), DIMENSION),
+        'Processed_Flag': pa.array(np.arange(rows) % 2 == 0),
+        'time_stamp': pa.array(np.arange(rows) * 1_000_000, pa.timestamp('us'))
+    }), vectors
+
+
+def search(store, queries, k, **options):
+    """Result ids and per-query latencies for one search configuration"""
+    results, latencies = [], []
+    for story_id, vector in queries:
+        started = time.perf_counter()
+        neighbours = store.similar(vector, k, exclude_id=story_id, **options)
+        latencies.append(time.perf_counter() - started)
+        results.append(set(neighbours['story_id'].tolist()))
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--clusters', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nprobes', type=int, nargs='+', default=[1, 5, 10, 20, 50])
+    parser.add_argument('--refine-factors', type=int, nargs='+', default=[0, 5, 20])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench_vector_')
+    try:
+        table, vectors = make_stories(args.rows, args.clusters)
+        lance_db = lancedb.connect(directory)
+        lance_db.create_table('user_stories', table)
+        store = LanceStoryStore(lance_db, refresh_interval=0)
+
+        rng = np.random.default_rng(1)
+        picked = rng.choice(args.rows, size=args.queries, replace=False)
+        queries = [(int(i) + 1, vectors[i].tolist()) for i in picked]
+
+        exact, exact_latencies = search(store, queries, args.k, use_index=False)
+
+        started = time.perf_counter()
+        store.dataset().create_index(
+            VECTOR_COLUMN, index_type='IVF_PQ', metric='cosine',
+            num_partitions=default_num_partitions(args.rows),
+            num_sub_vectors=default_num_sub_vectors(DIMENSION)
+        )
+        store.invalidate()
+        print(f"{args.rows} stories, IVF_PQ index built in {time.perf_counter() - started:.1f}s\n")
+
+        print(f"{'search':>24} {f'recall@{args.k}':>10} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+        print(f"{'brute force':>24} {1.0:>10.3f} {_ms(exact_latencies, 50):>9.2f} {_ms(exact_latencies, 95):>9.2f}")
+        for nprobes in args.nprobes:
+            for refine_factor in args.refine_factors:
+                found, latencies = search(store, queries, args.k, nprobes=nprobes, refine_factor=refine_factor or None)
+                recall = statistics.mean(len(f & e) / len(e) for f, e in zip(found, exact))
+                name = f'nprobes={nprobes} refine={refine_factor}'
+                print(f"{name:>24} {recall:>10.3f} {_ms(latencies, 50):>9.2f} {_ms(latencies, 95):>9.2f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _ms(latencies, percentile):
+    return float(np.percentile(latencies, percentile)) * 1000
+
+
+if __name__ == '__main__':
+    main()
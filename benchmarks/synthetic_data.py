@@ -0,0 +1,200 @@
+"""
+Synthetic data generator for the API benchmarks
+
+Writes a LanceDB user_stories table and matching test_cases_generated and
+story_summary rows in PostgreSQL, at a configurable scale. Everything is
+derived from --seed, so the same arguments always produce the same data.
+
+Run from the repository root (PostgreSQL settings come from .env / POSTGRES_*):
+    python benchmarks/synthetic_data.py --stories 100000 --lance-dir /tmp/bench_lance \\
+        --postgres-db delta_bench [--min-test-cases 0 --max-test-cases 50]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import lancedb
+import numpy as np
+import psycopg2
+import pyarrow as pa
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database_operations'))
+
+from migrate_postgres import migrate
+from story_summary import CREATE_STORY_SUMMARY_SQL
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+CHUNK_STORIES = 10_000
+DIMENSION = 768
+EPOCH = datetime(2024, 1, 1)
+
+WORDS = ['login', 'password', 'profile', 'order', 'cart', 'search', 'filter', 'wishlist',
+         'email', 'review', 'payment', 'invoice', 'report', 'export', 'dashboard', 'settings']
+
+
+def story_chunks(stories, seed, vectors=True):
+    """Arrow tables of CHUNK_STORIES stories; story i was created i minutes after EPOCH"""
+    rng = np.random.default_rng(seed)
+    # Separate stream so descriptions and flags do not depend on ``vectors``
+    vector_rng = np.random.default_rng(seed + 2)
+    for start in range(0, stories, CHUNK_STORIES):
+        ids = np.arange(start + 1, min(start + CHUNK_STORIES, stories) + 1, dtype=np.int64)
+        words = rng.integers(0, len(WORDS), size=(len(ids), 3))
+        processed = rng.random(len(ids)) < 0.8
+        columns = {
+            'story_id': pa.array(ids),
+            'story_Description': ['As a user, I want to manage my %s, %s and %s (story %d)'
+                                  % (WORDS[a], WORDS[b], WORDS[c], i) for (a, b, c), i in zip(words, ids)],
+        }
+        if vectors:
+            columns['story_Description_vector'] = pa.FixedSizeListArray.from_arrays(
+                pa.array(vector_rng.random(len(ids) * DIMENSION, dtype=np.float32)), DIMENSION)
+        columns['Processed_Flag'] = pa.array(processed)
+        columns['time_stamp'] = pa.array(np.datetime64(EPOCH, 'us') + (ids * 60_000_000).astype('timedelta64[us]'))
+        yield pa.table(columns)
+
+
+def test_cases_for(story_id, count):
+    return [
+        {
+            'test_case_id': f'TC{story_id}.{i}',
+            'description': f'Verify behaviour {i} of story {story_id}',
+            'steps': ['Open the page', f'Perform action {i}', 'Submit the form'],
+            'expected_result': f'Outcome {i} is shown to the user'
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def write_lance(lance_dir, stories, seed, vectors=True):
+    lance_db = lancedb.connect(lance_dir)
+    if 'user_stories' in lance_db.table_names():
+        lance_db.drop_table('user_stories')
+    table = None
+    for chunk in story_chunks(stories, seed, vectors):
+        if table is None:
+            table = lance_db.create_table('user_stories', chunk)
+        else:
+            table.add(chunk)
+    table.to_lance().create_scalar_index('story_id', index_type='BTREE')
+
+
+def postgres_connect(dbname=None):
+    return psycopg2.connect(
+        dbname=dbname or os.getenv('POSTGRES_DB'),
+        user=os.getenv('POSTGRES_USER'),
+        password=os.getenv('POSTGRES_PASSWORD'),
+        host=os.getenv('POSTGRES_HOST'),
+        port=os.getenv('POSTGRES_PORT')
+    )
+
+
+def write_postgres(dbname, stories, seed, min_test_cases, max_test_cases, coverage):
+    """Recreate the tables in ``dbname`` and COPY one run per covered story"""
+    conn = postgres_connect('postgres')
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (dbname,))
+        if not cur.fetchone():
+            cur.execute(f'CREATE DATABASE "{dbname}"')
+    conn.close()
+
+    conn = postgres_connect(dbname)
+    with conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS test_cases_generated, story_summary, schema_migrations")
+        conn.commit()
+    # Bare table for the COPY; indexes and triggers are added after loading
+    migrate(conn, target='0001')
+    conn.autocommit = False
+    cur = conn.cursor()
+    cur.execute(CREATE_STORY_SUMMARY_SQL)
+
+    rng = np.random.default_rng(seed + 1)
+    for chunk in story_chunks(stories, seed, vectors=False):
+        ids = chunk.column('story_id').to_pylist()
+        times = chunk.column('time_stamp').to_pylist()
+        counts = rng.integers(min_test_cases, max_test_cases + 1, size=len(ids))
+        covered = rng.random(len(ids)) < coverage
+
+        runs = io.StringIO()
+        writer = csv.writer(runs)
+        for story_id, created, count, has_run in zip(ids, times, counts, covered):
+            if has_run:
+                writer.writerow([story_id, json.dumps(test_cases_for(story_id, int(count))),
+                                 created.isoformat(), (created + timedelta(minutes=5)).isoformat()])
+        runs.seek(0)
+        cur.copy_expert("COPY test_cases_generated (story_id, test_cases, start_time, end_time) "
+                        "FROM STDIN WITH (FORMAT csv)", runs)
+
+        summary = io.StringIO()
+        writer = csv.writer(summary)
+        for story_id, description, created in zip(ids, chunk.column('story_Description').to_pylist(), times):
+            writer.writerow([story_id, description, created.isoformat()])
+        summary.seek(0)
+        cur.copy_expert("COPY story_summary (story_id, description, process_start_time) "
+                        "FROM STDIN WITH (FORMAT csv)", summary)
+        conn.commit()
+
+    cur.execute("""
+        UPDATE story_summary s
+        SET num_test_cases = t.num_test_cases, process_end_time = t.end_time
+        FROM test_cases_generated t
+        WHERE s.story_id = t.story_id
+    """)
+    conn.commit()
+    cur.close()
+    migrate(conn)
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE test_cases_generated")
+        cur.execute("ANALYZE story_summary")
+    conn.close()
+
+
+def generate(stories, lance_dir, postgres_db, seed=0, min_test_cases=0, max_test_cases=50,
+             coverage=0.8, vectors=True):
+    """
+    Args:
+        stories: Number of stories
+        lance_dir: LanceDB directory (user_stories is replaced)
+        postgres_db: PostgreSQL database (created if missing, tables replaced)
+        seed: Seed for every random choice
+        min_test_cases / max_test_cases: Test cases per run, uniformly drawn
+        coverage: Fraction of stories that have a generation run
+        vectors: Write 768-dim description vectors (3 KiB per story)
+    """
+    started = time.perf_counter()
+    write_lance(lance_dir, stories, seed, vectors)
+    lance_seconds = time.perf_counter() - started
+    write_postgres(postgres_db, stories, seed, min_test_cases, max_test_cases, coverage)
+    print(f"Generated {stories} stories: LanceDB {lance_seconds:.1f}s, "
+          f"PostgreSQL {time.perf_counter() - started - lance_seconds:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--stories', default='10k', help='count or one of ' + ', '.join(SCALES))
+    parser.add_argument('--lance-dir', required=True)
+    parser.add_argument('--postgres-db', default='delta_bench')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-test-cases', type=int, default=0)
+    parser.add_argument('--max-test-cases', type=int, default=50)
+    parser.add_argument('--coverage', type=float, default=0.8, help='fraction of stories with test cases')
+    parser.add_argument('--no-vectors', action='store_true', help='skip the 768-dim description vectors')
+    args = parser.parse_args()
+    generate(parse_scale(args.stories), args.lance_dir, args.postgres_db, args.seed,
+             args.min_test_cases, args.max_test_cases, args.coverage, not args.no_vectors)
+
+
+def parse_scale(value):
+    return SCALES.get(str(value).lower()) or int(value)
+
+
+if __name__ == '__main__':
+    main()
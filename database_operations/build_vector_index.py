@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lance_maintenance import LanceMaintenance
+
+load_dotenv()
+
+
+def build_vector_index(num_partitions: int = None, num_sub_vectors: int = None, force: bool = False):
+    """
+    Build or rebuild the IVF_PQ index on user_stories.story_Description_vector
+
+    Args:
+        num_partitions: IVF partitions (default about sqrt(rows))
+        num_sub_vectors: PQ sub-vectors (default dimension / 16)
+        force: Rebuild even if an index already covers every fragment
+    """
+    maintenance = LanceMaintenance(os.getenv('LANCE_DB_PATH', 'data/lance_db'))
+    if maintenance.build_vector_index(num_partitions=num_partitions, num_sub_vectors=num_sub_vectors,
+                                      force=force) == 'current':
+        print("Vector index is up to date")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the similar stories vector index')
+    parser.add_argument('--num-partitions', type=int, help='IVF partitions (default about sqrt(rows))')
+    parser.add_argument('--num-sub-vectors', type=int, help='PQ sub-vectors (default dimension / 16)')
+    parser.add_argument('--force', action='store_true', help='rebuild even if the index is up to date')
+    args = parser.parse_args()
+    build_vector_index(args.num_partitions, args.num_sub_vectors, args.force)
@@ -0,0 +1,353 @@
+import argparse
+import csv
+import io
+import json
+import os
+import time
+import psycopg2
+import lancedb
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from typing import Any, Iterator, Optional
+from story_summary import CREATE_STORY_SUMMARY_SQL, upsert_stories, refresh_test_case_counts
+from embeddings import get_embedder
+
+load_dotenv()
+
+VECTOR_COLUMN = 'story_Description_vector'
+
+# Schema used when user_stories does not exist yet; an existing table keeps its own
+STORY_SCHEMA = pa.schema([
+    pa.field('story_id', pa.int64()),
+    pa.field('story_Description', pa.string()),
+    pa.field(VECTOR_COLUMN, pa.list_(pa.float32(), 768)),
+    pa.field('Processed_Flag', pa.bool_()),
+    pa.field('time_stamp', pa.timestamp('us'))
+])
+
+TEST_CASE_COLUMNS = ['story_id', 'test_cases', 'start_time', 'end_time']
+
+
+def iter_chunks(path: str, chunk_rows: int) -> Iterator[pa.Table]:
+    """
+    Read a JSONL or Parquet file as Arrow tables of at most ``chunk_rows`` rows
+
+    Parquet is read one record batch at a time; JSONL one group of lines at
+    a time, so memory is bounded by the chunk size, not the file.
+    """
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield pa.Table.from_batches([batch])
+        return
+
+    rows = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                rows.append(json.loads(line))
+            if len(rows) >= chunk_rows:
+                yield _rows_table(rows)
+                rows = []
+    if rows:
+        yield _rows_table(rows)
+
+
+def _rows_table(rows: list) -> pa.Table:
+    """JSON objects as a table with the columns of all of them (from_pylist only uses the first row's keys)"""
+    return pa.Table.from_struct_array(pa.array(rows))
+
+
+class Checkpoint:
+    """
+    Number of chunks of an input file already loaded, kept next to the file
+
+    The checkpoint is only trusted while the file's size, modification time
+    and the chunk size are unchanged; otherwise loading starts over, which is
+    safe because every chunk is loaded idempotently.
+    """
+
+    def __init__(self, input_path: str, kind: str, chunk_rows: int):
+        self.path = input_path + '.checkpoint.json'
+        stat = os.stat(input_path)
+        self.identity = {'kind': kind, 'size': stat.st_size, 'mtime': stat.st_mtime, 'chunk_rows': chunk_rows}
+        self.chunks = 0
+        self.rows = 0
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            if saved.get('identity') == self.identity:
+                self.chunks = saved['chunks']
+                self.rows = saved['rows']
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+    def advance(self, rows: int):
+        self.chunks += 1
+        self.rows += rows
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'identity': self.identity, 'chunks': self.chunks, 'rows': self.rows}, f)
+        os.replace(tmp_path, self.path)
+
+
+def conform_stories(chunk: pa.Table, schema: pa.Schema, embedder=None) -> pa.Table:
+    """
+    Cast a chunk of stories to the user_stories schema
+
+    Missing description vectors are computed with ``embedder``; a missing
+    Processed_Flag defaults to False.
+    """
+    columns = []
+    for field in schema:
+        if field.name in chunk.column_names:
+            columns.append(chunk.column(field.name).cast(field.type))
+        elif field.name == VECTOR_COLUMN and embedder is not None:
+            vectors = embedder.embed(chunk.column('story_Description').to_pylist())
+            columns.append(pa.array(vectors, type=field.type))
+        elif field.name == 'Processed_Flag':
+            columns.append(pa.array([False] * chunk.num_rows, type=field.type))
+        else:
+            raise ValueError(f"Input is missing column {field.name}")
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def new_stories(dataset, chunk: pa.Table) -> pa.Table:
+    """
+    Rows of ``chunk`` whose story_id is not in the dataset yet
+
+    Only the story_id column is read, restricted to the chunk's id range,
+    which the story_id scalar index answers without a full scan. Ids repeated
+    inside the chunk keep their first occurrence.
+    """
+    if dataset is not None and chunk.num_rows:
+        story_ids = chunk.column('story_id')
+        if pa.types.is_integer(story_ids.type):
+            filter = 'story_id >= %d AND story_id <= %d' % (pc.min(story_ids).as_py(), pc.max(story_ids).as_py())
+        else:
+            filter = 'story_id IN (%s)' % ', '.join("'%s'" % str(v).replace("'", "''") for v in story_ids.to_pylist())
+        existing = dataset.to_table(columns=['story_id'], filter=filter).column('story_id')
+        chunk = chunk.filter(pc.invert(pc.is_in(story_ids, value_set=existing)))
+
+    seen = set()
+    first = []
+    for i, story_id in enumerate(chunk.column('story_id').to_pylist()):
+        if story_id not in seen:
+            seen.add(story_id)
+            first.append(i)
+    return chunk.take(pa.array(first, type=pa.int64()))
+
+
+def existing_stories(dataset, story_ids: pa.Array) -> pa.Table:
+    """Summary columns of the dataset's rows with the given story_ids"""
+    filter = 'story_id IN (%s)' % ', '.join(
+        str(v) if isinstance(v, int) else "'%s'" % str(v).replace("'", "''") for v in story_ids.to_pylist())
+    return dataset.to_table(columns=['story_id', 'story_Description', 'time_stamp'], filter=filter)
+
+
+def load_stories(path: str, chunk_rows: int = 10000, conn=None):
+    """
+    Append stories from a JSONL/Parquet file to LanceDB user_stories
+
+    Each chunk is appended as one Lance commit, never rewriting existing
+    data; stories whose story_id is already present are skipped, so the load
+    can be re-run or resumed after a crash. The story_summary read model is
+    updated in the same pass when ``conn`` is given, for the skipped stories
+    too (from their LanceDB rows): the Lance append and the PostgreSQL commit
+    are not atomic, and a crash between them would otherwise leave those
+    stories out of the summary for good.
+    """
+    lance_db = lancedb.connect(os.getenv('LANCE_DB_PATH', 'data/lance_db'))
+    table = lance_db.open_table('user_stories') if 'user_stories' in lance_db.table_names() else None
+    schema = table.schema if table is not None else STORY_SCHEMA
+    embedder = None
+    checkpoint = Checkpoint(path, 'stories', chunk_rows)
+    if checkpoint.chunks:
+        print(f"Resuming stories after chunk {checkpoint.chunks} ({checkpoint.rows} rows)")
+
+    if conn is not None:
+        with conn.cursor() as cur:
+            cur.execute(CREATE_STORY_SUMMARY_SQL)
+        conn.commit()
+
+    started = time.perf_counter()
+    rows_written = 0
+    rows_skipped = 0
+    for number, chunk in enumerate(iter_chunks(path, chunk_rows)):
+        if number < checkpoint.chunks:
+            continue
+        rows_in = chunk.num_rows
+        if VECTOR_COLUMN not in chunk.column_names and embedder is None:
+            embedder = get_embedder(dimension=schema.field(VECTOR_COLUMN).type.list_size)
+        chunk = conform_stories(chunk, schema, embedder)
+        story_ids = pc.unique(chunk.column('story_id'))
+
+        chunk = new_stories(table.to_lance() if table is not None else None, chunk)
+        skipped = pc.filter(story_ids, pc.invert(pc.is_in(story_ids, value_set=chunk.column('story_id'))))
+        summary = [chunk.select(['story_id', 'story_Description', 'time_stamp'])]
+        if conn is not None and len(skipped):
+            summary.append(existing_stories(table.to_lance(), skipped))
+
+        if table is None:
+            table = lance_db.create_table('user_stories', chunk)
+        elif chunk.num_rows:
+            table.add(chunk)
+
+        if conn is not None and len(story_ids):
+            columns = pa.concat_tables(summary).to_pydict()
+            with conn.cursor() as cur:
+                upsert_stories(cur, zip(columns['story_id'], columns['story_Description'], columns['time_stamp']))
+                refresh_test_case_counts(cur, columns['story_id'])
+            conn.commit()
+
+        rows_written += chunk.num_rows
+        rows_skipped += rows_in - chunk.num_rows
+        checkpoint.advance(chunk.num_rows)
+        _report('stories', number + 1, rows_written, started, rows_skipped)
+
+    if embedder is not None:
+        embedder.close()
+    # Scalar index for story_id lookups and for the id checks of later loads
+    if table is not None and not any('story_id' in index.get('fields', []) for index in table.to_lance().list_indices()):
+        table.to_lance().create_scalar_index('story_id', index_type='BTREE')
+    _summary('stories', rows_written, started, rows_skipped)
+
+
+def load_test_cases(path: str, conn, chunk_rows: int = 10000):
+    """
+    Load generation runs from a JSONL/Parquet file into test_cases_generated
+
+    Each chunk is sent with COPY into a temporary staging table and moved
+    into test_cases_generated in the same transaction. A run is identified
+    by its story_id, start_time, end_time and test_cases content: one that
+    already exists (or repeats within the chunk) is skipped, so the load can
+    be re-run or resumed after a crash. Runs without times are told apart by
+    their content, so only identical runs of a story collapse into one.
+    Skipped rows are counted in the report.
+    """
+    checkpoint = Checkpoint(path, 'test_cases', chunk_rows)
+    if checkpoint.chunks:
+        print(f"Resuming test cases after chunk {checkpoint.chunks} ({checkpoint.rows} rows)")
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMPORARY TABLE IF NOT EXISTS test_cases_staging (
+                story_id INTEGER NOT NULL,
+                test_cases JSONB NOT NULL,
+                start_time TIMESTAMP,
+                end_time TIMESTAMP
+            )
+        """)
+    conn.commit()
+
+    started = time.perf_counter()
+    rows_written = 0
+    rows_skipped = 0
+    for number, chunk in enumerate(iter_chunks(path, chunk_rows)):
+        if number < checkpoint.chunks:
+            continue
+
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE test_cases_staging")
+            cur.copy_expert(
+                "COPY test_cases_staging (story_id, test_cases, start_time, end_time) FROM STDIN WITH (FORMAT csv)",
+                _csv_rows(chunk)
+            )
+            cur.execute("""
+                INSERT INTO test_cases_generated (story_id, test_cases, start_time, end_time)
+                SELECT DISTINCT ON (s.story_id, s.start_time, s.end_time, s.test_cases)
+                       s.story_id, s.test_cases, s.start_time, s.end_time
+                FROM test_cases_staging s
+                WHERE NOT EXISTS (
+                    -- test_cases is only compared for runs of the story with the same times
+                    SELECT 1 FROM test_cases_generated t
+                    WHERE t.story_id = s.story_id
+                      AND t.start_time IS NOT DISTINCT FROM s.start_time
+                      AND t.end_time IS NOT DISTINCT FROM s.end_time
+                      AND t.test_cases = s.test_cases
+                )
+                -- Story order: the is_current trigger locks each story, and
+                -- concurrent loads must take those locks in the same order
+                ORDER BY s.story_id, s.start_time, s.end_time, s.test_cases
+                RETURNING story_id
+            """)
+            # story_summary counts are refreshed by the 0006 trigger
+            inserted = [row[0] for row in cur.fetchall()]
+        conn.commit()
+
+        rows_written += len(inserted)
+        rows_skipped += chunk.num_rows - len(inserted)
+        checkpoint.advance(len(inserted))
+        _report('test case runs', number + 1, rows_written, started, rows_skipped)
+
+    _summary('test case runs', rows_written, started, rows_skipped)
+
+
+def _csv_rows(chunk: pa.Table) -> io.StringIO:
+    """Chunk of runs as CSV for COPY; test_cases may be JSON text or nested values"""
+    missing = [name for name in ('story_id', 'test_cases') if name not in chunk.column_names]
+    if missing:
+        raise ValueError(f"Input is missing column(s) {', '.join(missing)}")
+
+    columns = {name: chunk.column(name).to_pylist() if name in chunk.column_names else [None] * chunk.num_rows
+               for name in TEST_CASE_COLUMNS}
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for story_id, test_cases, start_time, end_time in zip(*(columns[name] for name in TEST_CASE_COLUMNS)):
+        writer.writerow([
+            story_id,
+            test_cases if isinstance(test_cases, str) else json.dumps(test_cases),
+            _timestamp(start_time),
+            _timestamp(end_time)
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+def _timestamp(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def _report(kind: str, chunks: int, rows: int, started: float, skipped: int = 0):
+    elapsed = time.perf_counter() - started
+    print(f"  {kind}: chunk {chunks}, {rows} rows loaded, {skipped} skipped, "
+          f"{rows / elapsed if elapsed else 0:,.0f} rows/s")
+
+
+def _summary(kind: str, rows: int, started: float, skipped: int = 0):
+    elapsed = time.perf_counter() - started
+    print(f"Loaded {rows} {kind} in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s), "
+          f"skipped {skipped} already loaded or duplicate rows")
+
+
+def bulk_load(stories_path: Optional[str] = None, test_cases_path: Optional[str] = None, chunk_rows: int = 10000):
+    """Load stories first so story_summary rows exist when test case counts are refreshed"""
+    conn = psycopg2.connect(
+        dbname=os.getenv('POSTGRES_DB'),
+        user=os.getenv('POSTGRES_USER'),
+        password=os.getenv('POSTGRES_PASSWORD'),
+        host=os.getenv('POSTGRES_HOST'),
+        port=os.getenv('POSTGRES_PORT')
+    )
+    try:
+        if stories_path:
+            load_stories(stories_path, chunk_rows, conn)
+        if test_cases_path:
+            load_test_cases(test_cases_path, conn, chunk_rows)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Bulk load stories and test cases from JSONL or Parquet files')
+    parser.add_argument('--stories', help='stories file: story_id, story_Description, time_stamp '
+                                          '[, story_Description_vector, Processed_Flag]')
+    parser.add_argument('--test-cases', help='runs file: story_id, test_cases [, start_time, end_time]')
+    parser.add_argument('--chunk-rows', type=int, default=10000, help='rows per chunk and per commit')
+    args = parser.parse_args()
+    if not args.stories and not args.test_cases:
+        parser.error('pass --stories and/or --test-cases')
+    bulk_load(args.stories, args.test_cases, args.chunk_rows)
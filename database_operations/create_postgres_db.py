@@ -2,6 +2,8 @@ import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import os
 from dotenv import load_dotenv
+from migrate_postgres import migrate
+from story_summary import CREATE_STORY_SUMMARY_SQL
 
 load_dotenv()
 
@@ -31,19 +33,14 @@ def create_database():
         host=os.getenv('POSTGRES_HOST'),
         port=os.getenv('POSTGRES_PORT')
     )
+    
+    # Create test_cases_generated and bring it to the latest schema version
+    migrate(conn)
+    conn.autocommit = False
     cur = conn.cursor()
     
-    # Create test_cases_generated table
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS test_cases_generated (
-            id SERIAL PRIMARY KEY,
-            story_id INTEGER NOT NULL,
-            test_cases JSONB NOT NULL,
-            start_time TIMESTAMP,
-            end_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            num_test_cases INTEGER GENERATED ALWAYS AS (jsonb_array_length(test_cases)) STORED
-        )
-    """)
+    # Create story_summary read model
+    cur.execute(CREATE_STORY_SUMMARY_SQL)
     
     conn.commit()
     cur.close()
@@ -4,8 +4,8 @@ import json
 import os
 from dotenv import load_dotenv
 from datetime import datetime
-import numpy as np
 from typing import Dict, Any, List, Optional
+from embeddings import get_embedder
 
 load_dotenv()
 
@@ -23,6 +23,9 @@ class DatabaseOperations:
         
         # LanceDB connection
         self.lance_db = lancedb.connect(os.getenv('LANCE_DB_PATH'))
+        
+        # Batched, cached embeddings for the 384-dimensional test_cases table
+        self.embedder = get_embedder(dimension=384)
         self._init_lance_tables()
     
     def _init_lance_tables(self):
@@ -63,12 +66,12 @@ class DatabaseOperations:
         try:
             test_cases_table = self.lance_db.open_table("test_cases")
             
+            # Embed all test cases in batches; unchanged texts come from the cache
+            embeddings = self.embedder.embed([f"{tc['title']} {tc['description']}" for tc in test_cases])
+            
             # Prepare test cases for LanceDB
             lance_test_cases = []
-            for tc in test_cases:
-                # Generate embedding for the test case (you should implement this)
-                embedding = self._get_embedding(f"{tc['title']} {tc['description']}")
-                
+            for tc, embedding in zip(test_cases, embeddings):
                 lance_test_cases.append({
                     "story_id": story_id,
                     "test_case_id": tc['id'],
@@ -169,16 +172,18 @@ class DatabaseOperations:
             # Get query embedding
             query_embedding = self._get_embedding(query)
             
-            # Search in LanceDB
+            # Search in LanceDB; the story filter runs before the search so
+            # up to `limit` matches of this story are returned
             test_cases_table = self.lance_db.open_table("test_cases")
-            results = test_cases_table.search(query_embedding).metric("cosine").limit(limit).to_pandas()
-            
-            # Filter results for the specific story
-            story_results = results[results['story_id'] == story_id]
+            results = (test_cases_table.search(query_embedding)
+                       .metric("cosine")
+                       .where(f"story_id = {int(story_id)}", prefilter=True)
+                       .limit(limit)
+                       .to_pandas())
             
             # Format results
             similar_test_cases = []
-            for _, tc in story_results.iterrows():
+            for _, tc in results.iterrows():
                 similar_test_cases.append({
                     'id': tc['test_case_id'],
                     'title': tc['title'],
@@ -196,14 +201,13 @@ class DatabaseOperations:
             return []
     
     def _get_embedding(self, text: str) -> List[float]:
-        """Get embedding for text (placeholder - implement with your preferred embedding model)"""
-        # This is a placeholder - you should implement this using your preferred embedding model
-        # For example, you could use sentence-transformers, OpenAI embeddings, etc.
-        return np.random.rand(384).tolist()  # Placeholder: random 384-dimensional vector
+        """Get embedding for a single text, e.g. a search query"""
+        return self.embedder.embed([text])[0]
     
     def close(self):
         """Close database connections"""
         self.pg_conn.close()
+        self.embedder.close()
 
 if __name__ == "__main__":
     # Example usage
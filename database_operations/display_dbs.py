@@ -1,95 +1,295 @@
+import argparse
 import psycopg2
 import lancedb
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from tabulate import tabulate
 import os
+from datetime import datetime
 from dotenv import load_dotenv
-import json
 
 load_dotenv()
 
-def display_databases():
-    print("\n=== Displaying Database Contents ===\n")
-    
-    # Display LanceDB contents
+# Never read: the description vector (Lance) and the test_cases document (PostgreSQL)
+STORY_COLUMNS = ['story_id', 'story_Description', 'Processed_Flag', 'time_stamp']
+STORY_HEADERS = ['ID', 'Description', 'Processed', 'Timestamp']
+RUN_HEADERS = ['Run ID', 'Story ID', 'Number of Test Cases', 'Start Time', 'End Time']
+
+DESCRIPTION_WIDTH = 80
+
+
+def connect_postgres():
+    return psycopg2.connect(
+        dbname=os.getenv('POSTGRES_DB'),
+        user=os.getenv('POSTGRES_USER'),
+        password=os.getenv('POSTGRES_PASSWORD'),
+        host=os.getenv('POSTGRES_HOST'),
+        port=os.getenv('POSTGRES_PORT')
+    )
+
+
+def open_stories():
+    lance_db = lancedb.connect(os.getenv('LANCE_DB_PATH', 'data/lance_db'))
+    if 'user_stories' not in lance_db.table_names():
+        return None
+    return lance_db.open_table('user_stories').to_lance()
+
+
+def lance_filter(args, dataset) -> str:
+    """
+    Lance filter expression for the story id / date / processed options
+
+    A string story_id column is cast to BIGINT for the id range, so it is
+    compared numerically ('9' < '10') rather than as text.
+    """
+    story_id_type = dataset.schema.field('story_id').type
+    if pa.types.is_string(story_id_type) or pa.types.is_large_string(story_id_type):
+        story_id = 'CAST(story_id AS BIGINT)'
+    else:
+        story_id = 'story_id'
+    conditions = []
+    if args.from_id is not None:
+        conditions.append('%s >= %d' % (story_id, args.from_id))
+    if args.to_id is not None:
+        conditions.append('%s <= %d' % (story_id, args.to_id))
+    if args.since:
+        conditions.append("time_stamp >= timestamp '%s'" % args.since.strftime('%Y-%m-%d %H:%M:%S'))
+    if args.until:
+        conditions.append("time_stamp < timestamp '%s'" % args.until.strftime('%Y-%m-%d %H:%M:%S'))
+    if args.processed is not None:
+        conditions.append('`Processed_Flag` = %s' % ('true' if args.processed else 'false'))
+    return ' AND '.join(conditions) or None
+
+
+def postgres_filter(args):
+    """WHERE clause and parameters for the story id / date options"""
+    conditions, params = [], []
+    if args.from_id is not None:
+        conditions.append('story_id >= %s')
+        params.append(args.from_id)
+    if args.to_id is not None:
+        conditions.append('story_id <= %s')
+        params.append(args.to_id)
+    if args.since:
+        conditions.append('start_time >= %s')
+        params.append(args.since)
+    if args.until:
+        conditions.append('start_time < %s')
+        params.append(args.until)
+    return ('WHERE ' + ' AND '.join(conditions)) if conditions else '', params
+
+
+def show_stories(args):
+    """One page of LanceDB stories, or every page with --all, read batch by batch"""
     print("=== LanceDB User Stories ===")
-    try:
-        lance_db_path = os.getenv('LANCE_DB_PATH', 'data/lance_db')
-        lance_db = lancedb.connect(lance_db_path)
-        
-        if 'user_stories' in lance_db.table_names():
-            stories_table = lance_db.open_table("user_stories")
-            stories_df = stories_table.to_pandas()
-            
-            # Format the display
-            display_df = stories_df[['story_id', 'story_Description', 'Processed_Flag', 'time_stamp']]
-            display_df.columns = ['ID', 'Description', 'Processed', 'Timestamp']
-            
-            print(tabulate(display_df, headers='keys', tablefmt='grid', showindex=False))
-            print(f"\nTotal stories in LanceDB: {len(stories_df)}")
-        else:
-            print("No user_stories table found in LanceDB")
-    except Exception as e:
-        print(f"Error accessing LanceDB: {str(e)}")
-    
-    print("\n" + "="*50 + "\n")
-    
-    # Display PostgreSQL contents
+    dataset = open_stories()
+    if dataset is None:
+        print("No user_stories table found in LanceDB")
+        return
+
+    scanner = dataset.scanner(
+        columns=STORY_COLUMNS,
+        filter=lance_filter(args, dataset),
+        batch_size=args.page_size,
+        offset=None if args.all else (args.page - 1) * args.page_size,
+        limit=None if args.all else args.page_size
+    )
+    shown = 0
+    for batch in scanner.to_batches():
+        if batch.num_rows == 0:
+            continue
+        columns = batch.to_pydict()
+        rows = zip(columns['story_id'], [_shorten(d) for d in columns['story_Description']],
+                   columns['Processed_Flag'], columns['time_stamp'])
+        print(tabulate(list(rows), headers=STORY_HEADERS, tablefmt='grid'))
+        shown += batch.num_rows
+
+    if not shown:
+        print("No stories match the filters")
+    elif not args.all:
+        print(f"\nPage {args.page}: {shown} stories (next: --page {args.page + 1})")
+
+
+def show_runs(args, conn):
+    """One page of test case runs, or every page with --all, through a server-side cursor"""
     print("=== PostgreSQL Test Cases ===")
-    try:
-        conn = psycopg2.connect(
-            dbname=os.getenv('POSTGRES_DB'),
-            user=os.getenv('POSTGRES_USER'),
-            password=os.getenv('POSTGRES_PASSWORD'),
-            host=os.getenv('POSTGRES_HOST'),
-            port=os.getenv('POSTGRES_PORT')
-        )
-        cur = conn.cursor()
-        
-        # Get test cases summary
+    where, params = postgres_filter(args)
+    query = f"""
+        SELECT id, story_id, num_test_cases, start_time, end_time
+        FROM test_cases_generated
+        {where}
+        ORDER BY story_id, id
+    """
+    if not args.all:
+        query += " LIMIT %s OFFSET %s"
+        params += [args.page_size, (args.page - 1) * args.page_size]
+
+    shown = 0
+    with conn.cursor(name='inspect_runs') as cur:
+        cur.itersize = args.page_size
+        cur.execute(query, params)
+        while True:
+            rows = cur.fetchmany(args.page_size)
+            if not rows:
+                break
+            print(tabulate(rows, headers=RUN_HEADERS, tablefmt='grid'))
+            shown += len(rows)
+
+    if not shown:
+        print("No test cases match the filters")
+    elif not args.all:
+        print(f"\nPage {args.page}: {shown} runs (next: --page {args.page + 1})")
+
+
+def show_details(args, conn):
+    """Test cases of one story's latest run, one page at a time"""
+    print(f"=== Test Cases for Story ID {args.details} ===")
+    with conn.cursor(name='inspect_details') as cur:
+        cur.itersize = args.page_size
         cur.execute("""
-            SELECT 
-                story_id,
-                num_test_cases,
-                start_time,
-                end_time
+            SELECT e.ordinality, e.tc ->> 'test_case_id', e.tc ->> 'description',
+                   e.tc -> 'steps', e.tc ->> 'expected_result'
+            FROM (
+                SELECT test_cases FROM test_cases_generated
+                WHERE story_id = %s AND is_current
+            ) t
+            CROSS JOIN LATERAL jsonb_array_elements(t.test_cases) WITH ORDINALITY AS e(tc, ordinality)
+            ORDER BY e.ordinality
+            LIMIT %s OFFSET %s
+        """, (args.details, args.page_size, (args.page - 1) * args.page_size))
+        shown = 0
+        for _, test_case_id, description, steps, expected_result in cur:
+            print(f"\nTest Case ID: {test_case_id}")
+            print(f"Description: {description}")
+            print("Steps:")
+            for step in steps or []:
+                print(f"  - {step}")
+            print(f"Expected Result: {expected_result}")
+            shown += 1
+
+    if not shown:
+        print("No test cases found")
+    else:
+        print(f"\nPage {args.page}: {shown} test cases (next: --page {args.page + 1})")
+
+
+def show_story_summary(args):
+    """Story aggregates computed in Arrow, one pass over two narrow columns"""
+    print("=== LanceDB User Stories Summary ===")
+    dataset = open_stories()
+    if dataset is None:
+        print("No user_stories table found in LanceDB")
+        return
+
+    total = processed = 0
+    first = last = None
+    filter = lance_filter(args, dataset)
+    for batch in dataset.to_batches(columns=['Processed_Flag', 'time_stamp'], filter=filter, batch_size=65536):
+        if batch.num_rows == 0:
+            continue
+        total += batch.num_rows
+        processed += pc.sum(batch.column('Processed_Flag')).as_py() or 0
+        bounds = pc.min_max(batch.column('time_stamp')).as_py()
+        first = bounds['min'] if first is None else min(first, bounds['min'])
+        last = bounds['max'] if last is None else max(last, bounds['max'])
+    print(tabulate([
+        ['Stories', total],
+        ['Processed', processed],
+        ['Unprocessed', total - processed],
+        ['Oldest', first],
+        ['Newest', last],
+        ['Version', dataset.version],
+        ['Fragments', len(dataset.get_fragments())]
+    ], tablefmt='grid'))
+
+
+def show_run_summary(args, conn):
+    """Test case aggregates computed in SQL from the stored num_test_cases column"""
+    print("=== PostgreSQL Test Cases Summary ===")
+    where, params = postgres_filter(args)
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT count(*), count(DISTINCT story_id), sum(num_test_cases),
+                   round(avg(num_test_cases), 1), max(num_test_cases),
+                   min(start_time), max(end_time),
+                   pg_size_pretty(pg_total_relation_size('test_cases_generated'))
             FROM test_cases_generated
-            ORDER BY story_id
-        """)
-        
-        test_cases = cur.fetchall()
-        
-        if test_cases:
-            # Format the display
-            headers = ['Story ID', 'Number of Test Cases', 'Start Time', 'End Time']
-            print(tabulate(test_cases, headers=headers, tablefmt='grid'))
-            
-            # Display detailed test cases for each story
-            for story_id, num_cases, _, _ in test_cases:
-                print(f"\nDetailed Test Cases for Story ID {story_id}:")
-                cur.execute("""
-                    SELECT test_cases
-                    FROM test_cases_generated
-                    WHERE story_id = %s
-                """, (story_id,))
-                
-                test_cases_data = cur.fetchone()[0]
-                for tc in test_cases_data:
-                    print(f"\nTest Case ID: {tc['test_case_id']}")
-                    print(f"Description: {tc['description']}")
-                    print("Steps:")
-                    for step in tc['steps']:
-                        print(f"  - {step}")
-                    print(f"Expected Result: {tc['expected_result']}")
-            
-            print(f"\nTotal stories with test cases: {len(test_cases)}")
-        else:
-            print("No test cases found in PostgreSQL")
-            
-        cur.close()
-        conn.close()
-    except Exception as e:
-        print(f"Error accessing PostgreSQL: {str(e)}")
+            {where}
+        """, params)
+        runs, stories, test_cases, average, largest, first, last, size = cur.fetchone()
+    print(tabulate([
+        ['Runs', runs],
+        ['Stories with test cases', stories],
+        ['Test cases', test_cases or 0],
+        ['Average per run', average],
+        ['Largest run', largest],
+        ['First start', first],
+        ['Last end', last],
+        ['Table size (all rows)', size]
+    ], tablefmt='grid'))
+
+
+def _shorten(text, width=DESCRIPTION_WIDTH):
+    if text is None or len(text) <= width:
+        return text
+    return text[:width - 3] + '...'
+
+
+def _date(value):
+    return datetime.fromisoformat(value)
+
+
+def _bool(value):
+    if value.lower() not in ('true', 'false'):
+        raise argparse.ArgumentTypeError('expected true or false')
+    return value.lower() == 'true'
+
+
+def display_databases(args):
+    print("\n=== Displaying Database Contents ===\n")
+
+    if args.source in ('lance', 'both') and args.details is None:
+        try:
+            if args.summary:
+                show_story_summary(args)
+            else:
+                show_stories(args)
+        except Exception as e:
+            print(f"Error accessing LanceDB: {str(e)}")
+        print("\n" + "="*50 + "\n")
+
+    if args.source in ('postgres', 'both') or args.details is not None:
+        try:
+            conn = connect_postgres()
+            # Inspection never writes; let the server enforce it
+            conn.set_session(readonly=True)
+            try:
+                if args.summary:
+                    show_run_summary(args, conn)
+                elif args.details is not None:
+                    show_details(args, conn)
+                else:
+                    show_runs(args, conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Error accessing PostgreSQL: {str(e)}")
+
 
 if __name__ == "__main__":
-    display_databases() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Inspect LanceDB stories and PostgreSQL test cases')
+    parser.add_argument('--source', choices=['lance', 'postgres', 'both'], default='both')
+    parser.add_argument('--page', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--all', action='store_true', help='stream every page instead of one')
+    parser.add_argument('--from-id', type=int, help='lowest story id')
+    parser.add_argument('--to-id', type=int, help='highest story id')
+    parser.add_argument('--since', type=_date, help='stories/runs at or after this date (ISO format)')
+    parser.add_argument('--until', type=_date, help='stories/runs before this date (ISO format)')
+    parser.add_argument('--processed', type=_bool, help='only stories with this Processed_Flag (LanceDB)')
+    parser.add_argument('--details', type=int, metavar='STORY_ID', help="page through one story's test cases")
+    parser.add_argument('--summary', action='store_true', help='aggregate statistics instead of rows')
+    args = parser.parse_args()
+    if args.page < 1 or args.page_size < 1:
+        parser.error('--page and --page-size must be positive')
+    display_databases(args)
@@ -0,0 +1,239 @@
+import hashlib
+from abc import ABC, abstractmethod
+import importlib
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from typing import Dict, List, Optional
+import numpy as np
+
+load_dotenv()
+
+
+class EmbeddingProvider(ABC):
+    """
+    Interface for embedding models
+
+    Subclasses must implement ``embed_batch``, which embeds a whole batch per
+    call so that remote and GPU models are cheap per item. ``name`` identifies
+    the model and its settings in the cache, so changing either never serves
+    stale vectors. get_embedder constructs providers as ``cls(dimension)``.
+    """
+
+    name = 'base'
+    dimension = 0
+
+    @abstractmethod
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Args:
+            texts: Texts to embed
+        Returns:
+            One vector of ``dimension`` floats per text, in the same order
+        """
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic local stand-in model for tests and benchmarks
+
+    Words are hashed into signed buckets (feature hashing) and the result is
+    L2-normalized, so equal texts get equal vectors and texts sharing words
+    have a positive cosine similarity. No network or model files are needed.
+    """
+
+    def __init__(self, dimension: int = 768):
+        self.dimension = dimension
+        self.name = f'hash-{dimension}'
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r'\w+', text.lower()):
+                digest = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+                vectors[row, digest % self.dimension] += 1.0 if digest >> 63 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).tolist()
+
+
+# Providers selectable by name with EMBEDDING_PROVIDER
+PROVIDERS = {
+    'hash': HashEmbeddingProvider
+}
+
+
+def load_provider(spec: str, dimension: int = 768) -> EmbeddingProvider:
+    """
+    Build an embedding provider from a name or an import path
+
+    Args:
+        spec: A name from PROVIDERS, or ``package.module:Class`` /
+            ``package.module.Class`` of an EmbeddingProvider subclass
+        dimension: Vector size the provider must produce
+    Returns:
+        The provider, constructed with ``dimension``
+    Raises:
+        ValueError: If the name is unknown, the path cannot be imported, or
+            the class is not an EmbeddingProvider of that dimension
+    """
+    spec = spec.strip()
+    if spec in PROVIDERS:
+        provider_class = PROVIDERS[spec]
+    elif ':' in spec or '.' in spec:
+        module_name, _, class_name = spec.rpartition(':') if ':' in spec else spec.rpartition('.')
+        try:
+            provider_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError, ValueError) as e:
+            raise ValueError(f"Cannot load EMBEDDING_PROVIDER {spec!r}: {str(e)}") from e
+    else:
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER {spec!r}; use one of {', '.join(sorted(PROVIDERS))} "
+                         "or an import path like package.module:Class")
+
+    if not (isinstance(provider_class, type) and issubclass(provider_class, EmbeddingProvider)):
+        raise ValueError(f"EMBEDDING_PROVIDER {spec!r} is not an EmbeddingProvider subclass")
+    provider = provider_class(dimension)
+    if provider.dimension != dimension:
+        raise ValueError(f"EMBEDDING_PROVIDER {spec!r} produces {provider.dimension}-dimensional vectors, "
+                         f"expected {dimension}")
+    return provider
+
+
+class EmbeddingCache:
+    """
+    Persistent content-hash -> vector cache in a SQLite file
+
+    Keys are sha256 digests of the provider name and the text, so unchanged
+    text is never embedded twice, across runs and processes.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def key(provider_name: str, text: str) -> str:
+        return hashlib.sha256(f'{provider_name}\0{text}'.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Cached vectors for the keys that are present"""
+        found = {}
+        with self._lock:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT key, vector FROM embeddings WHERE key IN (%s)" % ','.join('?' * len(chunk)), chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()]
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class BatchEmbedder:
+    """
+    Embeds text lists through a provider in batches, skipping cached texts
+
+    Duplicate texts are embedded once; batches of uncached texts run on up to
+    ``max_workers`` threads, which suits providers that wait on I/O.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, cache: Optional[EmbeddingCache] = None,
+                 batch_size: int = 64, max_workers: int = 1):
+        """
+        Args:
+            provider: Embedding model
+            cache: Persistent vector cache (None disables caching)
+            batch_size: Texts per provider call
+            max_workers: Provider calls in flight at once
+        """
+        self.provider = provider
+        self.cache = cache
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.embedded = 0
+        self.cache_hits = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Args:
+            texts: Texts to embed
+        Returns:
+            One vector per text, in the same order
+        """
+        keys = {text: EmbeddingCache.key(self.provider.name, text) for text in texts}
+        vectors = {}
+        if self.cache:
+            cached = self.cache.get_many(list(set(keys.values())))
+            vectors = {text: cached[key] for text, key in keys.items() if key in cached}
+            self.cache_hits += len(vectors)
+
+        missing = [text for text in keys if text not in vectors]
+        batches = [missing[start:start + self.batch_size] for start in range(0, len(missing), self.batch_size)]
+        if len(batches) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(self.provider.embed_batch, batches))
+        else:
+            results = [self.provider.embed_batch(batch) for batch in batches]
+
+        new_vectors = {}
+        for batch, batch_vectors in zip(batches, results):
+            for text, vector in zip(batch, batch_vectors):
+                vectors[text] = vector
+                new_vectors[keys[text]] = vector
+        self.embedded += len(new_vectors)
+        if self.cache and new_vectors:
+            self.cache.put_many(new_vectors)
+
+        return [vectors[text] for text in texts]
+
+    def close(self):
+        if self.cache:
+            self.cache.close()
+
+
+def get_embedder(dimension: int = 768) -> BatchEmbedder:
+    """
+    Embedder configured from the environment
+
+    EMBEDDING_PROVIDER (default hash, see load_provider), EMBEDDING_BATCH_SIZE
+    (default 64), EMBEDDING_WORKERS (default 1) and EMBEDDING_CACHE_PATH
+    (default data/embedding_cache.sqlite, empty disables the cache).
+
+    Raises:
+        ValueError: If EMBEDDING_PROVIDER cannot be loaded
+    """
+    provider = load_provider(os.getenv('EMBEDDING_PROVIDER', 'hash'), dimension)
+    cache_path = os.getenv('EMBEDDING_CACHE_PATH', 'data/embedding_cache.sqlite')
+    return BatchEmbedder(
+        provider,
+        cache=EmbeddingCache(cache_path) if cache_path else None,
+        batch_size=int(os.getenv('EMBEDDING_BATCH_SIZE', '64')),
+        max_workers=int(os.getenv('EMBEDDING_WORKERS', '1'))
+    )
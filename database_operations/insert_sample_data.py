@@ -3,9 +3,12 @@ import psycopg2.extras
 import lancedb
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
+from create_lance_db import STORY_SCHEMA
+from story_summary import upsert_stories, refresh_test_case_counts
 
 load_dotenv()
 
@@ -91,12 +94,15 @@ def insert_sample_data():
     # Create LanceDB table with sample data
     df = pd.DataFrame(stories)
     # Add vector embeddings (dummy data for now)
-    df['story_Description_vector'] = [np.random.rand(768).tolist() for _ in range(len(stories))]
+    df['story_Description_vector'] = [np.random.rand(768).astype(np.float32) for _ in range(len(stories))]
     
-    # Create or overwrite the table
+    # Create or overwrite the table; the schema makes the vector a fixed
+    # size float32 list, which Lance needs for vector search
     if 'user_stories' in lance_db.table_names():
         lance_db.drop_table('user_stories')
-    lance_db.create_table('user_stories', df)
+    table = lance_db.create_table('user_stories', pa.Table.from_pandas(df, schema=STORY_SCHEMA, preserve_index=False))
+    # Scalar index for story_id point lookups
+    table.to_lance().create_scalar_index('story_id', index_type='BTREE')
     print("Sample data inserted into LanceDB successfully!")
 
     # Sample test cases for story_id 1 (10 test cases)
@@ -182,6 +188,12 @@ def insert_sample_data():
             test_case['end_time']
         ))
 
+    # user_stories was recreated above, so rebuild the story_summary read
+    # model from scratch instead of leaving rows of dropped stories behind
+    cur.execute("TRUNCATE story_summary")
+    upsert_stories(cur, [(s['story_id'], s['story_Description'], s['time_stamp']) for s in stories])
+    refresh_test_case_counts(cur, [s['story_id'] for s in stories])
+
     conn.commit()
     cur.close()
     conn.close()
@@ -0,0 +1,51 @@
+import argparse
+import json
+import os
+import sys
+from datetime import timedelta
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lance_maintenance import LanceMaintenance, TARGET_ROWS_PER_FRAGMENT, format_report
+
+load_dotenv()
+
+
+def maintain_lance(args):
+    """Compact user_stories, refresh its indexes and prune old versions, then report the effect"""
+    maintenance = LanceMaintenance(
+        os.getenv('LANCE_DB_PATH', 'data/lance_db'),
+        retention=timedelta(hours=args.retention_hours),
+        target_rows_per_fragment=args.target_rows_per_fragment,
+        vector_retrain_fraction=args.vector_retrain_fraction
+    )
+    report = maintenance.run(
+        compact=not args.no_compact,
+        cleanup=not args.no_cleanup,
+        indexes=not args.no_indexes,
+        rebuild_indexes=args.rebuild_indexes
+    )
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='LanceDB user_stories maintenance')
+    parser.add_argument('--retention-hours', type=float,
+                        default=float(os.getenv('LANCE_VERSION_RETENTION_HOURS', '168')),
+                        help='delete versions older than this (default 168)')
+    parser.add_argument('--target-rows-per-fragment', type=int,
+                        default=int(os.getenv('LANCE_TARGET_ROWS_PER_FRAGMENT', str(TARGET_ROWS_PER_FRAGMENT))),
+                        help=f'fragment size compaction aims for (default {TARGET_ROWS_PER_FRAGMENT})')
+    parser.add_argument('--vector-retrain-fraction', type=float,
+                        default=float(os.getenv('LANCE_VECTOR_RETRAIN_FRACTION', '0.2')),
+                        help='retrain the vector index once this share of rows is unindexed (default 0.2)')
+    parser.add_argument('--no-compact', action='store_true', help='skip compaction')
+    parser.add_argument('--no-cleanup', action='store_true', help='keep old versions')
+    parser.add_argument('--no-indexes', action='store_true', help='leave the indexes alone')
+    parser.add_argument('--rebuild-indexes', action='store_true', help='rebuild both indexes from scratch')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+    report = maintain_lance(args)
+    sys.exit(1 if report['errors'] else 0)
@@ -0,0 +1,169 @@
+import argparse
+import os
+import sys
+import time
+import lance
+import lancedb
+import pyarrow as pa
+import pyarrow.compute as pc
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lance_maintenance import LanceMaintenance
+from app.services.lance_store import STORY_SCHEMA, schema_problems
+
+load_dotenv()
+
+BATCH_ROWS = 65536
+
+
+def target_schema(schema: pa.Schema) -> pa.Schema:
+    """``schema`` with the STORY_SCHEMA types for the columns it shares with it"""
+    fields = []
+    for field in schema:
+        if field.name in STORY_SCHEMA.names:
+            field = field.with_type(STORY_SCHEMA.field(field.name).type)
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def story_ids(column: pa.Array) -> pa.Array:
+    """
+    story_id column as int64
+
+    Raises:
+        ValueError: If a story_id is not an integer; the message lists some
+    """
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        column = pc.utf8_trim_whitespace(column)
+        numeric = pc.match_substring_regex(column, r'^[+-]?[0-9]+$')
+        invalid = pc.filter(column, pc.invert(pc.fill_null(numeric, True)))
+        if len(invalid):
+            raise ValueError(f"{len(invalid)} story_id values are not integers, e.g. "
+                             f"{invalid.slice(0, 5).to_pylist()}")
+    return pc.cast(column, pa.int64())
+
+
+def conform(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    """Cast one batch to ``schema``"""
+    columns = []
+    for field in schema:
+        column = batch.column(field.name)
+        if field.name == 'story_id':
+            column = story_ids(column)
+        columns.append(pc.cast(column, field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def migrated_batches(dataset, fragments, schema: pa.Schema, totals: dict):
+    """Conformed batches of ``fragments``, counting rows and summing story_ids into ``totals``"""
+    scanner = dataset.scanner(fragments=fragments, batch_size=BATCH_ROWS)
+    for batch in scanner.to_batches():
+        if batch.num_rows == 0:
+            continue
+        batch = conform(batch, schema)
+        totals['rows'] += batch.num_rows
+        totals['id_sum'] += pc.sum(batch.column('story_id')).as_py() or 0
+        yield batch
+
+
+def id_totals(dataset) -> dict:
+    """Row count and sum of story_ids of a dataset version"""
+    totals = {'rows': 0, 'id_sum': 0}
+    for batch in dataset.to_batches(columns=['story_id'], batch_size=BATCH_ROWS):
+        totals['rows'] += batch.num_rows
+        totals['id_sum'] += pc.sum(story_ids(batch.column('story_id'))).as_py() or 0
+    return totals
+
+
+def migrate_lance_schema(dry_run: bool = False):
+    """
+    Rewrite user_stories with the canonical schema (int64 story_id)
+
+    The rewrite is committed as a new version of the same dataset, so the API
+    keeps serving the old version until it refreshes and old versions remain
+    available to restore. Stories appended while the data is rewritten are
+    carried over afterwards; deletes and updates made during the run are not,
+    so pause those (and maintain_lance.py) while migrating. The version this
+    run produced is checked against the version it replaced (row count and
+    sum of story_ids). On a mismatch the replaced version is restored only if
+    nothing was committed since; otherwise the run stops and reports it, as a
+    restore would discard other writers' stories. Indexes are rebuilt last.
+    """
+    lance_db_path = os.getenv('LANCE_DB_PATH', 'data/lance_db')
+    lance_db = lancedb.connect(lance_db_path)
+    if 'user_stories' not in lance_db.table_names():
+        print("No user_stories table found in LanceDB")
+        return False
+
+    dataset = lance_db.open_table('user_stories').to_lance()
+    maintenance = LanceMaintenance(lance_db_path)
+    fatal, adaptable = schema_problems(dataset.schema)
+    schema = target_schema(dataset.schema)
+    if schema == dataset.schema:
+        for problem in fatal + adaptable:
+            print(f"Cannot be fixed by migration: {problem}")
+        print("user_stories already has the canonical column types")
+        actions = maintenance.refresh_indexes(dataset)
+        print(f"Indexes: {actions}")
+        return not fatal
+    for problem in fatal + adaptable:
+        print(f"Found: {problem}")
+
+    snapshot_fragments = {fragment.fragment_id for fragment in dataset.get_fragments()}
+    started = time.perf_counter()
+
+    if dry_run:
+        totals = {'rows': 0, 'id_sum': 0}
+        for _ in migrated_batches(dataset, dataset.get_fragments(), schema, totals):
+            pass
+        print(f"Dry run: {totals['rows']} stories of version {dataset.version} convert cleanly "
+              f"in {time.perf_counter() - started:.1f}s")
+        return True
+
+    totals = {'rows': 0, 'id_sum': 0}
+    reader = pa.RecordBatchReader.from_batches(
+        schema, migrated_batches(dataset, dataset.get_fragments(), schema, totals))
+    migrated = lance.write_dataset(reader, dataset.uri, schema=schema, mode='overwrite')
+    print(f"Rewrote {totals['rows']} stories of version {dataset.version} as version {migrated.version} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    # Stories appended by writers while the snapshot was being rewritten
+    replaced = migrated.checkout_version(migrated.version - 1)
+    appended = [fragment for fragment in replaced.get_fragments() if fragment.fragment_id not in snapshot_fragments]
+    if appended:
+        before = totals['rows']
+        reader = pa.RecordBatchReader.from_batches(schema, migrated_batches(replaced, appended, schema, totals))
+        migrated = lance.write_dataset(reader, dataset.uri, schema=schema, mode='append')
+        print(f"Carried over {totals['rows'] - before} stories appended during the migration")
+
+    # Compare exactly the version this run produced; stories appended since
+    # by other writers are theirs and must not count against it
+    migrated = lance.dataset(dataset.uri, version=migrated.version)
+    expected, actual = id_totals(replaced), id_totals(migrated)
+    if expected != actual:
+        print(f"Verification failed: version {replaced.version} has {expected}, "
+              f"migrated version {migrated.version} has {actual}")
+        if migrated.latest_version == migrated.version:
+            print(f"Restoring version {replaced.version}")
+            replaced.restore()
+        else:
+            print(f"Not restoring: versions after {migrated.version} were committed by other writers. "
+                  f"Pause writers and restore version {replaced.version} by hand if needed")
+        return False
+    print(f"Verified {actual['rows']} stories of version {migrated.version} "
+          f"(row count and story_id sum match version {replaced.version})")
+
+    actions = maintenance.refresh_indexes(lance.dataset(dataset.uri))
+    print(f"Indexes: {actions}")
+    print(f"Migration finished in {time.perf_counter() - started:.1f}s; "
+          f"old versions are removed by maintain_lance.py after the retention window")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Migrate LanceDB user_stories to the canonical schema')
+    parser.add_argument('--dry-run', action='store_true', help='only check that every story converts')
+    args = parser.parse_args()
+    sys.exit(0 if migrate_lance_schema(args.dry_run) else 1)
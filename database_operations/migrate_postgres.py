@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import os
+import re
+import time
+import psycopg2
+from dotenv import load_dotenv
+from typing import Dict, List, Optional
+
+load_dotenv()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Files starting with this line run statement by statement outside a
+# transaction, as CREATE INDEX CONCURRENTLY requires
+NO_TRANSACTION = '-- migrate: no-transaction'
+
+# Session advisory lock held while migrating, so concurrent runners apply
+# each migration once
+MIGRATION_LOCK_KEY = 0x7463_6d67
+
+CREATE_SCHEMA_MIGRATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        checksum TEXT NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        duration_ms INTEGER NOT NULL
+    )
+"""
+
+
+class Migration:
+    """One versioned SQL file from MIGRATIONS_DIR, e.g. 0002_test_cases_story_id_index.sql"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version, self.name = os.path.splitext(os.path.basename(path))[0].split('_', 1)
+        with open(path) as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode('utf-8')).hexdigest()
+        self.transactional = not self.sql.startswith(NO_TRANSACTION)
+
+    def statements(self) -> List[str]:
+        """Statements of the file, split on semicolons outside $$ bodies"""
+        statements, current, quoted = [], [], False
+        for line in self.sql.splitlines():
+            if line.strip().startswith('--') and not quoted:
+                continue
+            current.append(line)
+            quoted ^= line.count('$$') % 2 == 1
+            if not quoted and line.rstrip().endswith(';'):
+                statements.append('\n'.join(current).strip())
+                current = []
+        if '\n'.join(current).strip():
+            statements.append('\n'.join(current).strip())
+        return statements
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Migrations in version order"""
+    migrations = [Migration(os.path.join(directory, name)) for name in sorted(os.listdir(directory))
+                  if re.match(r'^\d+_\w+\.sql$', name)]
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def applied_migrations(cur) -> Dict[str, str]:
+    """version -> checksum of the migrations recorded in schema_migrations"""
+    cur.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cur.fetchall())
+
+
+def drop_invalid_indexes(cur, migration: Migration):
+    """
+    Drop INVALID indexes left by an interrupted CREATE INDEX CONCURRENTLY
+
+    ``IF NOT EXISTS`` would otherwise skip them and leave an index that is
+    maintained on every write but never used.
+    """
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid
+    """)
+    for (name,) in cur.fetchall():
+        if re.search(r'\b%s\b' % re.escape(name), migration.sql):
+            print(f"Dropping invalid index {name} left by an earlier attempt")
+            cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+def apply_migration(conn, migration: Migration, lock_timeout: str):
+    """
+    Apply one migration and record it in schema_migrations
+
+    Transactional migrations run as a single transaction with
+    ``lock_timeout``, so DDL waiting behind a long query fails instead of
+    queueing every other query behind it; rerun to retry. Others run one
+    statement at a time in autocommit mode and must be idempotent.
+    """
+    started = time.perf_counter()
+    if migration.transactional:
+        conn.autocommit = False
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+                cur.execute(migration.sql)
+                _record(cur, migration, started)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    else:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            drop_invalid_indexes(cur, migration)
+            for statement in migration.statements():
+                cur.execute(statement)
+            _record(cur, migration, started)
+
+
+def _record(cur, migration: Migration, started: float):
+    cur.execute("""
+        INSERT INTO schema_migrations (version, name, checksum, duration_ms)
+        VALUES (%s, %s, %s, %s)
+    """, (migration.version, migration.name, migration.checksum, int((time.perf_counter() - started) * 1000)))
+
+
+def acquire_migration_lock(conn, poll_interval: float = 1.0):
+    """
+    Take the session advisory lock of migration runs
+
+    A waiting runner polls instead of blocking in pg_advisory_lock: a
+    blocked statement holds a snapshot, and CREATE INDEX CONCURRENTLY in the
+    run holding the lock waits for every such snapshot, which deadlocks.
+    """
+    waiting = False
+    while True:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+            if cur.fetchone()[0]:
+                return
+        if not waiting:
+            print("Waiting for another migration run to finish...")
+            waiting = True
+        time.sleep(poll_interval)
+
+
+def migrate(conn, target: Optional[str] = None, lock_timeout: str = '5s', dry_run: bool = False) -> List[str]:
+    """
+    Apply pending migrations in version order
+
+    Args:
+        conn: PostgreSQL connection, not inside a transaction
+        target: Last version to apply (default: all)
+        lock_timeout: lock_timeout of transactional migrations
+        dry_run: Only list the pending migrations
+
+    Returns:
+        Versions applied (or pending, with dry_run)
+    Raises:
+        ValueError: If an applied migration file was changed afterwards
+    """
+    migrations = [m for m in load_migrations() if target is None or m.version <= target]
+    conn.autocommit = True
+    acquire_migration_lock(conn)
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(CREATE_SCHEMA_MIGRATIONS_SQL)
+            applied = applied_migrations(cur)
+        for migration in migrations:
+            if migration.version in applied and applied[migration.version] != migration.checksum:
+                raise ValueError(f"Migration {migration.version}_{migration.name} was changed after it was "
+                                 f"applied; add a new migration instead")
+
+        pending = [m for m in migrations if m.version not in applied]
+        for migration in pending:
+            if dry_run:
+                print(f"Pending {migration.version}_{migration.name}")
+                continue
+            print(f"Applying {migration.version}_{migration.name}...")
+            started = time.perf_counter()
+            apply_migration(conn, migration, lock_timeout)
+            print(f"Applied {migration.version}_{migration.name} in {time.perf_counter() - started:.1f}s")
+        if not pending:
+            print("Schema is up to date")
+        return [migration.version for migration in pending]
+    finally:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+
+
+def show_status(conn):
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(CREATE_SCHEMA_MIGRATIONS_SQL)
+        cur.execute("SELECT version, applied_at, duration_ms FROM schema_migrations")
+        applied = {version: (applied_at, duration_ms) for version, applied_at, duration_ms in cur.fetchall()}
+    for migration in load_migrations():
+        if migration.version in applied:
+            applied_at, duration_ms = applied[migration.version]
+            print(f"{migration.version}_{migration.name}: applied {applied_at:%Y-%m-%d %H:%M:%S} ({duration_ms} ms)")
+        else:
+            print(f"{migration.version}_{migration.name}: pending")
+
+
+def connect_postgres(dbname: Optional[str] = None):
+    return psycopg2.connect(
+        dbname=dbname or os.getenv('POSTGRES_DB'),
+        user=os.getenv('POSTGRES_USER'),
+        password=os.getenv('POSTGRES_PASSWORD'),
+        host=os.getenv('POSTGRES_HOST'),
+        port=os.getenv('POSTGRES_PORT')
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Apply versioned PostgreSQL schema migrations')
+    parser.add_argument('--target', help='last version to apply (default: all)')
+    parser.add_argument('--lock-timeout', default='5s', help='lock_timeout for transactional migrations')
+    parser.add_argument('--dry-run', action='store_true', help='list pending migrations without applying them')
+    parser.add_argument('--status', action='store_true', help='show applied and pending migrations')
+    args = parser.parse_args()
+
+    conn = connect_postgres()
+    try:
+        if args.status:
+            show_status(conn)
+        else:
+            migrate(conn, args.target, args.lock_timeout, args.dry_run)
+    finally:
+        conn.close()
@@ -0,0 +1,9 @@
+-- Baseline: the table as created by create_postgres_db.py before migrations
+CREATE TABLE IF NOT EXISTS test_cases_generated (
+    id SERIAL PRIMARY KEY,
+    story_id INTEGER NOT NULL,
+    test_cases JSONB NOT NULL,
+    start_time TIMESTAMP,
+    end_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    num_test_cases INTEGER GENERATED ALWAYS AS (jsonb_array_length(test_cases)) STORED
+);
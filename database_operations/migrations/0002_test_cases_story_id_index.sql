@@ -0,0 +1,7 @@
+-- migrate: no-transaction
+-- Per-story lookups (DISTINCT ON (story_id) ... ORDER BY story_id, id DESC)
+-- read story_id, id, num_test_cases and end_time only; with all four in the
+-- index they are answered by an index-only scan that never reads the heap
+-- row or its TOASTed test_cases document.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS test_cases_generated_story_id_idx
+    ON test_cases_generated (story_id, id DESC) INCLUDE (num_test_cases, end_time);
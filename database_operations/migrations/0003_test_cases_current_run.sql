@@ -0,0 +1,43 @@
+-- The latest run (highest id) of each story is flagged is_current. Triggers
+-- keep the flag on exactly that row as runs are inserted and deleted; a
+-- per-story advisory lock serializes concurrent writers of the same story.
+-- Adding a column with a constant default does not rewrite the table.
+ALTER TABLE test_cases_generated ADD COLUMN IF NOT EXISTS is_current BOOLEAN NOT NULL DEFAULT false;
+
+CREATE OR REPLACE FUNCTION test_cases_generated_insert_current() RETURNS trigger AS $$
+DECLARE
+    current_id INTEGER;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('test_cases_generated'), NEW.story_id);
+    SELECT id INTO current_id
+    FROM test_cases_generated
+    WHERE story_id = NEW.story_id AND is_current;
+
+    IF current_id IS NULL OR current_id < NEW.id THEN
+        UPDATE test_cases_generated SET is_current = false WHERE id = current_id;
+        NEW.is_current := true;
+    ELSE
+        NEW.is_current := false;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION test_cases_generated_delete_current() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('test_cases_generated'), OLD.story_id);
+    UPDATE test_cases_generated SET is_current = true
+    WHERE id = (SELECT max(id) FROM test_cases_generated WHERE story_id = OLD.story_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS test_cases_generated_insert_current ON test_cases_generated;
+CREATE TRIGGER test_cases_generated_insert_current
+    BEFORE INSERT ON test_cases_generated
+    FOR EACH ROW EXECUTE FUNCTION test_cases_generated_insert_current();
+
+DROP TRIGGER IF EXISTS test_cases_generated_delete_current ON test_cases_generated;
+CREATE TRIGGER test_cases_generated_delete_current
+    AFTER DELETE ON test_cases_generated
+    FOR EACH ROW WHEN (OLD.is_current) EXECUTE FUNCTION test_cases_generated_delete_current();
@@ -0,0 +1,14 @@
+-- Flag the latest run of stories written before 0003. SHARE ROW EXCLUSIVE
+-- blocks writers (so no run is inserted between finding the latest id and
+-- flagging it) while reads carry on.
+LOCK TABLE test_cases_generated IN SHARE ROW EXCLUSIVE MODE;
+
+UPDATE test_cases_generated t
+SET is_current = true
+FROM (
+    SELECT max(id) AS id
+    FROM test_cases_generated
+    GROUP BY story_id
+    HAVING NOT bool_or(is_current)
+) latest
+WHERE t.id = latest.id;
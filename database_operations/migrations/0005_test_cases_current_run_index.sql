@@ -0,0 +1,6 @@
+-- migrate: no-transaction
+-- At most one current run per story, enforced by the database; also an
+-- index-only path to a story's current run
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS test_cases_generated_current_idx
+    ON test_cases_generated (story_id) INCLUDE (id, num_test_cases, end_time)
+    WHERE is_current;
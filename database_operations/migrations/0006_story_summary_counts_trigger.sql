@@ -0,0 +1,77 @@
+-- Keep story_summary.num_test_cases/process_end_time in step with each
+-- story's current run on every write to test_cases_generated, not only in
+-- the loaders. Inserts and deletes refresh once per statement from the
+-- transition tables; updates of the run itself (not is_current flips by the
+-- 0003 triggers) refresh per row. Does nothing while story_summary does not
+-- exist.
+CREATE OR REPLACE FUNCTION story_summary_refresh(story_ids INTEGER[]) RETURNS void AS $$
+BEGIN
+    IF to_regclass('story_summary') IS NULL THEN
+        RETURN;
+    END IF;
+    -- Lock summary rows in story_id order so concurrent writers cannot deadlock
+    PERFORM 1 FROM story_summary WHERE story_id = ANY(story_ids) ORDER BY story_id FOR UPDATE;
+    UPDATE story_summary s
+    SET num_test_cases = COALESCE(t.num_test_cases, 0),
+        process_end_time = t.end_time
+    FROM (
+        SELECT ids.story_id, c.num_test_cases, c.end_time
+        FROM unnest(story_ids) AS ids(story_id)
+        LEFT JOIN test_cases_generated c ON c.story_id = ids.story_id AND c.is_current
+    ) t
+    WHERE s.story_id = t.story_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION story_summary_runs_inserted() RETURNS trigger AS $$
+BEGIN
+    PERFORM story_summary_refresh(ARRAY(SELECT DISTINCT story_id FROM new_runs ORDER BY story_id));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION story_summary_runs_deleted() RETURNS trigger AS $$
+BEGIN
+    PERFORM story_summary_refresh(ARRAY(SELECT DISTINCT story_id FROM old_runs ORDER BY story_id));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION story_summary_run_updated() RETURNS trigger AS $$
+BEGIN
+    PERFORM story_summary_refresh(ARRAY(SELECT DISTINCT unnest(ARRAY[OLD.story_id, NEW.story_id]) ORDER BY 1));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS story_summary_runs_inserted ON test_cases_generated;
+CREATE TRIGGER story_summary_runs_inserted
+    AFTER INSERT ON test_cases_generated
+    REFERENCING NEW TABLE AS new_runs
+    FOR EACH STATEMENT EXECUTE FUNCTION story_summary_runs_inserted();
+
+DROP TRIGGER IF EXISTS story_summary_runs_deleted ON test_cases_generated;
+CREATE TRIGGER story_summary_runs_deleted
+    AFTER DELETE ON test_cases_generated
+    REFERENCING OLD TABLE AS old_runs
+    FOR EACH STATEMENT EXECUTE FUNCTION story_summary_runs_deleted();
+
+DROP TRIGGER IF EXISTS story_summary_run_updated ON test_cases_generated;
+CREATE TRIGGER story_summary_run_updated
+    AFTER UPDATE OF story_id, test_cases, end_time ON test_cases_generated
+    FOR EACH ROW EXECUTE FUNCTION story_summary_run_updated();
+
+-- Catch up summaries written before this migration
+DO $$
+BEGIN
+    IF to_regclass('story_summary') IS NOT NULL THEN
+        UPDATE story_summary s
+        SET num_test_cases = COALESCE(c.num_test_cases, 0),
+            process_end_time = c.end_time
+        FROM story_summary s2
+        LEFT JOIN test_cases_generated c ON c.story_id = s2.story_id AND c.is_current
+        WHERE s.story_id = s2.story_id
+          AND (s.num_test_cases, s.process_end_time) IS DISTINCT FROM (COALESCE(c.num_test_cases, 0), c.end_time);
+    END IF;
+END;
+$$;
@@ -0,0 +1,137 @@
+import psycopg2
+import psycopg2.extras
+import lancedb
+import os
+from dotenv import load_dotenv
+from typing import Iterable, List, Tuple
+
+load_dotenv()
+
+# Compact read model holding exactly the fields served by GET /api/stories/.
+# Runs written to test_cases_generated update it through the triggers of
+# migration 0006; stories written to LanceDB through upsert_stories.
+STORY_SUMMARY_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        story_id INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        num_test_cases INTEGER NOT NULL DEFAULT 0,
+        process_start_time TIMESTAMP NOT NULL,
+        process_end_time TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS {table}_start_time_idx
+        ON {table} (process_start_time DESC, story_id DESC);
+"""
+
+CREATE_STORY_SUMMARY_SQL = STORY_SUMMARY_DDL.format(table='story_summary')
+
+# Table a rebuild fills before it replaces story_summary
+REBUILD_TABLE = 'story_summary_rebuild'
+
+
+def upsert_stories(cur, stories: Iterable[Tuple[int, str, object]], table: str = 'story_summary'):
+    """
+    Insert or update summary rows for stories written to LanceDB
+
+    Args:
+        cur: PostgreSQL cursor; the caller commits
+        stories: (story_id, story_Description, time_stamp) tuples
+        table: Summary table to write, story_summary unless rebuilding
+    """
+    # One row per story_id; ON CONFLICT cannot touch the same row twice
+    rows = {int(story_id): (int(story_id), description, time_stamp) for story_id, description, time_stamp in stories}
+    psycopg2.extras.execute_values(cur, f"""
+        INSERT INTO {table} (story_id, description, process_start_time)
+        VALUES %s
+        ON CONFLICT (story_id) DO UPDATE
+        SET description = EXCLUDED.description,
+            process_start_time = EXCLUDED.process_start_time
+    """, list(rows.values()))
+
+
+def refresh_test_case_counts(cur, story_ids: List[int]):
+    """
+    Copy num_test_cases/end_time of the latest generation run into the summary
+
+    Args:
+        cur: PostgreSQL cursor; the caller commits
+        story_ids: Stories whose test cases were written
+    """
+    cur.execute("""
+        UPDATE story_summary s
+        SET num_test_cases = COALESCE(t.num_test_cases, 0),
+            process_end_time = t.end_time
+        FROM (
+            SELECT ids.story_id, latest.num_test_cases, latest.end_time
+            FROM unnest(%s::integer[]) AS ids(story_id)
+            LEFT JOIN LATERAL (
+                SELECT num_test_cases, end_time
+                FROM test_cases_generated
+                WHERE story_id = ids.story_id AND is_current
+            ) latest ON TRUE
+        ) t
+        WHERE s.story_id = t.story_id
+    """, ([int(story_id) for story_id in story_ids],))
+
+
+def rebuild_story_summary(batch_size: int = 10000):
+    """
+    Recreate story_summary from LanceDB user_stories and test_cases_generated
+
+    The new summary is built in a separate table while listings keep reading
+    the old one, then swapped in by renaming; story_summary is locked only
+    for the swap. Writers of test_cases_generated wait for the whole rebuild
+    (SHARE lock) so no run is missed. Stories bulk loaded meanwhile are
+    written to the old table and lost; do not run it during a bulk load.
+    """
+    conn = psycopg2.connect(
+        dbname=os.getenv('POSTGRES_DB'),
+        user=os.getenv('POSTGRES_USER'),
+        password=os.getenv('POSTGRES_PASSWORD'),
+        host=os.getenv('POSTGRES_HOST'),
+        port=os.getenv('POSTGRES_PORT')
+    )
+    cur = conn.cursor()
+
+    lance_db_path = os.getenv('LANCE_DB_PATH', 'data/lance_db')
+    lance_db = lancedb.connect(lance_db_path)
+    dataset = lance_db.open_table('user_stories').to_lance()
+
+    cur.execute("LOCK TABLE test_cases_generated IN SHARE MODE")
+    cur.execute(f"DROP TABLE IF EXISTS {REBUILD_TABLE}")
+    cur.execute(STORY_SUMMARY_DDL.format(table=REBUILD_TABLE))
+
+    total = 0
+    for batch in dataset.to_batches(columns=['story_id', 'story_Description', 'time_stamp'], batch_size=batch_size):
+        columns = batch.to_pydict()
+        upsert_stories(cur, zip(columns['story_id'], columns['story_Description'], columns['time_stamp']),
+                       table=REBUILD_TABLE)
+        total += batch.num_rows
+
+    # Fill test case columns for every story in one set-based statement
+    cur.execute(f"""
+        UPDATE {REBUILD_TABLE} s
+        SET num_test_cases = t.num_test_cases,
+            process_end_time = t.end_time
+        FROM (
+            SELECT story_id, num_test_cases, end_time
+            FROM test_cases_generated
+            WHERE is_current
+        ) t
+        WHERE s.story_id = t.story_id
+    """)
+    cur.execute(f"ANALYZE {REBUILD_TABLE}")
+
+    # Swap: listings wait only for these statements
+    cur.execute("DROP TABLE IF EXISTS story_summary")
+    cur.execute(f"ALTER TABLE {REBUILD_TABLE} RENAME TO story_summary")
+    cur.execute(f"ALTER INDEX {REBUILD_TABLE}_pkey RENAME TO story_summary_pkey")
+    cur.execute(f"ALTER INDEX {REBUILD_TABLE}_start_time_idx RENAME TO story_summary_start_time_idx")
+
+    conn.commit()
+    cur.close()
+    conn.close()
+    print(f"Rebuilt story_summary with {total} stories")
+
+
+if __name__ == "__main__":
+    rebuild_story_summary()
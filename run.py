@@ -1,6 +1,8 @@
 from app import create_app
 
-app = create_app()
-
+# Only build the app when run as a script: export workers are spawned and
+# re-import this module as __mp_main__, where create_app must not run again.
+# `flask run` (FLASK_APP=run.py) finds the create_app factory by itself.
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
+    app = create_app()
+    app.run(host='0.0.0.0', port=5000, debug=True)
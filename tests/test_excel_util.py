@@ -0,0 +1,30 @@
+"""
+write_excel reads the test cases twice and must not lose rows of an iterator
+"""
+import io
+import os
+import sys
+
+import pytest
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.excel_util import write_excel
+
+TEST_CASES = [
+    {'test_case_id': f'TC-{i}', 'description': 'd' * i, 'preconditions': 'p',
+     'steps': ['open', 'check'], 'expected_result': 'ok'}
+    for i in range(5)
+]
+
+
+@pytest.mark.parametrize('make', [list, iter, lambda cases: (case for case in cases)])
+def test_every_test_case_is_written(make):
+    output = io.BytesIO()
+    write_excel({'story': {'id': 1, 'description': 'story'}, 'test_cases': make(TEST_CASES)}, output)
+    output.seek(0)
+
+    rows = list(load_workbook(output).active.iter_rows(min_row=4, values_only=True))
+
+    assert [row[0] for row in rows] == [case['test_case_id'] for case in TEST_CASES]
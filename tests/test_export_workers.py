@@ -0,0 +1,58 @@
+"""
+Export worker processes must not build the Flask app
+
+The export pool uses the spawn start method, which re-runs the main script
+as ``__mp_main__`` in every worker; run.py must not call create_app there.
+"""
+import multiprocessing
+import os
+import runpy
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app
+
+
+def test_run_py_does_not_create_app_as_mp_main(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app, 'create_app', lambda: calls.append(os.getpid()))
+
+    # What a spawned worker does with the parent's main script
+    runpy.run_path(os.path.join(ROOT, 'run.py'), run_name='__mp_main__')
+
+    assert calls == []
+
+
+def test_spawned_worker_of_run_py_never_creates_app():
+    # Run run.py as the main script with a stand-in app whose run() spawns
+    # an export pool like create_app does and asks a worker about its
+    # __mp_main__, i.e. run.py as re-imported by spawn
+    script = f"""
+import multiprocessing, os, runpy, sys
+from concurrent.futures import ProcessPoolExecutor
+sys.path[:0] = [{ROOT!r}, {os.path.dirname(os.path.abspath(__file__))!r}]
+import app
+from test_export_workers import worker_state
+
+class StandIn:
+    def run(self, **kwargs):
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            print(executor.submit(worker_state).result(timeout=120))
+
+app.create_app = StandIn
+runpy.run_path({os.path.join(ROOT, 'run.py')!r}, run_name='__main__')
+"""
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+    main_name, has_app = result.stdout.split()[-2:]
+    assert main_name == '__mp_main__'
+    assert has_app == 'False'
+
+
+def worker_state():
+    """Name of the worker's re-imported main module and whether it built an app"""
+    main = sys.modules['__mp_main__']
+    return f"{main.__name__} {'app' in vars(main)}"
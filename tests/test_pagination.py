@@ -0,0 +1,62 @@
+"""
+Keyset cursors must keep nanosecond time_stamps exact
+"""
+import base64
+import json
+import os
+import sys
+
+import lancedb
+import pyarrow as pa
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.lance_store import LanceStoryStore
+from app.utils.pagination import decode_cursor, encode_cursor
+
+BASE = 1_700_000_000_000_000_000  # 2023-11-14T22:13:20 in nanoseconds
+
+
+def _cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def test_cursor_round_trip_keeps_nanoseconds():
+    assert decode_cursor(encode_cursor(BASE + 1, 7)) == (BASE + 1, 7)
+
+
+def test_isoformat_cursors_are_still_accepted():
+    assert decode_cursor(_cursor(['2023-11-14T22:13:20.000001', 7])) == (BASE + 1000, 7)
+    assert decode_cursor(_cursor(['2023-11-14T23:13:20.000001+01:00', 7])) == (BASE + 1000, 7)
+
+
+@pytest.mark.parametrize('payload', [[1.5, 7], [True, 7], ['not a time', 7], [BASE]])
+def test_malformed_cursors_are_rejected(payload):
+    with pytest.raises(ValueError):
+        decode_cursor(_cursor(payload))
+
+
+@pytest.mark.parametrize('unit, scale', [('ns', 1), ('us', 1000)])
+def test_cursor_pages_visit_every_story_once(tmp_path, unit, scale):
+    # Ids descend against time, so ties broken on story_id alone would drop stories
+    stamps = [BASE + 1 * scale, BASE + 2 * scale, BASE + 2 * scale, BASE + 3 * scale]
+    table = pa.table({
+        'story_id': pa.array([4, 3, 2, 1], pa.int64()),
+        'story_Description': ['a', 'b', 'c', 'd'],
+        'Processed_Flag': [False] * 4,
+        'time_stamp': pa.array([stamp // scale for stamp in stamps], pa.timestamp(unit))
+    })
+    lance_db = lancedb.connect(str(tmp_path))
+    lance_db.create_table('user_stories', table)
+    store = LanceStoryStore(lance_db)
+
+    seen, before = [], None
+    while True:
+        page = store.newest(limit=1, before=before)
+        if page.empty:
+            break
+        seen.append(int(page['story_id'].iloc[0]))
+        before = decode_cursor(encode_cursor(page['time_stamp'].iloc[0].value, seen[-1]))
+
+    assert seen == [1, 3, 2, 4]
@@ -0,0 +1,141 @@
+"""
+PostgresPool must not hold its lock while talking to the server
+
+Connections are stand-ins, so these tests run without PostgreSQL.
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+from psycopg2 import extensions
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import pg_pool
+from app.services.pg_pool import PostgresPool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        self.conn.probed.wait(5)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.probed = threading.Event()
+        self.probed.set()
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class SlowPool(PostgresPool):
+    """Pool whose connects block until ``release`` is set"""
+
+    def __init__(self, **kwargs):
+        super().__init__({}, **kwargs)
+        self.release = threading.Event()
+        self.release.set()
+        self.connecting = threading.Event()
+
+    def _connect(self):
+        self.connecting.set()
+        self.release.wait(5)
+        return FakeConnection()
+
+
+def _in_thread(call):
+    thread = threading.Thread(target=call, daemon=True)
+    thread.start()
+    return thread
+
+
+def _returns_quickly(call):
+    started = time.monotonic()
+    call()
+    return time.monotonic() - started < 0.5
+
+
+def test_connect_does_not_hold_the_lock():
+    pool = SlowPool(minconn=0, maxconn=2)
+    held = pool.getconn()
+
+    pool.release.clear()
+    pool.connecting.clear()
+    thread = _in_thread(pool.getconn)
+    assert pool.connecting.wait(5)
+
+    assert _returns_quickly(pool.stats)
+    assert _returns_quickly(lambda: pool.putconn(held))
+    pool.release.set()
+    thread.join(5)
+    assert pool.stats()['in_use'] == 1
+
+
+def test_prefill_does_not_hold_the_lock():
+    pool = SlowPool(minconn=1, maxconn=2)
+    pool.release.clear()
+    thread = _in_thread(pool.getconn)
+    assert pool.connecting.wait(5)
+
+    assert _returns_quickly(pool.stats)
+    pool.release.set()
+    thread.join(5)
+    assert pool.stats()['size'] == 1
+
+
+def test_health_check_does_not_hold_the_lock():
+    pool = SlowPool(minconn=0, maxconn=2, health_check_interval=0)
+    conn = pool.getconn()
+    other = pool.getconn()
+    pool.putconn(conn)
+
+    conn.probed.clear()
+    thread = _in_thread(pool.getconn)
+    time.sleep(0.1)
+
+    assert _returns_quickly(pool.stats)
+    assert _returns_quickly(lambda: pool.putconn(other))
+    conn.probed.set()
+    thread.join(5)
+    assert pool.stats()['in_use'] == 1
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_pools_are_reset_in_a_forked_child_by_one_hook():
+    pools = [SlowPool(minconn=0, maxconn=2) for _ in range(3)]
+    for pool in pools:
+        pool.getconn()
+    assert len(pg_pool._pools) >= 3
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if all(pool.stats()['size'] == 0 for pool in pools) else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.WEXITSTATUS(status) == 0
+    assert all(pool.stats()['in_use'] == 1 for pool in pools)